@@ -0,0 +1,79 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python benchmarks/compare.py results/base.json results/head.json [--threshold 10]
+
+Works for load_test.py output (per-phase p50/p95/p99, throughput, RSS) and
+micro-benchmark output (per-case time and peak allocations). Exits with
+status 1 when any metric regresses by more than the threshold percentage.
+"""
+
+import argparse
+import json
+import sys
+
+# metric path -> True if higher is better
+LOAD_METRICS = {
+    ("latency_ms", "p50"): False,
+    ("latency_ms", "p95"): False,
+    ("latency_ms", "p99"): False,
+    ("throughput_rps",): True,
+    ("rss_peak_mb",): False,
+}
+MICRO_METRICS = {
+    ("median_ms",): False,
+    ("peak_alloc_kb",): False,
+}
+
+
+def _get(record: dict, path: tuple):
+    for key in path:
+        record = record.get(key, {}) if isinstance(record, dict) else {}
+    return record if isinstance(record, (int, float)) else None
+
+
+def _index(result: dict) -> tuple[dict, dict]:
+    if "phases" in result:
+        return {p["phase"]: p for p in result["phases"]}, LOAD_METRICS
+    return {c["name"]: c for c in result["cases"]}, MICRO_METRICS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    base_index, metrics = _index(base)
+    head_index, _ = _index(head)
+
+    print(f"base {base.get('commit', '?')}  ->  head {head.get('commit', '?')}")
+    print(f"{'case':<36} {'metric':<22} {'base':>10} {'head':>10} {'change':>9}")
+    regressions = 0
+    for name, base_record in base_index.items():
+        head_record = head_index.get(name)
+        if head_record is None:
+            continue
+        for path, higher_is_better in metrics.items():
+            old, new = _get(base_record, path), _get(head_record, path)
+            if old is None or new is None or old == 0:
+                continue
+            change = (new - old) / old * 100
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > args.threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{name:<36} {'.'.join(path):<22} {old:>10.2f} {new:>10.2f} {change:>+8.1f}%{flag}")
+
+    print(f"\n{regressions} regression(s) over {args.threshold:.0f}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
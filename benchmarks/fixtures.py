@@ -0,0 +1,128 @@
+"""
+Deterministic payload generators for benchmarks.
+
+Nothing here needs third-party packages: PDFs are written by hand (one
+Helvetica text stream per page), so fixtures of any size can be produced
+on the fly instead of being checked in.
+"""
+
+import base64
+import random
+import uuid
+
+_VOCABULARY = (
+    "analysis market search engine content page ranking keyword title audience "
+    "conversion traffic organic strategy campaign report metric growth brand "
+    "product customer revenue design mobile link social media quality signal "
+    "index crawl structure heading description schema data table value"
+).split()
+
+
+def make_words(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [rng.choice(_VOCABULARY) for _ in range(count)]
+
+
+def make_text(words: int, seed: int = 0) -> str:
+    """Plain prose of roughly `words` words, split into sentences."""
+    tokens = make_words(words, seed)
+    sentences = []
+    for start in range(0, len(tokens), 12):
+        chunk = tokens[start:start + 12]
+        sentences.append(" ".join(chunk).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def make_pdf(pages: int, lines_per_page: int = 40, seed: int = 0) -> bytes:
+    """A valid PDF with `pages` pages of text and an Info dictionary."""
+    rng = random.Random(seed)
+    page_ids = [4 + 2 * i for i in range(pages)]
+    info_id = 4 + 2 * pages
+    objects: dict[int, bytes] = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % pid for pid in page_ids) + b"] /Count %d >>" % pages,
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        info_id: b"<< /Title (Benchmark Document) /Author (matrx-mcp benchmarks) /Producer (fixtures.py) >>",
+    }
+    for page_id in page_ids:
+        lines = [" ".join(rng.choice(_VOCABULARY) for _ in range(10)) for _ in range(lines_per_page)]
+        text_ops = b" T* ".join(b"(" + line.encode() + b") Tj" for line in lines)
+        stream = b"BT /F1 10 Tf 12 TL 50 760 Td " + text_ops + b" ET"
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (page_id + 1)
+        )
+        objects[page_id + 1] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n"
+    xref_offset = len(out)
+    count = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % count
+    for obj_id in range(1, count):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, info_id, xref_offset)
+    return bytes(out)
+
+
+def make_pdf_base64(pages: int, lines_per_page: int = 40, seed: int = 0) -> str:
+    return base64.b64encode(make_pdf(pages, lines_per_page, seed)).decode()
+
+
+def make_html(size_bytes: int, seed: int = 0) -> str:
+    """An HTML document of about `size_bytes` with OG tags, headings and paragraphs."""
+    rng = random.Random(seed)
+    head = (
+        "<!DOCTYPE html><html><head><title>Benchmark page</title>"
+        '<meta property="og:title" content="Benchmark page">'
+        '<meta property="og:description" content="Generated for benchmarks">'
+        '<meta property="og:image" content="https://example.com/og.png">'
+        '<meta property="og:url" content="https://example.com/">'
+        "</head><body><h1>Benchmark page</h1>"
+    )
+    parts = [head]
+    size = len(head)
+    section = 0
+    while size < size_bytes:
+        section += 1
+        level = rng.choice((2, 2, 3, 3, 4))
+        block = f"<h{level}>Section {section}</h{level}>" + "".join(
+            f"<p>{' '.join(rng.choice(_VOCABULARY) for _ in range(40))}</p>" for _ in range(3)
+        )
+        parts.append(block)
+        size += len(block)
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+VIRTUAL_TABLE_COLUMNS = [
+    {"name": "name", "type": "text"},
+    {"name": "email", "type": "text"},
+    {"name": "quantity", "type": "integer"},
+    {"name": "price", "type": "float"},
+    {"name": "active", "type": "boolean"},
+]
+
+
+def make_rows(count: int, seed: int = 0) -> list[dict]:
+    """Rows shaped like `virtual_table_rows` records, matching VIRTUAL_TABLE_COLUMNS."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        name = rng.choice(_VOCABULARY)
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "data": {
+                "name": f"{name}-{i}",
+                "email": f"{name}{i}@example.com",
+                "quantity": rng.randint(0, 1000),
+                "price": round(rng.uniform(1, 500), 2),
+                "active": rng.random() < 0.5,
+            },
+            "created_at": "2025-01-17T09:00:00+00:00",
+            "updated_at": "2025-01-17T09:00:00+00:00",
+        })
+    return rows
@@ -0,0 +1,398 @@
+"""
+End-to-end load test for MCP servers in this repo.
+
+Boots a server locally (an example under examples/, or a freshly generated
+python-vps project), drives MCP JSON-RPC over streamable HTTP at a fixed
+concurrency, and writes per-phase latency percentiles, throughput, CPU and
+RSS to a JSON file.
+
+    python benchmarks/load_test.py --target examples/pdf-tools --concurrency 16 --requests 200
+    python benchmarks/load_test.py --generate --workers 4 --payload large --out results/vps.json
+
+Phases: `tools/list`, then each tool on its own, then a weighted mix.
+CPU and RSS are sampled across the server's whole process tree (workers
+and pool processes included). Compare two result files with compare.py.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from scenarios import Call, build_scenario
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+_LAUNCHER = """
+import os
+import server
+port = int(os.environ["PORT"])
+if hasattr(server, "app"):
+    import uvicorn
+    uvicorn.run(server.app, host="127.0.0.1", port=port, log_level="warning")
+else:
+    server.mcp.run(transport="streamable-http", host="127.0.0.1", port=port)
+"""
+
+
+# --- Server lifecycle ---
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def generate_vps_project(workdir: Path) -> Path:
+    """Scaffold a python-vps project with the generator into `workdir`."""
+    subprocess.run(
+        [
+            str(REPO_ROOT / "generators" / "create-mcp.sh"),
+            "--name", "Bench Server",
+            "--lang", "python",
+            "--tier", "vps",
+            "--auth", "none",
+            "--output-dir", str(workdir),
+            "--no-register",
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return workdir / "bench-server"
+
+
+def start_server(project: Path, port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "PORT": str(port), "HOST": "127.0.0.1", "PYTHONPATH": str(project / "src")}
+    if (project / "src" / "serve.py").exists():
+        env["WORKERS"] = str(workers)
+        command = [sys.executable, "-m", "serve"]
+    else:
+        command = [sys.executable, "-c", _LAUNCHER]
+    return subprocess.Popen(
+        command, cwd=project, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, start_new_session=True
+    )
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    try:
+        os.killpg(process.pid, 15)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, 9)
+
+
+# --- Process sampling (Linux /proc) ---
+
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _process_tree(root: int) -> list[int]:
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def sample_tree(root: int) -> tuple[float, int]:
+    """Return (cpu seconds, rss bytes) summed over the process tree."""
+    cpu, rss = 0.0, 0
+    for pid in _process_tree(root):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{pid}/statm") as f:
+                rss += int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+    return cpu, rss
+
+
+class ResourceMonitor:
+    """Samples CPU and RSS of the server tree while a phase runs."""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        self._task = None
+
+    async def __aenter__(self):
+        self.cpu_start, rss = sample_tree(self.pid)
+        self.peak_rss = rss
+        self.wall_start = time.perf_counter()
+        self._task = asyncio.create_task(self._sample())
+        return self
+
+    async def _sample(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            _, rss = sample_tree(self.pid)
+            self.peak_rss = max(self.peak_rss, rss)
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        cpu_end, rss = sample_tree(self.pid)
+        self.peak_rss = max(self.peak_rss, rss)
+        self.cpu_seconds = cpu_end - self.cpu_start
+        self.wall_seconds = time.perf_counter() - self.wall_start
+        self.end_rss = rss
+
+
+# --- MCP client ---
+
+
+def _parse_response(response: httpx.Response) -> dict:
+    """Decode a JSON-RPC reply sent either as JSON or as a single SSE event."""
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        for line in response.text.splitlines():
+            if line.startswith("data:"):
+                return json.loads(line[5:])
+        raise ValueError("Empty event stream")
+    return response.json()
+
+
+class MCPSession:
+    """Minimal streamable-HTTP MCP client: one session, sequential requests."""
+
+    def __init__(self, client: httpx.AsyncClient, url: str):
+        self.client = client
+        self.url = url
+        self.headers = {"accept": "application/json, text/event-stream", "content-type": "application/json"}
+        self._next_id = 0
+
+    async def _post(self, payload: dict) -> httpx.Response:
+        return await self.client.post(self.url, content=json.dumps(payload), headers=self.headers)
+
+    async def request(self, method: str, params: dict | None = None) -> dict:
+        self._next_id += 1
+        response = await self._post({"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params or {}})
+        response.raise_for_status()
+        message = _parse_response(response)
+        if "error" in message:
+            raise RuntimeError(message["error"].get("message", "JSON-RPC error"))
+        return message["result"]
+
+    async def initialize(self) -> None:
+        self._next_id += 1
+        response = await self._post({
+            "jsonrpc": "2.0",
+            "id": self._next_id,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2025-03-26",
+                "capabilities": {},
+                "clientInfo": {"name": "matrx-load-test", "version": "1.0.0"},
+            },
+        })
+        response.raise_for_status()
+        session_id = response.headers.get("mcp-session-id")
+        if session_id:
+            self.headers["mcp-session-id"] = session_id
+        await self._post({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def call_tool(self, name: str, arguments: dict) -> dict:
+        result = await self.request("tools/call", {"name": name, "arguments": arguments})
+        if result.get("isError"):
+            raise RuntimeError(result.get("content", [{}])[0].get("text", "tool error"))
+        return result
+
+
+async def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(follow_redirects=True, timeout=5) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited early:\n{process.stderr.read().decode(errors='replace')}")
+            try:
+                await MCPSession(client, url).initialize()
+                return
+            except (httpx.HTTPError, ValueError):
+                await asyncio.sleep(0.25)
+    raise TimeoutError(f"Server at {url} did not become ready within {timeout}s")
+
+
+# --- Phases ---
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+async def run_phase(name: str, sessions: list[MCPSession], calls: list[Call], total: int, pid: int) -> dict:
+    """Issue `total` requests across all sessions, drawing calls by weight."""
+    weights = [call.weight for call in calls]
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    remaining = total
+    rng = random.Random(0)
+
+    async def worker(session: MCPSession):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            call = rng.choices(calls, weights)[0] if calls else None
+            start = time.perf_counter()
+            try:
+                if call is None:
+                    await session.request("tools/list")
+                else:
+                    await session.call_tool(call.tool, call.arguments)
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                key = type(e).__name__
+                errors[key] = errors.get(key, 0) + 1
+
+    async with ResourceMonitor(pid) as monitor:
+        await asyncio.gather(*(worker(s) for s in sessions))
+
+    latencies.sort()
+    completed = len(latencies)
+    ms = [value * 1000 for value in latencies]
+    request_bytes = sum(len(json.dumps(c.arguments)) for c in calls) // len(calls) if calls else 0
+    return {
+        "phase": name,
+        "requests": total,
+        "completed": completed,
+        "errors": errors,
+        "throughput_rps": completed / monitor.wall_seconds if monitor.wall_seconds else 0.0,
+        "latency_ms": {
+            "mean": sum(ms) / completed if completed else 0.0,
+            "p50": _percentile(ms, 50),
+            "p95": _percentile(ms, 95),
+            "p99": _percentile(ms, 99),
+            "max": ms[-1] if ms else 0.0,
+        },
+        "cpu_seconds": monitor.cpu_seconds,
+        "cpu_percent": 100 * monitor.cpu_seconds / monitor.wall_seconds if monitor.wall_seconds else 0.0,
+        "rss_peak_mb": monitor.peak_rss / 1_048_576,
+        "rss_end_mb": monitor.end_rss / 1_048_576,
+        "avg_request_bytes": request_bytes,
+    }
+
+
+async def run_benchmark(url: str, pid: int, calls: list[Call], concurrency: int, requests: int) -> list[dict]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(follow_redirects=True, timeout=300, limits=limits) as client:
+        sessions = [MCPSession(client, url) for _ in range(concurrency)]
+        await asyncio.gather(*(s.initialize() for s in sessions))
+
+        # Warm-up: one pass over every tool so imports and pools are primed
+        for call in calls:
+            try:
+                await sessions[0].call_tool(call.tool, call.arguments)
+            except Exception:
+                pass
+
+        phases = [await run_phase("tools/list", sessions, [], requests, pid)]
+        for call in calls:
+            phases.append(await run_phase(call.tool, sessions, [call], requests, pid))
+        phases.append(await run_phase("mixed", sessions, calls, requests, pid))
+        return phases
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(phases: list[dict]) -> None:
+    print(f"{'phase':<28} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'cpu %':>7} {'rss MB':>8} {'err':>5}")
+    for p in phases:
+        lat = p["latency_ms"]
+        print(
+            f"{p['phase']:<28} {p['throughput_rps']:>8.1f} {lat['p50']:>9.1f} {lat['p95']:>9.1f} "
+            f"{lat['p99']:>9.1f} {p['cpu_percent']:>7.0f} {p['rss_peak_mb']:>8.1f} {sum(p['errors'].values()):>5}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--target", help="Project directory, e.g. examples/pdf-tools")
+    source.add_argument("--generate", action="store_true", help="Generate a fresh python-vps project and benchmark it")
+    parser.add_argument("--scenario", help="Scenario name (default: derived from the target directory)")
+    parser.add_argument("--payload", choices=("small", "large"), default="small")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per phase")
+    parser.add_argument("--workers", type=int, default=1, help="Server workers (python-vps serve.py only)")
+    parser.add_argument("--out", default="benchmarks/results/load-test.json")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="mcp-bench-"))
+    try:
+        if args.generate:
+            project = generate_vps_project(workdir)
+            scenario = args.scenario or "python-vps"
+        else:
+            project = (REPO_ROOT / args.target).resolve() if not Path(args.target).is_absolute() else Path(args.target)
+            scenario = args.scenario or project.name
+        calls = build_scenario(scenario, args.payload)
+
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}/mcp"
+        process = start_server(project, port, args.workers)
+        try:
+            asyncio.run(wait_until_ready(url, process))
+            phases = asyncio.run(run_benchmark(url, process.pid, calls, args.concurrency, args.requests))
+        finally:
+            stop_server(process)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(phases)
+    result = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "target": "generated python-vps" if args.generate else args.target,
+        "scenario": scenario,
+        "payload": args.payload,
+        "concurrency": args.concurrency,
+        "requests_per_phase": args.requests,
+        "workers": args.workers,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "phases": phases,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+    print(f"\nResults written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
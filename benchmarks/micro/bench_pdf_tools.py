@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import load_tool_module, pdf_base64, tool_functions
+
+pdf_tools = load_tool_module("pdf-tools", "pdf_tools")
+tools = tool_functions(pdf_tools)
+
+
+def bench_decode_pdf(bench, pdf_pages):
+    reader = bench(pdf_tools._decode_pdf, pdf_base64(pdf_pages))
+    assert len(reader.pages) == pdf_pages
+
+
+def bench_extract_single_page(bench, pdf_pages):
+    reader = pdf_tools._decode_pdf(pdf_base64(pdf_pages))
+    page = reader.pages[pdf_pages // 2]
+    text = bench(page.extract_text)
+    assert text
+
+
+def bench_extract_text_from_page_tool(bench, pdf_pages):
+    result = bench(tools["extract_text_from_page"], pdf_base64(pdf_pages), pdf_pages // 2)
+    assert "error" not in result
+
+
+def bench_extract_text_from_pdf_tool(bench, pdf_pages):
+    if pdf_pages > 500:
+        pytest.skip("Full-document extraction is covered up to 500 pages")
+    result = bench(tools["extract_text_from_pdf"], pdf_base64(pdf_pages))
+    assert result["page_count"] == pdf_pages
+
+
+def bench_get_pdf_metadata_tool(bench, pdf_pages):
+    result = bench(tools["get_pdf_metadata"], pdf_base64(pdf_pages))
+    assert result["page_count"] == pdf_pages
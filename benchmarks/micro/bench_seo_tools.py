@@ -0,0 +1,63 @@
+import pytest
+
+from conftest import html_document, load_tool_module, text_document, tool_functions
+
+seo_tools = load_tool_module("meta-tag-checker", "seo_tools")
+text_analysis = load_tool_module("meta-tag-checker", "text_analysis")
+tools = tool_functions(seo_tools)
+
+
+def _parse_headings(html):
+    parser = seo_tools._HeadingParser()
+    parser.feed(html)
+    return parser.headings
+
+
+def _parse_meta_tags(html):
+    parser = seo_tools._MetaTagParser()
+    parser.feed(html)
+    return parser.meta_tags
+
+
+def bench_heading_parser(bench, html_bytes):
+    headings = bench(_parse_headings, html_document(html_bytes))
+    assert headings[0]["tag"] == "h1"
+
+
+def bench_meta_tag_parser(bench, html_bytes):
+    meta_tags = bench(_parse_meta_tags, html_document(html_bytes))
+    assert "og:title" in meta_tags
+
+
+def bench_tokenize_document(bench, html_bytes):
+    # Uncached: what the first tool call on a new text pays
+    doc = bench(text_analysis.Document, text_document(html_bytes))
+    assert doc.word_count > 0
+
+
+@pytest.fixture
+def no_text_cache(monkeypatch):
+    # A zero-byte cache stores nothing, so every round tokenizes the text again
+    monkeypatch.setattr(text_analysis, "_cache", text_analysis.DocumentCache(0))
+
+
+def bench_analyze_keyword_density(bench, html_bytes):
+    # Repeat calls on the same text reuse its cached tokenization
+    result = bench(tools["analyze_keyword_density"], text_document(html_bytes), "search engine")
+    assert result["total_words"] > 0
+
+
+def bench_analyze_keyword_density_uncached(bench, html_bytes, no_text_cache):
+    # A new text each call: tokenization plus analysis
+    result = bench(tools["analyze_keyword_density"], text_document(html_bytes), "search engine")
+    assert result["total_words"] > 0
+
+
+def bench_analyze_readability(bench, html_bytes):
+    result = bench(tools["analyze_readability"], text_document(html_bytes))
+    assert result["sentence_count"] > 0
+
+
+def bench_analyze_readability_uncached(bench, html_bytes, no_text_cache):
+    result = bench(tools["analyze_readability"], text_document(html_bytes))
+    assert result["sentence_count"] > 0
@@ -0,0 +1,85 @@
+import asyncio
+import csv
+import io
+import json
+
+from conftest import fixtures, load_tool_module, rows, tool_functions
+
+table_tools = load_tool_module("virtual-tables", "table_tools")
+table_store = load_tool_module("virtual-tables", "table_store")
+tools = tool_functions(table_tools)
+
+
+def _insert_all(batch):
+    # A fresh in-memory store per round, so rounds don't grow each other's tables
+    table_store._store = table_store.VirtualTableStore(table_store.MemoryBackend())
+
+    async def run():
+        await tools["create_virtual_table"]("bench", fixtures.VIRTUAL_TABLE_COLUMNS)
+        # Concurrent inserts are written in micro-batches
+        return await asyncio.gather(*(tools["insert_row"]("bench", row["data"]) for row in batch))
+
+    return asyncio.run(run())
+
+
+def _loaded_store(batch):
+    store = table_store.VirtualTableStore(table_store.MemoryBackend())
+
+    async def load():
+        table = await store.create_table("", "bench", fixtures.VIRTUAL_TABLE_COLUMNS)
+        await store.insert_rows("", table["id"], [row["data"] for row in batch])
+
+    asyncio.run(load())
+    return store
+
+
+def _export(store, file_format):
+    table_store._store = store
+    return asyncio.run(tools["export_table"]("bench", file_format))
+
+
+def _csv_text(batch):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, [column["name"] for column in fixtures.VIRTUAL_TABLE_COLUMNS])
+    writer.writeheader()
+    writer.writerows(row["data"] for row in batch)
+    return out.getvalue()
+
+
+def _import_csv(text):
+    table_store._store = table_store.VirtualTableStore(table_store.MemoryBackend())
+    return asyncio.run(tools["import_table"]("bench", text, "csv"))
+
+
+def _serialize_page(batch):
+    # Shape of a query_rows response carrying every row
+    return json.dumps({
+        "success": True,
+        "table_name": "bench",
+        "rows": batch,
+        "total_count": len(batch),
+        "limit": len(batch),
+        "offset": 0,
+        "filters_applied": {},
+    })
+
+
+def bench_insert_row_concurrent(bench, row_count):
+    inserted = bench(_insert_all, rows(row_count))
+    assert all(result["success"] for result in inserted)
+
+
+def bench_export_table_parquet(bench, row_count):
+    # Paged keyset reads plus Arrow encoding; large results become download files
+    exported = bench(_export, _loaded_store(rows(row_count)), "parquet")
+    assert exported["row_count"] == row_count
+
+
+def bench_import_table_csv(bench, row_count):
+    imported = bench(_import_csv, _csv_text(rows(row_count)))
+    assert imported["rows_imported"] == row_count
+
+
+def bench_serialize_query_rows_response(bench, row_count):
+    payload = bench(_serialize_page, rows(row_count))
+    assert payload
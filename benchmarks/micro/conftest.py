@@ -0,0 +1,168 @@
+"""
+Micro-benchmark harness for the example tool modules.
+
+    pytest benchmarks/micro                       # quick sizes
+    pytest benchmarks/micro --bench-full          # up to 2,000-page PDFs, 10 MB HTML, 1M rows
+    pytest benchmarks/micro --bench-out run.json  # where to write results
+
+Each benchmark calls the `bench` fixture, which times several rounds
+(median reported) and then measures peak allocations of one more round
+with tracemalloc. Results are written as JSON for benchmarks/compare.py.
+"""
+
+import functools
+import importlib.util
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+sys.path.insert(0, str(REPO_ROOT / "shared" / "python"))
+
+import fixtures  # noqa: E402
+from instrumentation import collect_tools  # noqa: E402
+
+SIZES = {
+    "pdf_pages": ([1, 10, 100], [1, 10, 100, 500, 2000]),
+    "html_bytes": ([10_000, 100_000, 1_000_000], [10_000, 100_000, 1_000_000, 10_000_000]),
+    "row_count": ([1_000, 10_000], [1_000, 10_000, 100_000, 1_000_000]),
+}
+
+_results: list[dict] = []
+
+
+def pytest_addoption(parser):
+    parser.addoption("--bench-full", action="store_true", help="Include the largest fixture sizes")
+    parser.addoption("--bench-out", default=str(REPO_ROOT / "benchmarks" / "results" / "micro.json"))
+    parser.addoption("--bench-rounds", type=int, default=5, help="Timed rounds per case")
+
+
+def pytest_generate_tests(metafunc):
+    full = metafunc.config.getoption("--bench-full")
+    for name, (quick, complete) in SIZES.items():
+        if name in metafunc.fixturenames:
+            metafunc.parametrize(name, complete if full else quick)
+
+
+# --- Loading tool modules ---
+
+
+def load_tool_module(example: str, module: str):
+    """
+    Import examples/<example>/src/tools/<module>.py under a unique package
+    name, so examples' `tools` packages don't collide and relative imports work.
+    """
+    package = "bench_" + example.replace("-", "_") + "_tools"
+    if package not in sys.modules:
+        directory = REPO_ROOT / "examples" / example / "src" / "tools"
+        spec = importlib.util.spec_from_file_location(
+            package, directory / "__init__.py", submodule_search_locations=[str(directory)]
+        )
+        loaded = importlib.util.module_from_spec(spec)
+        sys.modules[package] = loaded
+        spec.loader.exec_module(loaded)
+    return importlib.import_module(f"{package}.{module}")
+
+
+def tool_functions(module) -> dict:
+    """The plain tool functions defined in a module's register(mcp)."""
+    return {f.__name__: f for f in collect_tools(module.register).functions.values()}
+
+
+# --- Cached fixtures (large payloads are expensive to build) ---
+
+
+@functools.lru_cache(maxsize=None)
+def pdf_base64(pages: int) -> str:
+    return fixtures.make_pdf_base64(pages)
+
+
+@functools.lru_cache(maxsize=None)
+def html_document(size_bytes: int) -> str:
+    return fixtures.make_html(size_bytes)
+
+
+@functools.lru_cache(maxsize=None)
+def text_document(size_bytes: int) -> str:
+    # ~7 bytes per generated word
+    return fixtures.make_text(max(1, size_bytes // 7))
+
+
+@functools.lru_cache(maxsize=None)
+def rows(count: int) -> list:
+    return fixtures.make_rows(count)
+
+
+# --- The bench fixture ---
+
+
+@pytest.fixture
+def bench(request):
+    rounds = request.config.getoption("--bench-rounds")
+
+    def run(func, *args, **kwargs):
+        start = time.perf_counter()
+        func(*args, **kwargs)  # Warm-up round, also used to pick the round count
+        first = time.perf_counter() - start
+        timed_rounds = 1 if first > 2.0 else rounds
+
+        times = []
+        for _ in range(timed_rounds):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        _results.append({
+            "name": request.node.name,
+            "rounds": timed_rounds,
+            "median_ms": statistics.median(times) * 1000,
+            "min_ms": min(times) * 1000,
+            "peak_alloc_kb": peak / 1024,
+        })
+        return result
+
+    return run
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _results:
+        return
+    terminalreporter.section("micro-benchmarks")
+    terminalreporter.write_line(f"{'case':<60} {'median ms':>11} {'min ms':>10} {'peak KB':>11}")
+    for r in _results:
+        terminalreporter.write_line(
+            f"{r['name']:<60} {r['median_ms']:>11.2f} {r['min_ms']:>10.2f} {r['peak_alloc_kb']:>11.0f}"
+        )
+
+    out = Path(config.getoption("--bench-out"))
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "full": config.getoption("--bench-full"),
+        "cases": _results,
+    }, indent=2))
+    terminalreporter.write_line(f"\nResults written to {out}")
@@ -0,0 +1,83 @@
+"""
+Tool-call mixes for each benchmark target.
+
+A scenario is a list of `Call`s; the load test runs each tool on its own
+and then a weighted mix of all of them. `payload` selects fixture sizes:
+"small" for latency-bound runs, "large" for throughput/memory runs.
+"""
+
+from dataclasses import dataclass
+
+import fixtures
+
+PAYLOAD_SIZES = {
+    "small": {"pdf_pages": 5, "html_bytes": 20_000, "text_words": 1_000, "rows": 10},
+    "large": {"pdf_pages": 200, "html_bytes": 2_000_000, "text_words": 100_000, "rows": 500},
+}
+
+
+@dataclass
+class Call:
+    tool: str
+    arguments: dict
+    weight: int = 1
+
+
+def _pdf_tools(sizes: dict) -> list[Call]:
+    pdf = fixtures.make_pdf_base64(sizes["pdf_pages"])
+    return [
+        Call("count_pdf_pages", {"pdf_base64": pdf}, 3),
+        Call("get_pdf_metadata", {"pdf_base64": pdf}, 3),
+        Call("extract_text_from_page", {"pdf_base64": pdf, "page_number": 0}, 2),
+        Call("extract_text_from_pdf", {"pdf_base64": pdf}, 1),
+        Call("merge_pdfs_info", {"pdf_count": 3}, 1),
+    ]
+
+
+def _meta_tag_checker(sizes: dict) -> list[Call]:
+    html = fixtures.make_html(sizes["html_bytes"])
+    text = fixtures.make_text(sizes["text_words"])
+    return [
+        Call("check_meta_title", {"title": "Benchmark page title for meta checks"}, 4),
+        Call("check_meta_description", {"description": fixtures.make_text(25)}, 4),
+        Call("analyze_heading_structure", {"html": html}, 2),
+        Call("check_open_graph_tags", {"html": html}, 2),
+        Call("analyze_keyword_density", {"text": text, "keyword": "search engine"}, 2),
+        Call("analyze_readability", {"text": text}, 1),
+    ]
+
+
+def _virtual_tables(sizes: dict) -> list[Call]:
+    # "contacts" and row-001 are the in-memory store's demo data
+    row = fixtures.make_rows(1)[0]["data"]
+    contact = {"name": row["name"], "email": row["email"], "phone": "555-0100"}
+    return [
+        Call("list_virtual_tables", {}, 3),
+        Call("get_table_schema", {"table_name": "contacts"}, 3),
+        Call("query_rows", {"table_name": "contacts", "limit": sizes["rows"]}, 4),
+        Call("insert_row", {"table_name": "contacts", "data": contact}, 2),
+        Call("update_row", {"table_name": "contacts", "row_id": "row-001", "data": {"phone": "555-0199"}}, 1),
+        Call("create_virtual_table", {"table_name": "bench", "columns": fixtures.VIRTUAL_TABLE_COLUMNS}, 1),
+    ]
+
+
+def _python_vps(sizes: dict) -> list[Call]:
+    return [
+        Call("hello", {"name": "benchmark"}, 4),
+        Call("add", {"a": 2, "b": 3}, 4),
+        Call("count_primes", {"limit": 20_000 if sizes is PAYLOAD_SIZES["small"] else 2_000_000}, 1),
+    ]
+
+
+SCENARIOS = {
+    "pdf-tools": _pdf_tools,
+    "meta-tag-checker": _meta_tag_checker,
+    "virtual-tables": _virtual_tables,
+    "python-vps": _python_vps,
+}
+
+
+def build_scenario(target: str, payload: str = "small") -> list[Call]:
+    if target not in SCENARIOS:
+        raise ValueError(f"No scenario for '{target}' (known: {', '.join(sorted(SCENARIOS))})")
+    return SCENARIOS[target](PAYLOAD_SIZES[payload])
@@ -1,6 +1,7 @@
-import re
 from html.parser import HTMLParser
 
+from .text_analysis import document
+
 
 class _HeadingParser(HTMLParser):
     """Simple HTML parser that extracts heading tags (h1-h6)."""
@@ -198,16 +199,13 @@ def register(mcp):
         density as a percentage of total words. A density between 1-3% is
         generally recommended for SEO.
         """
-        text_lower = text.lower()
+        doc = document(text)
         keyword_lower = keyword.lower().strip()
 
-        words = text_lower.split()
-        total_words = len(words)
+        total_words = doc.word_count
 
         # Count occurrences of the keyword (may be multi-word)
-        pattern = re.compile(re.escape(keyword_lower))
-        matches = pattern.findall(text_lower)
-        keyword_count = len(matches)
+        keyword_count = doc.keyword_count(keyword_lower)
 
         keyword_word_count = len(keyword_lower.split())
 
@@ -250,3 +248,45 @@ def register(mcp):
             "status": status,
             "recommendation": recommendation,
         }
+
+    @mcp.tool()
+    def analyze_readability(text: str) -> dict:
+        """Score how easy a block of text is to read.
+
+        Reports word, sentence and syllable counts with the Flesch reading
+        ease score (0-100, higher is easier) and Flesch-Kincaid grade level.
+        A reading ease of 60 or more suits most web audiences.
+        """
+        doc = document(text)
+        scores = doc.readability()
+        reading_ease = scores["reading_ease"]
+        min_reading_ease = 60.0
+
+        if doc.word_count == 0:
+            status = "warning"
+            recommendation = "No words found to score."
+        elif reading_ease >= min_reading_ease:
+            status = "good"
+            recommendation = (
+                f"Reading ease of {reading_ease} is at or above the recommended {min_reading_ease} "
+                f"for general web audiences."
+            )
+        else:
+            status = "warning"
+            recommendation = (
+                f"Reading ease of {reading_ease} is below the recommended {min_reading_ease}. "
+                f"Shorter sentences and simpler words make the text easier to read."
+            )
+
+        return {
+            "word_count": doc.word_count,
+            "sentence_count": doc.sentence_count,
+            "syllable_count": doc.syllable_count,
+            "avg_words_per_sentence": scores["words_per_sentence"],
+            "avg_syllables_per_word": scores["syllables_per_word"],
+            "flesch_reading_ease": reading_ease,
+            "flesch_kincaid_grade": scores["grade_level"],
+            "recommended_min_reading_ease": min_reading_ease,
+            "status": status,
+            "recommendation": recommendation,
+        }
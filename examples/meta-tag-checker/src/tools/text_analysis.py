@@ -0,0 +1,131 @@
+"""
+Shared text analysis for the SEO tools.
+
+Agents tend to run several tools over the same article: keyword density for
+a few keywords, then readability. Each tool used to lowercase and split the
+whole text itself. Here a text is tokenized once into a `Document`, which is
+kept in an LRU keyed by a hash of the content, and every metric is derived
+from that one tokenization:
+
+    doc = document(text)
+    doc.word_count, doc.keyword_count("search engine"), doc.readability()
+
+A document keeps the lowercased text and a frequency table of its words
+rather than the word list, which is several times the size of the text
+itself. Sentence and syllable counts are computed on first use and
+memoized, with syllables counted once per distinct word.
+
+Configuration:
+    TEXT_CACHE_MAX_BYTES   Approximate memory for cached documents (default: 64MB)
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from functools import cached_property
+
+# Sentence ends: a run of terminal punctuation followed by whitespace or the end of the text
+_SENTENCE_END = re.compile(r"[.!?]+(?=\s|$)")
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+_NON_LETTERS = re.compile(r"[^a-z]+")
+
+# Rough overhead per distinct word in the frequency table (str object plus dict entry)
+_WORD_OVERHEAD = 160
+
+
+def _syllables(word: str) -> int:
+    """Estimate syllables in a lowercase word by counting vowel groups."""
+    letters = _NON_LETTERS.sub("", word)
+    if not letters:
+        return 0
+    count = len(_VOWEL_GROUPS.findall(letters))
+    if letters.endswith("e") and not letters.endswith(("le", "ee")) and count > 1:
+        count -= 1  # Silent trailing e: "make", "phrase"
+    return max(count, 1)
+
+
+class Document:
+    """A lowercased, whitespace-tokenized text. Build through `document()` to share the tokenization."""
+
+    def __init__(self, text: str):
+        self.lower = text.lower()
+        self.word_counts = Counter(self.lower.split())
+        self.word_count = sum(self.word_counts.values())
+        self.size = len(self.lower) * 2 + len(self.word_counts) * _WORD_OVERHEAD
+
+    def keyword_count(self, keyword: str) -> int:
+        """Non-overlapping occurrences of a lowercased keyword anywhere in the text (substring match)."""
+        return self.lower.count(keyword)
+
+    @cached_property
+    def sentence_count(self) -> int:
+        if not self.word_count:
+            return 0
+        return max(len(_SENTENCE_END.findall(self.lower)), 1)
+
+    @cached_property
+    def syllable_count(self) -> int:
+        # Each distinct word is syllabified once, however often it repeats
+        return sum(_syllables(word) * count for word, count in self.word_counts.items())
+
+    def readability(self) -> dict:
+        """Flesch reading ease and Flesch-Kincaid grade level."""
+        words, sentences, syllables = self.word_count, self.sentence_count, self.syllable_count
+        if not words:
+            return {"words_per_sentence": 0.0, "syllables_per_word": 0.0, "reading_ease": 0.0, "grade_level": 0.0}
+        words_per_sentence = words / sentences
+        syllables_per_word = syllables / words
+        return {
+            "words_per_sentence": round(words_per_sentence, 2),
+            "syllables_per_word": round(syllables_per_word, 2),
+            "reading_ease": round(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, 2),
+            "grade_level": round(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, 2),
+        }
+
+
+class DocumentCache:
+    """LRU of documents keyed by content hash, bounded by their approximate size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._documents: OrderedDict[bytes, Document] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> Document:
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            doc = self._documents.get(key)
+            if doc is not None:
+                self._documents.move_to_end(key)
+                self.hits += 1
+                return doc
+            self.misses += 1
+
+        # Tokenize outside the lock; if two threads race on a new text, the first document stored wins
+        doc = Document(text)
+        if doc.size > self.max_bytes:
+            return doc
+        with self._lock:
+            if key not in self._documents:
+                self._documents[key] = doc
+                self._bytes += doc.size
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._documents.popitem(last=False)
+                    self._bytes -= evicted.size
+        return doc
+
+    def stats(self) -> dict:
+        return {"documents": len(self._documents), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+_cache = DocumentCache(int(os.environ.get("TEXT_CACHE_MAX_BYTES", 64 * 1024 * 1024)))
+
+
+def document(text: str) -> Document:
+    """Return the tokenized document for `text`, from the cache when it has been analyzed before."""
+    return _cache.get(text)
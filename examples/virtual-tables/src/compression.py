@@ -0,0 +1,250 @@
+"""
+Negotiated response compression (zstd, brotli, gzip) for MCP servers.
+
+Picks the best encoding the client accepts (`Accept-Encoding` q-values,
+ties broken by server preference zstd > br > gzip). zstd and brotli are
+used only when the `zstandard` / `brotli` packages are installed; gzip
+always works.
+
+Regular responses smaller than `minimum_size` are sent as is. Streamed
+responses are buffered until `minimum_size` bytes are seen. Event streams,
+which is how streamable HTTP returns tool results, are the exception: they
+are never delayed. If the first event is large enough, every later event
+is compressed and flushed on its own. A stream that opens with a small
+event, such as a progress notification, is left uncompressed.
+
+Usage:
+    from compression import CompressionMiddleware
+
+    app.add_middleware(CompressionMiddleware)
+
+Configuration:
+    COMPRESSION_MIN_SIZE     Smallest body worth compressing, in bytes (default: 1024)
+    COMPRESSION_ENCODINGS    Allowed encodings in preference order (default: zstd,br,gzip)
+"""
+
+import os
+import zlib
+from typing import Optional
+
+from metrics import REGISTRY
+
+COMPRESSION_BYTES = REGISTRY.counter(
+    "mcp_http_compression_bytes_total",
+    "Response bytes before (identity) and after compression, by encoding.",
+    ("encoding", "stage"),
+)
+
+# Content types that are already compressed (or not worth it)
+_SKIP_PREFIXES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "application/x-")
+
+
+class _GzipCompressor:
+    def __init__(self):
+        self._obj = zlib.compressobj(5, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self):
+        import brotli
+
+        self._obj = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self):
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._obj = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def _available_encodings() -> dict[str, type]:
+    encodings = {}
+    try:
+        import zstandard  # noqa: F401
+        encodings["zstd"] = _ZstdCompressor
+    except ImportError:
+        pass
+    try:
+        import brotli  # noqa: F401
+        encodings["br"] = _BrotliCompressor
+    except ImportError:
+        pass
+    encodings["gzip"] = _GzipCompressor
+    return encodings
+
+
+def negotiate(accept_encoding: str, preference: list[str]) -> Optional[str]:
+    """Choose an encoding from an Accept-Encoding header, or None for identity."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in preference:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the negotiated encoding."""
+
+    def __init__(self, app, minimum_size: Optional[int] = None, encodings: Optional[list[str]] = None):
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else int(
+            os.environ.get("COMPRESSION_MIN_SIZE", "1024")
+        )
+        available = _available_encodings()
+        wanted = encodings or [
+            e.strip() for e in os.environ.get("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()
+        ]
+        self.compressors = {e: available[e] for e in wanted if e in available}
+        self.preference = list(self.compressors)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept, self.preference) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.compressors[encoding], self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    """Wraps `send` for one response; decides on compression at the first body chunk."""
+
+    def __init__(self, send, encoding: str, compressor_class: type, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.compressor_class = compressor_class
+        self.minimum_size = minimum_size
+        self.start: Optional[dict] = None
+        self.mode: Optional[str] = None  # None (undecided), "identity" or "compress"
+        self.buffer = bytearray()
+        self.compressor = None
+        self.event_stream = False
+
+    async def __call__(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = {k.lower(): v for k, v in message.get("headers", [])}
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            self.event_stream = content_type.startswith("text/event-stream")
+            if (
+                b"content-encoding" in headers
+                or message["status"] in (204, 304)
+                or content_type.startswith(_SKIP_PREFIXES)
+            ):
+                self.mode = "identity"
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.mode == "identity":
+            if self.mode is None:
+                # Trailers, pathsend etc. before any body: don't touch the response
+                self.mode = "identity"
+                await self.send(self.start)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.mode == "compress":
+            await self._send_compressed(body, more_body)
+            return
+
+        # Undecided: buffer non-event-stream bodies until the threshold is reached
+        self.buffer += body
+        if len(self.buffer) < self.minimum_size and (more_body and not self.event_stream):
+            return
+        if len(self.buffer) < self.minimum_size:
+            self.mode = "identity"
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": bytes(self.buffer), "more_body": more_body})
+            return
+
+        self.mode = "compress"
+        self.compressor = self.compressor_class()
+        headers = [
+            (k, v) for k, v in self.start.get("headers", [])
+            if k.lower() not in (b"content-length", b"vary")
+        ]
+        vary = [v for k, v in self.start.get("headers", []) if k.lower() == b"vary"]
+        vary_value = b", ".join(vary + [b"Accept-Encoding"]) if vary else b"Accept-Encoding"
+        headers += [(b"content-encoding", self.encoding.encode()), (b"vary", vary_value)]
+
+        data = bytes(self.buffer)
+        self.buffer = bytearray()
+        if not more_body:
+            compressed = self.compressor.compress(data) + self.compressor.finish()
+            headers.append((b"content-length", str(len(compressed)).encode()))
+            await self.send({**self.start, "headers": headers})
+            self._count(len(data), len(compressed))
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        await self.send({**self.start, "headers": headers})
+        await self._send_compressed(data, more_body)
+
+    async def _send_compressed(self, body: bytes, more_body: bool) -> None:
+        chunk = self.compressor.compress(body)
+        # Flush every chunk so streamed events reach the client promptly
+        chunk += self.compressor.flush() if more_body else self.compressor.finish()
+        self._count(len(body), len(chunk))
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _count(self, identity: int, compressed: int) -> None:
+        COMPRESSION_BYTES.inc(self.encoding, "identity", amount=identity)
+        COMPRESSION_BYTES.inc(self.encoding, "compressed", amount=compressed)
@@ -0,0 +1,107 @@
+"""
+Reads the JSON-RPC envelope of an MCP request while its body streams in.
+
+`AdmissionMiddleware` and `RequestLimitMiddleware` both need to know which
+tool a `tools/call` targets before its (possibly very large) arguments
+arrive. `EnvelopeSniffer` scans only the first `SNIFF_BYTES` of the body
+and tracks JSON nesting, so `"id"`, `"method"` and `params.name` are read
+from their real positions and never from inside the arguments.
+
+Usage:
+    sniffer = EnvelopeSniffer()
+    while not sniffer.feed(chunk, more_body):
+        ...
+    sniffer.tool_name, sniffer.request_id
+
+`request_id` stays None when the id comes after the arguments (some
+clients put it last); `request_id_of` finds it in the complete body.
+"""
+
+import json
+import re
+from typing import Optional, Union
+
+SNIFF_BYTES = 64 * 1024
+
+# A complete string (optionally a key, with its colon), a bracket, or the
+# opening quote of a string that continues past the bytes read so far
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"(\s*:)?|[{}\[\]"]')
+_SCALAR = re.compile(rb'\s*("[^"\\]*(?:\\.[^"\\]*)*"|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|null)')
+
+RequestId = Union[str, int, None]
+
+
+class EnvelopeSniffer:
+    """Incremental reader of `id`, `method` and `params.name` from a JSON-RPC request body."""
+
+    def __init__(self, limit: int = SNIFF_BYTES):
+        self.limit = limit
+        self.prefix = bytearray()
+        self.method: Optional[str] = None
+        self.tool_name: Optional[str] = None
+        self.request_id: RequestId = None
+        self.done = False
+
+    @property
+    def is_tool_call(self) -> bool:
+        return self.method == "tools/call" and self.tool_name is not None
+
+    def feed(self, chunk: bytes, more_body: bool = False) -> bool:
+        """Add the next body chunk. Returns True once sniffing is over (the envelope is known or never will be)."""
+        if self.done:
+            return True
+        self.prefix += chunk[: max(0, self.limit - len(self.prefix))]
+        arguments_reached = self._scan()
+        self.done = (
+            self.is_tool_call or arguments_reached or len(self.prefix) >= self.limit or not more_body
+        )
+        return self.done
+
+    def _scan(self) -> bool:
+        """Re-read the prefix; returns True when `params.arguments` has been reached."""
+        stack: list = []  # Key under which each open container sits
+        key = None
+        for match in _TOKEN.finditer(self.prefix):
+            token = match.group()
+            if token == b'"':
+                break  # Unterminated string: wait for more bytes
+            if token in (b"{", b"["):
+                stack.append(key)
+                key = None
+            elif token in (b"}", b"]"):
+                if stack:
+                    stack.pop()
+                key = None
+            elif match.group(1):
+                key = token[1:token.rindex(b'"')]
+                if stack == [None] and key in (b"id", b"method"):
+                    value = _SCALAR.match(self.prefix, match.end())
+                    if value:
+                        setattr(self, "request_id" if key == b"id" else "method", json.loads(value.group(1)))
+                elif stack == [None, b"params"]:
+                    if key == b"arguments":
+                        return True
+                    if key == b"name":
+                        value = _SCALAR.match(self.prefix, match.end())
+                        if value and value.group(1).startswith(b'"'):
+                            self.tool_name = json.loads(value.group(1))
+            else:
+                key = None
+        return False
+
+
+def request_id_of(body: bytes) -> RequestId:
+    """The `id` of a complete JSON-RPC request body, or None."""
+    try:
+        message = json.loads(body)
+    except ValueError:
+        return None
+    return message.get("id") if isinstance(message, dict) else None
+
+
+def jsonrpc_error(request_id: RequestId, code: int, message: str, data: Optional[dict] = None) -> bytes:
+    """Encoded JSON-RPC error response."""
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return json.dumps({"jsonrpc": "2.0", "id": request_id, "error": error}).encode()
@@ -0,0 +1,86 @@
+"""
+Structured JSON logging configuration for MCP servers.
+"""
+
+import logging
+import json
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+# Per-call context, populated by the tool instrumentation wrappers
+tool_name_var: ContextVar[Optional[str]] = ContextVar("tool_name", default=None)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+@contextmanager
+def tool_context(tool_name: str, request_id: str):
+    """Bind tool_name and request_id to every log record emitted inside the block."""
+    name_token = tool_name_var.set(tool_name)
+    request_token = request_id_var.set(request_id)
+    try:
+        yield
+    finally:
+        request_id_var.reset(request_token)
+        tool_name_var.reset(name_token)
+
+
+class ToolContextFilter(logging.Filter):
+    """Copy the current tool context onto log records that don't set it explicitly."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "tool_name", None) is None:
+            record.tool_name = tool_name_var.get()
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Format log records as JSON for structured logging."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        if record.exc_info and record.exc_info[0]:
+            log_entry["exception"] = self.formatException(record.exc_info)
+
+        # Include any extra fields attached to the record
+        for key in ("mcp_name", "tool_name", "user_id", "request_id"):
+            value = getattr(record, key, None)
+            if value:
+                log_entry[key] = value
+
+        return json.dumps(log_entry)
+
+
+def setup_logging(mcp_name: str, level: str = "INFO") -> logging.Logger:
+    """
+    Configure structured JSON logging for an MCP server.
+
+    Args:
+        mcp_name: Name of the MCP server (included in all log entries)
+        level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+
+    Returns:
+        Configured logger instance.
+    """
+    logger = logging.getLogger(mcp_name)
+    logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    # Clear existing handlers
+    logger.handlers.clear()
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JSONFormatter())
+    handler.addFilter(ToolContextFilter())
+    logger.addHandler(handler)
+
+    return logger
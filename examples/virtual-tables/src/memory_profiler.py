@@ -0,0 +1,424 @@
+"""
+Opt-in memory profiling and leak detection for long-running MCP servers.
+
+With MEMORY_PROFILING=true, each worker traces Python allocations with
+tracemalloc and serves an admin API under /admin/memory:
+
+    GET  /admin/memory            RSS, traced memory by tool, GC stats, snapshot history
+    GET  /admin/memory/top        Largest live allocations (?group=lineno|filename|traceback|tool)
+    GET  /admin/memory/diff       Growth since the last periodic snapshot (?base=last|baseline)
+    GET  /admin/memory/objects    Live objects per type, with the change since the previous call
+    POST /admin/memory/snapshot   Take a periodic snapshot now
+    POST /admin/memory/gc         Run a full collection and report what it freed
+
+Requests need `Authorization: Bearer <key>` with a key from MCP_API_KEYS
+(`auth.validate_api_key`). With profiling off the routes don't exist.
+
+Allocations are attributed to the tool whose code is on the allocating
+stack: `memory_wrapper` records the source lines of every registered tool,
+and each trace is walked from the allocation outwards until it reaches one.
+Allocations made by process-pool tools happen in worker processes and are
+not traced.
+
+Every MEMORY_SNAPSHOT_INTERVAL seconds a snapshot is taken and compared with
+the previous one. The history keeps its totals, per-tool bytes and the
+largest growth sites, so a leak shows up as a tool and line that grow in
+every entry. Only the startup (baseline) and latest snapshots are kept in
+full. Each uvicorn worker profiles itself; responses carry the worker's pid.
+
+tracemalloc slows allocation-heavy code and adds memory per traced block,
+growing with the number of stored frames. Leave it off unless you are
+investigating.
+
+Configuration:
+    MEMORY_PROFILING           "true" to trace allocations and serve /admin/memory (default: off)
+    MEMORY_TRACE_FRAMES        Frames stored per allocation (default: 25)
+    MEMORY_SNAPSHOT_INTERVAL   Seconds between periodic snapshots, 0 to disable (default: 300)
+    MEMORY_SNAPSHOT_HISTORY    Periodic snapshot summaries kept (default: 24)
+"""
+
+import asyncio
+import gc
+import inspect
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from typing import Callable, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+RESIDENT_BYTES = REGISTRY.gauge("mcp_process_resident_bytes", "Resident set size of this worker in bytes.")
+TRACED_BYTES = REGISTRY.gauge("mcp_memory_traced_bytes", "Memory allocated by Python and traced by tracemalloc.")
+TOOL_TRACED_BYTES = REGISTRY.gauge(
+    "mcp_memory_tool_traced_bytes", "Live traced memory allocated under each tool.", ("tool",)
+)
+GC_PAUSE_SECONDS = REGISTRY.counter(
+    "mcp_gc_pause_seconds_total", "Time spent in garbage collection, by generation.", ("generation",)
+)
+
+UNATTRIBUTED = "(unattributed)"
+GROUPS = ("lineno", "filename", "traceback", "tool")
+
+# Allocations by the profiler and the import system are noise in every report
+_IGNORED = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+def _env_int(key: str, default: int) -> int:
+    value = os.environ.get(key)
+    return int(value) if value else default
+
+
+def enabled() -> bool:
+    return os.environ.get("MEMORY_PROFILING", "").lower() in ("1", "true", "yes")
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None  # Not Linux
+
+
+# --- Tool attribution ---
+
+
+class _ToolCode:
+    """Source line ranges of registered tools, for mapping allocation frames to tools."""
+
+    def __init__(self):
+        self._ranges: dict[str, dict[str, tuple[int, int]]] = {}  # filename -> tool -> (first, last)
+        self._frames: dict[tuple[str, int], Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, tool_name: str, func: Callable) -> None:
+        target = inspect.unwrap(func)
+        try:
+            filename = inspect.getsourcefile(target)
+            lines, first = inspect.getsourcelines(target)
+        except (OSError, TypeError):
+            return
+        if not filename:
+            return
+        with self._lock:
+            # Re-registration (hot reload) replaces the tool's previous location
+            for ranges in self._ranges.values():
+                ranges.pop(tool_name, None)
+            self._ranges.setdefault(filename, {})[tool_name] = (first, first + len(lines) - 1)
+            self._frames = {}
+
+    def tool_for(self, traceback: tracemalloc.Traceback) -> Optional[str]:
+        """The innermost tool on an allocation's stack."""
+        frames = self._frames
+        for frame in reversed(traceback):  # Tracebacks run oldest to most recent
+            key = (frame.filename, frame.lineno)
+            if key not in frames:
+                frames[key] = None
+                for tool_name, (first, last) in list(self._ranges.get(frame.filename, {}).items()):
+                    if first <= frame.lineno <= last:
+                        frames[key] = tool_name
+                        break
+            if frames[key] is not None:
+                return frames[key]
+        return None
+
+
+_tool_code = _ToolCode()
+
+
+def memory_wrapper(func: Callable, tool_name: str) -> Callable:
+    """Instrumentation wrapper: records where a tool's code lives. Returns the tool unchanged."""
+    _tool_code.add(tool_name, func)
+    return func
+
+
+# --- Snapshots ---
+
+
+def _location(traceback: tracemalloc.Traceback) -> list[str]:
+    return [f"{frame.filename}:{frame.lineno}" for frame in reversed(traceback)]
+
+
+def _by_tool(snapshot: tracemalloc.Snapshot) -> dict[str, dict]:
+    tools: dict[str, dict] = {}
+    for stat in snapshot.statistics("traceback"):
+        entry = tools.setdefault(_tool_code.tool_for(stat.traceback) or UNATTRIBUTED, {"size": 0, "count": 0})
+        entry["size"] += stat.size
+        entry["count"] += stat.count
+    return dict(sorted(tools.items(), key=lambda item: -item[1]["size"]))
+
+
+def _statistics(snapshot: tracemalloc.Snapshot, group: str, limit: int) -> list[dict]:
+    if group == "tool":
+        return [{"tool": tool, **totals} for tool, totals in list(_by_tool(snapshot).items())[:limit]]
+    entries = []
+    for stat in snapshot.statistics(group)[:limit]:
+        entry = {"location": _location(stat.traceback), "size": stat.size, "count": stat.count}
+        if group == "traceback":
+            entry["tool"] = _tool_code.tool_for(stat.traceback) or UNATTRIBUTED
+        entries.append(entry)
+    return entries
+
+
+def _growth(snapshot: tracemalloc.Snapshot, base: tracemalloc.Snapshot, group: str, limit: int) -> list[dict]:
+    entries = []
+    # compare_to sorts by absolute change; only growing sites can be leaks
+    grown = [stat for stat in snapshot.compare_to(base, group) if stat.size_diff > 0]
+    for stat in sorted(grown, key=lambda stat: -stat.size_diff)[:limit]:
+        entry = {
+            "location": _location(stat.traceback),
+            "size_diff": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size": stat.size,
+            "count": stat.count,
+        }
+        if group == "traceback":
+            entry["tool"] = _tool_code.tool_for(stat.traceback) or UNATTRIBUTED
+        entries.append(entry)
+    return entries
+
+
+def _tool_growth(snapshot: tracemalloc.Snapshot, base: tracemalloc.Snapshot) -> list[dict]:
+    now, before = _by_tool(snapshot), _by_tool(base)
+    growth = [
+        {"tool": tool, "size_diff": totals["size"] - before.get(tool, {}).get("size", 0), **totals}
+        for tool, totals in now.items()
+    ]
+    return sorted((entry for entry in growth if entry["size_diff"] > 0), key=lambda entry: -entry["size_diff"])
+
+
+class MemoryProfiler:
+    """tracemalloc lifecycle, periodic snapshots and GC timing for one worker process."""
+
+    def __init__(self, frames: int = 25, interval: float = 300, history: int = 24):
+        self.frames = frames
+        self.interval = interval
+        self.history: deque[dict] = deque(maxlen=history)
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._last: Optional[tracemalloc.Snapshot] = None
+        self._previous_objects: Counter = Counter()
+        self._gc_started: Optional[float] = None
+        self._gc_totals = {generation: {"collections": 0, "pause_seconds": 0.0} for generation in range(3)}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        if self._on_gc not in gc.callbacks:
+            gc.callbacks.append(self._on_gc)
+        if self._baseline is None:
+            self._baseline = self._last = self._take()
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="memory-snapshots", daemon=True)
+            self._thread.start()
+        logger.info("Memory profiling on: %d frames, snapshots every %ss", self.frames, self.interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        tracemalloc.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.snapshot()
+            except Exception:
+                logger.exception("Periodic memory snapshot failed")
+
+    def _on_gc(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+        elif self._gc_started is not None:
+            elapsed = time.perf_counter() - self._gc_started
+            self._gc_started = None
+            totals = self._gc_totals[info["generation"]]
+            totals["collections"] += 1
+            totals["pause_seconds"] += elapsed
+            GC_PAUSE_SECONDS.inc(str(info["generation"]), amount=elapsed)
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in _IGNORED]
+        )
+
+    def snapshot(self) -> dict:
+        """Take a periodic snapshot, compare it with the previous one and add the summary to the history."""
+        snapshot = self._take()
+        with self._lock:
+            previous, self._last = self._last or snapshot, snapshot
+        tools = _by_tool(snapshot)
+        traced, peak = tracemalloc.get_traced_memory()
+        record = {
+            "time": time.time(),
+            "rss_bytes": _rss_bytes(),
+            "traced_bytes": traced,
+            "traced_peak_bytes": peak,
+            "tools": {tool: totals["size"] for tool, totals in tools.items()},
+            "tool_growth": _tool_growth(snapshot, previous)[:10],
+            "top_growth": _growth(snapshot, previous, "lineno", 10),
+        }
+        self.history.append(record)
+
+        if record["rss_bytes"] is not None:
+            RESIDENT_BYTES.set(record["rss_bytes"])
+        TRACED_BYTES.set(traced)
+        for tool, size in record["tools"].items():
+            TOOL_TRACED_BYTES.set(size, tool)
+        grown = record["top_growth"][0] if record["top_growth"] else None
+        logger.info(
+            "Memory snapshot: rss=%s traced=%d%s",
+            record["rss_bytes"], traced,
+            f" top growth +{grown['size_diff']} at {grown['location'][0]}" if grown else "",
+        )
+        return record
+
+    # --- Reports ---
+
+    def summary(self) -> dict:
+        traced, peak = tracemalloc.get_traced_memory()
+        latest = self.history[-1]["tools"] if self.history else {}
+        return {
+            "pid": os.getpid(),
+            "rss_bytes": _rss_bytes(),
+            "traced_bytes": traced,
+            "traced_peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "trace_frames": tracemalloc.get_traceback_limit(),
+            "snapshot_interval": self.interval,
+            "tools": latest,
+            "gc": self.gc_stats(),
+            "history": list(self.history),
+        }
+
+    def gc_stats(self) -> dict:
+        return {
+            "enabled": gc.isenabled(),
+            "counts": gc.get_count(),
+            "thresholds": gc.get_threshold(),
+            "uncollectable": len(gc.garbage),
+            "generations": [
+                {**stats, **self._gc_totals[generation]} for generation, stats in enumerate(gc.get_stats())
+            ],
+        }
+
+    def top(self, group: str = "lineno", limit: int = 25) -> dict:
+        return {"pid": os.getpid(), "group": group, "entries": _statistics(self._take(), group, limit)}
+
+    def diff(self, base: str = "last", group: str = "lineno", limit: int = 25) -> dict:
+        """Growth of a fresh snapshot over the latest periodic snapshot or the startup baseline."""
+        with self._lock:
+            reference = self._baseline if base == "baseline" else self._last
+        snapshot = self._take()
+        entries = _tool_growth(snapshot, reference)[:limit] if group == "tool" else _growth(snapshot, reference, group, limit)
+        return {"pid": os.getpid(), "base": base, "group": group, "entries": entries}
+
+    def objects(self, limit: int = 50) -> dict:
+        """Live gc-tracked objects per type. Untracked types (str, bytes, numbers) don't appear."""
+        counts = Counter(f"{type(obj).__module__}.{type(obj).__qualname__}" for obj in gc.get_objects())
+        with self._lock:
+            previous, self._previous_objects = self._previous_objects, counts
+        return {
+            "pid": os.getpid(),
+            "total": sum(counts.values()),
+            "types": [
+                {"type": name, "count": count, "change": count - previous.get(name, 0) if previous else None}
+                for name, count in counts.most_common(limit)
+            ],
+        }
+
+    def collect(self) -> dict:
+        rss_before = _rss_bytes()
+        traced_before = tracemalloc.get_traced_memory()[0]
+        collected = gc.collect()
+        return {
+            "pid": os.getpid(),
+            "collected": collected,
+            "uncollectable": len(gc.garbage),
+            "rss_freed_bytes": rss_before - _rss_bytes() if rss_before is not None else None,
+            "traced_freed_bytes": traced_before - tracemalloc.get_traced_memory()[0],
+        }
+
+
+_profiler: Optional[MemoryProfiler] = None
+
+
+def get_profiler() -> Optional[MemoryProfiler]:
+    return _profiler
+
+
+def start_from_env() -> Optional[MemoryProfiler]:
+    """Start tracing if MEMORY_PROFILING is set. Call early, so startup allocations are traced too."""
+    global _profiler
+    if _profiler is None and enabled():
+        _profiler = MemoryProfiler(
+            frames=_env_int("MEMORY_TRACE_FRAMES", 25),
+            interval=_env_int("MEMORY_SNAPSHOT_INTERVAL", 300),
+            history=_env_int("MEMORY_SNAPSHOT_HISTORY", 24),
+        )
+        _profiler.start()
+    return _profiler
+
+
+# --- Admin endpoints ---
+
+
+def _authorized(request) -> bool:
+    try:
+        from auth import validate_api_key
+    except ImportError:
+        return False
+    auth_header = request.headers.get("Authorization", "")
+    api_key = auth_header.replace("Bearer ", "").strip()
+    return bool(api_key) and validate_api_key(api_key)
+
+
+def _int_param(request, name: str, default: int) -> int:
+    try:
+        return max(1, int(request.query_params.get(name, default)))
+    except ValueError:
+        return default
+
+
+def _endpoint(report: Callable) -> Callable:
+    async def endpoint(request):
+        from starlette.responses import JSONResponse
+
+        if not _authorized(request):
+            return JSONResponse({"error": "Invalid or missing API key"}, status_code=401)
+        group = request.query_params.get("group", "lineno")
+        if group not in GROUPS:
+            return JSONResponse({"error": f"group must be one of {', '.join(GROUPS)}"}, status_code=400)
+        # Snapshots and object walks take a while on a large heap; keep the event loop serving meanwhile
+        return JSONResponse(await asyncio.to_thread(report, _profiler, request, group))
+
+    return endpoint
+
+
+def memory_routes(prefix: str = "/admin/memory") -> list:
+    """Starlette routes for the admin API, or none when profiling is off."""
+    if _profiler is None:
+        return []
+    from starlette.routing import Route
+
+    reports = [
+        ("", "GET", lambda profiler, request, group: profiler.summary()),
+        ("/top", "GET", lambda profiler, request, group: profiler.top(group, _int_param(request, "limit", 25))),
+        ("/diff", "GET", lambda profiler, request, group: profiler.diff(
+            "baseline" if request.query_params.get("base") == "baseline" else "last",
+            group,
+            _int_param(request, "limit", 25),
+        )),
+        ("/objects", "GET", lambda profiler, request, group: profiler.objects(_int_param(request, "limit", 50))),
+        ("/snapshot", "POST", lambda profiler, request, group: profiler.snapshot()),
+        ("/gc", "POST", lambda profiler, request, group: profiler.collect()),
+    ]
+    return [Route(prefix + path, endpoint=_endpoint(report), methods=[method]) for path, method, report in reports]
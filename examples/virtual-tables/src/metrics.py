@@ -0,0 +1,301 @@
+"""
+Per-tool metrics for MCP servers, exposed in Prometheus text format.
+
+Records call counts, latency, request/response payload sizes, errors and
+in-flight concurrency for every tool wrapped with `metrics_wrapper`.
+
+Usage:
+    from instrumentation import instrument
+    from metrics import metrics_wrapper, metrics_endpoint
+
+    register_tools(instrument(mcp, metrics_wrapper))
+    routes.append(Route("/metrics", endpoint=metrics_endpoint, methods=["GET"]))
+"""
+
+import inspect
+import json
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Optional
+
+from logging_config import tool_context
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_names: tuple, label_values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for labelled metrics. Values are keyed by label-value tuples."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def get(self, *label_values) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down (e.g. in-flight calls)."""
+
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1.0) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values) -> None:
+        with self._lock:
+            self._values[label_values] = float(value)
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram.
+
+    Observations cost one bisect and a few integer adds; cumulative bucket
+    counts are only computed when the metric is rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[label_values] = state
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *label_values) -> int:
+        state = self._values.get(label_values)
+        return state[2] if state else 0
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(labels, list(state[0]), state[1], state[2]) for labels, state in self._values.items()]
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            label_str = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on /metrics."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: tuple = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+TOOL_CALLS = REGISTRY.counter("mcp_tool_calls_total", "Total tool calls by outcome.", ("tool", "status"))
+TOOL_ERRORS = REGISTRY.counter("mcp_tool_errors_total", "Tool calls that raised, by exception type.", ("tool", "error"))
+TOOL_IN_FLIGHT = REGISTRY.gauge("mcp_tool_in_flight", "Tool calls currently executing.", ("tool",))
+TOOL_LATENCY = REGISTRY.histogram("mcp_tool_duration_seconds", "Tool call latency in seconds.", ("tool",))
+TOOL_REQUEST_BYTES = REGISTRY.histogram(
+    "mcp_tool_request_bytes", "Approximate size of tool arguments in bytes.", ("tool",), SIZE_BUCKETS
+)
+TOOL_RESPONSE_BYTES = REGISTRY.histogram(
+    "mcp_tool_response_bytes", "Approximate size of tool results in bytes.", ("tool",), SIZE_BUCKETS
+)
+
+
+def payload_size(value) -> int:
+    """
+    Approximate the serialized size of a tool argument or result.
+    Strings and bytes are measured directly so large payloads are never re-encoded.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(payload_size(k) + payload_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(v) for v in value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _current_request_id() -> str:
+    """Use the MCP request ID when called inside a FastMCP request, else a fresh one."""
+    try:
+        from fastmcp.server.dependencies import get_context
+
+        request_id = get_context().request_id
+        if request_id:
+            return str(request_id)
+    except Exception:
+        pass
+    return uuid.uuid4().hex
+
+
+class _CallRecorder:
+    """Records metrics for a single tool call."""
+
+    __slots__ = ("tool_name", "start")
+
+    def __init__(self, tool_name: str, kwargs: dict):
+        self.tool_name = tool_name
+        TOOL_REQUEST_BYTES.observe(payload_size(kwargs), tool_name)
+        TOOL_IN_FLIGHT.inc(tool_name)
+        self.start = time.perf_counter()
+
+    def success(self, result) -> None:
+        self._finish("ok")
+        TOOL_RESPONSE_BYTES.observe(payload_size(result), self.tool_name)
+
+    def failure(self, exc: BaseException) -> None:
+        self._finish("error")
+        TOOL_ERRORS.inc(self.tool_name, type(exc).__name__)
+
+    def _finish(self, status: str) -> None:
+        TOOL_LATENCY.observe(time.perf_counter() - self.start, self.tool_name)
+        TOOL_IN_FLIGHT.dec(self.tool_name)
+        TOOL_CALLS.inc(self.tool_name, status)
+
+
+def metrics_wrapper(func: Callable, tool_name: str) -> Callable:
+    """Tool wrapper (see `instrumentation.instrument`) that records per-call metrics."""
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with tool_context(tool_name, _current_request_id()):
+                recorder = _CallRecorder(tool_name, kwargs)
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as e:
+                    recorder.failure(e)
+                    raise
+                recorder.success(result)
+                return result
+
+        return async_wrapper
+
+    @wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        with tool_context(tool_name, _current_request_id()):
+            recorder = _CallRecorder(tool_name, kwargs)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                recorder.failure(e)
+                raise
+            recorder.success(result)
+            return result
+
+    return sync_wrapper
+
+
+def render_metrics(registry: Optional[MetricsRegistry] = None) -> str:
+    """Render all metrics in Prometheus text exposition format."""
+    return (registry or REGISTRY).render()
+
+
+async def metrics_endpoint(request):
+    """Starlette endpoint serving /metrics."""
+    from starlette.responses import Response
+
+    return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
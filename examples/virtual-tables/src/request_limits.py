@@ -0,0 +1,559 @@
+"""
+Request-size limits and spooling of large tool arguments.
+
+`RequestLimitMiddleware` enforces body limits while the request streams in:
+a `Content-Length` over the limit is rejected before anything is read, and
+chunked bodies are counted as they arrive. Either way the client gets a 413
+and the server never buffers the oversized body.
+
+Limits are per route (longest matching path prefix) and per tool. For a
+`tools/call`, the tool name is read from the first bytes of the body, so a
+tool's own limit replaces the route limit before its arguments arrive.
+
+On the MCP route, string values inside `params.arguments` of a `tools/call`
+that are longer than the spool threshold are written to temp files while
+they stream in, and the JSON body passed on to
+FastMCP carries a short token instead. `request_limits_wrapper` then
+replaces each token:
+
+- tools that opt in with `@spooled("param")` receive a `SpooledArg` handle
+  and can stream from disk;
+- all other tools receive the plain string, as before.
+
+Spooling only keeps the body out of memory while the request is parsed.
+A parameter that isn't `@spooled` is read back from its spool file into a
+string before the tool runs, so the whole argument is in memory again for
+the duration of the call. For async tools (including every tool
+dispatched to a pool by `execution_wrapper`) that read happens in a worker
+thread, off the event loop.
+
+Spool files are deleted when the response completes.
+
+Usage:
+    from request_limits import body_limit, spooled, open_arg
+
+    @mcp.tool
+    @body_limit("256MB")
+    @spooled("pdf_base64")
+    def count_pdf_pages(pdf_base64: str) -> int:
+        with open_arg(pdf_base64) as f:    # works for str and SpooledArg
+            ...
+
+Configuration:
+    REQUEST_MAX_BYTES        Default body limit for every route (default: 32MB)
+    REQUEST_LIMITS           Per-route overrides, e.g. "/mcp=64MB,/health=4KB"
+    SPOOL_THRESHOLD_BYTES    Spool string arguments longer than this (default: 1MB, 0 disables)
+    SPOOL_DIR                Directory for spool files (default: system temp dir)
+"""
+
+import asyncio
+import hashlib
+import inspect
+import io
+import json
+import os
+import re
+import tempfile
+import uuid
+from functools import wraps
+from typing import Callable, Optional, Union
+
+from jsonrpc_envelope import EnvelopeSniffer
+
+_BODY_LIMIT_ATTR = "__mcp_body_limit__"
+_SPOOLED_ATTR = "__mcp_spooled__"
+
+# Body limit per registered tool name, filled in by request_limits_wrapper
+TOOL_LIMITS: dict[str, int] = {}
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+_TOKEN_PREFIX = "\x00mcp-spool:"
+_TOKEN_PREFIX_JSON = b"\\u0000mcp-spool:"
+
+
+def parse_size(value: Union[int, str]) -> int:
+    """Parse a byte size such as 4096, "512KB" or "64MB"."""
+    if isinstance(value, int):
+        return value
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*", value.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+# --- Markers ---
+
+
+def body_limit(max_bytes: Union[int, str]):
+    """Set the request body limit for a tool. Place directly below `@mcp.tool()`."""
+    limit = parse_size(max_bytes)
+
+    def decorator(func: Callable) -> Callable:
+        setattr(func, _BODY_LIMIT_ATTR, limit)
+        return func
+
+    return decorator
+
+
+def spooled(*params: str):
+    """Receive these parameters as `SpooledArg` handles when they were spooled to disk."""
+
+    def decorator(func: Callable) -> Callable:
+        setattr(func, _SPOOLED_ATTR, frozenset(params))
+        return func
+
+    return decorator
+
+
+# --- Spooled arguments ---
+
+
+class SpooledArg:
+    """
+    A string argument stored in a temp file (UTF-8). Picklable, so it can be
+    handed to process-pool workers on the same host.
+    """
+
+    __slots__ = ("path", "size", "sha256")
+
+    def __init__(self, path: str, size: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+    def open(self):
+        """Open the argument for binary reading."""
+        return open(self.path, "rb")
+
+    def read_bytes(self) -> bytes:
+        with self.open() as f:
+            return f.read()
+
+    def read_text(self) -> str:
+        return self.read_bytes().decode("utf-8", "surrogatepass")
+
+    def __getstate__(self):
+        return (self.path, self.size, self.sha256)
+
+    def __setstate__(self, state):
+        self.path, self.size, self.sha256 = state
+
+    def __repr__(self) -> str:
+        # Content-based, so tool_cache keys stay stable across requests
+        return f"SpooledArg(size={self.size}, sha256={self.sha256})"
+
+
+def open_arg(value: Union[str, bytes, SpooledArg]):
+    """Binary file object for an argument that may or may not have been spooled."""
+    if isinstance(value, SpooledArg):
+        return value.open()
+    if isinstance(value, str):
+        value = value.encode("utf-8", "surrogatepass")
+    return io.BytesIO(value)
+
+
+# Spooled arguments of in-flight requests, by token
+_ACTIVE: dict[str, SpooledArg] = {}
+
+
+# --- Streaming JSON rewriting ---
+
+# One JSON escape: a high surrogate \uD8XX (with its low half when present),
+# any other \uXXXX, or a single-character escape
+_ESCAPE = re.compile(
+    rb'\\(?:u([dD][89abAB][0-9a-fA-F]{2})(?:\\u([dD][c-fC-F][0-9a-fA-F]{2}))?|u([0-9a-fA-F]{4})|([^u]))', re.S
+)
+_SIMPLE_ESCAPES = {b'"': b'"', b"\\": b"\\", b"/": b"/", b"b": b"\b", b"f": b"\f", b"n": b"\n", b"r": b"\r", b"t": b"\t"}
+_STRING_SPECIAL = re.compile(rb'["\\]')
+_BRACKETS = re.compile(rb"[{}\[\]]")
+# What may follow a high surrogate at the end of a chunk: the start of its low half
+_LOW_SURROGATE_PREFIX = re.compile(rb'(?:\\(?:u(?:[dD](?:[c-fC-F][0-9a-fA-F]{0,2})?)?)?)?')
+
+
+def _unescape(match: re.Match) -> bytes:
+    if match.group(4) is not None:
+        return _SIMPLE_ESCAPES.get(match.group(4), match.group(4))
+    if match.group(3) is not None:
+        return chr(int(match.group(3), 16)).encode("utf-8", "surrogatepass")
+    high = int(match.group(1), 16)
+    if match.group(2) is None:
+        return chr(high).encode("utf-8", "surrogatepass")
+    low = int(match.group(2), 16)
+    return chr(0x10000 + ((high - 0xD800) << 10) + (low - 0xDC00)).encode()
+
+
+class _SpoolWriter:
+    """Writes the (still JSON-escaped) content of one string to disk, unescaped."""
+
+    def __init__(self, directory: Optional[str]):
+        self.file = tempfile.NamedTemporaryFile(prefix="mcp-spool-", dir=directory, delete=False)
+        self.hash = hashlib.sha256()
+        self.size = 0
+        self._carry = b""
+
+    def _emit(self, data: bytes) -> None:
+        if data:
+            self.file.write(data)
+            self.hash.update(data)
+            self.size += len(data)
+
+    def write(self, raw: bytes, final: bool = False) -> None:
+        data = self._carry + raw
+        self._carry = b""
+        if b"\\" not in data:
+            self._emit(data)
+            return
+        out = bytearray()
+        pos = 0
+        for match in _ESCAPE.finditer(data):
+            # A high surrogate at the very end may be missing its low half
+            if not final and match.group(1) and match.group(2) is None \
+                    and _LOW_SURROGATE_PREFIX.fullmatch(data, match.end()):
+                self._carry = data[match.start():]
+                out += data[pos:match.start()]
+                self._emit(bytes(out))
+                return
+            out += data[pos:match.start()]
+            out += _unescape(match)
+            pos = match.end()
+        rest = data[pos:]
+        backslash = rest.find(b"\\")
+        if not final and backslash != -1 and len(rest) - backslash < 6:
+            self._carry = rest[backslash:]  # Escape split across chunks
+            rest = rest[:backslash]
+        out += rest
+        self._emit(bytes(out))
+
+    def close(self) -> SpooledArg:
+        self.write(b"", final=True)
+        self.file.close()
+        return SpooledArg(self.file.name, self.size, self.hash.hexdigest())
+
+
+class _JSONSpooler:
+    """
+    Incremental rewriter for a JSON-RPC body: string values inside
+    `params.arguments` of a `tools/call` that exceed `threshold` bytes are
+    diverted to spool files and replaced by tokens. Keys, other members
+    (`params._meta`, ...) and other methods pass through unchanged, since
+    only the tool wrapper resolves tokens. A body whose `method` comes after
+    its `params` is never spooled.
+    """
+
+    def __init__(self, threshold: int, directory: Optional[str]):
+        self.threshold = threshold
+        self.directory = directory
+        # (bracket, key) for each open container; key is the member name holding it in its parent object
+        self.stack: list[tuple[bytes, Optional[bytes]]] = []
+        self.key: Optional[bytes] = None
+        self.method: Optional[bytes] = None
+        self.last_token = b""  # Last non-whitespace byte outside strings
+        self.in_string = False
+        self.string_is_key = False
+        self.spoolable = False
+        self.escape_pending = False
+        self.pending = bytearray()
+        self.writer: Optional[_SpoolWriter] = None
+        self.tokens: list[str] = []
+
+    def _structure(self, segment: bytes) -> None:
+        for match in _BRACKETS.finditer(segment):
+            bracket = match.group()
+            if bracket in b"{[":
+                # Inside an object every container is the value of the last key
+                in_object = bool(self.stack) and self.stack[-1][0] == b"{"
+                self.stack.append((bracket, self.key if in_object else None))
+            elif self.stack:
+                self.stack.pop()
+        stripped = segment.rstrip(b" \t\r\n")
+        if stripped:
+            self.last_token = stripped[-1:]
+
+    def _in_arguments(self) -> bool:
+        stack = self.stack
+        return (
+            self.method == b"tools/call"
+            and len(stack) >= 3
+            and stack[0] == (b"{", None)
+            and stack[1] == (b"{", b"params")
+            and stack[2] == (b"{", b"arguments")
+        )
+
+    def _start_string(self) -> None:
+        self.in_string = True
+        self.string_is_key = bool(self.stack) and self.stack[-1][0] == b"{" and self.last_token in (b"{", b",")
+        self.spoolable = not self.string_is_key and self._in_arguments()
+
+    def _string_bytes(self, data: bytes) -> None:
+        if self.writer is not None:
+            self.writer.write(data)
+            return
+        self.pending += data
+        if self.spoolable and len(self.pending) > self.threshold:
+            self.writer = _SpoolWriter(self.directory)
+            self.writer.write(bytes(self.pending))
+            self.pending.clear()
+
+    def _end_string(self, out: bytearray) -> None:
+        if self.writer is not None:
+            arg = self.writer.close()
+            self.writer = None
+            token = uuid.uuid4().hex
+            _ACTIVE[token] = arg
+            self.tokens.append(token)
+            out += _TOKEN_PREFIX_JSON + token.encode() + b'"'
+        else:
+            if self.string_is_key:
+                self.key = bytes(self.pending)
+            elif self.key == b"method" and self.stack == [(b"{", None)]:
+                self.method = bytes(self.pending)
+            out += self.pending
+            out += b'"'
+        self.pending.clear()
+        self.in_string = False
+        self.last_token = b'"'
+
+    def feed(self, chunk: bytes) -> bytes:
+        out = bytearray()
+        i, n = 0, len(chunk)
+        while i < n:
+            if not self.in_string:
+                j = chunk.find(b'"', i)
+                segment = chunk[i:n if j == -1 else j]
+                self._structure(segment)
+                out += segment
+                if j == -1:
+                    break
+                out += b'"'
+                self._start_string()
+                i = j + 1
+                continue
+
+            start = i
+            if self.escape_pending:
+                # The previous chunk ended with a backslash; this byte is escaped
+                self.escape_pending = False
+                i += 1
+            while True:
+                match = _STRING_SPECIAL.search(chunk, i)
+                if match is None:
+                    self._string_bytes(chunk[start:n])
+                    i = n
+                    break
+                if match.group() == b"\\":
+                    if match.end() == n:
+                        self._string_bytes(chunk[start:n])
+                        self.escape_pending = True
+                        i = n
+                        break
+                    i = match.end() + 1
+                    continue
+                self._string_bytes(chunk[start:match.start()])
+                self._end_string(out)
+                i = match.end()
+                break
+        return bytes(out)
+
+    def discard(self) -> None:
+        if self.writer is not None:
+            arg = self.writer.close()
+            _remove(arg.path)
+            self.writer = None
+        for token in self.tokens:
+            arg = _ACTIVE.pop(token, None)
+            if arg is not None:
+                _remove(arg.path)
+        self.tokens.clear()
+
+
+def _remove(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+# --- Middleware ---
+
+
+def _parse_route_limits(spec: str) -> dict[str, int]:
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            path, size = item.split("=", 1)
+            limits[path.strip()] = parse_size(size.strip())
+    return limits
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class RequestLimitMiddleware:
+    """ASGI middleware enforcing body limits and spooling large MCP arguments."""
+
+    def __init__(
+        self,
+        app,
+        max_bytes: Optional[Union[int, str]] = None,
+        route_limits: Optional[dict[str, Union[int, str]]] = None,
+        mcp_path: str = "/mcp",
+        spool_threshold: Optional[Union[int, str]] = None,
+        spool_dir: Optional[str] = None,
+    ):
+        self.app = app
+        self.max_bytes = parse_size(max_bytes if max_bytes is not None else os.environ.get("REQUEST_MAX_BYTES", "32MB"))
+        if route_limits is None:
+            route_limits = _parse_route_limits(os.environ.get("REQUEST_LIMITS", ""))
+        # Longest prefix first
+        self.route_limits = sorted(
+            ((path, parse_size(size)) for path, size in route_limits.items()), key=lambda item: -len(item[0])
+        )
+        self.mcp_path = mcp_path
+        self.spool_threshold = parse_size(
+            spool_threshold if spool_threshold is not None else os.environ.get("SPOOL_THRESHOLD_BYTES", "1MB")
+        )
+        self.spool_dir = spool_dir or os.environ.get("SPOOL_DIR") or None
+
+    def _route_limit(self, path: str) -> int:
+        for prefix, limit in self.route_limits:
+            if path.startswith(prefix):
+                return limit
+        return self.max_bytes
+
+    async def _reject(self, send, limit: int) -> None:
+        body = json.dumps({"error": "Request body too large", "limit_bytes": limit}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope.get("path", "")
+        limit = self._route_limit(path)
+        headers = dict(scope.get("headers", []))
+        content_length = headers.get(b"content-length")
+        declared = int(content_length) if content_length is not None and content_length.isdigit() else None
+        # On the MCP route a tool's own limit may be higher than the route's
+        ceiling = max([limit, *TOOL_LIMITS.values()]) if path.startswith(self.mcp_path) else limit
+        if declared is not None and declared > ceiling:
+            await self._reject(send, ceiling)
+            return
+
+        is_mcp_post = scope.get("method") == "POST" and path.startswith(self.mcp_path)
+        spooler = None
+        if is_mcp_post and self.spool_threshold and headers.get(b"content-type", b"").startswith(b"application/json"):
+            spooler = _JSONSpooler(self.spool_threshold, self.spool_dir)
+            # The rewritten body is shorter than the original
+            scope = {**scope, "headers": [(k, v) for k, v in scope["headers"] if k != b"content-length"]}
+
+        sniffer = EnvelopeSniffer() if is_mcp_post else None
+        state = {"received": 0, "limit": limit, "sniffing": is_mcp_post, "exceeded": False, "started": False}
+
+        def check(received: int) -> None:
+            if received > state["limit"] or (declared is not None and not state["sniffing"] and declared > state["limit"]):
+                state["exceeded"] = True
+                raise _BodyTooLarge()
+
+        async def limited_receive():
+            if state["exceeded"]:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            body = message.get("body", b"")
+            state["received"] += len(body)
+
+            if state["sniffing"] and sniffer.feed(body, message.get("more_body", False)):
+                state["sniffing"] = False
+                tool_limit = TOOL_LIMITS.get(sniffer.tool_name) if sniffer.is_tool_call else None
+                if tool_limit is not None:
+                    state["limit"] = tool_limit
+
+            try:
+                check(state["received"])
+            except _BodyTooLarge:
+                return {"type": "http.disconnect"}
+
+            if spooler is not None and body:
+                body = spooler.feed(body)
+            return {**message, "body": body}
+
+        async def guarded_send(message):
+            if state["exceeded"]:
+                return  # The 413 is sent below instead
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not state["exceeded"]:
+                raise
+        finally:
+            if spooler is not None:
+                spooler.discard()
+        if state["exceeded"] and not state["started"]:
+            await self._reject(send, state["limit"])
+
+
+# --- Tool wrapper ---
+
+
+def _resolve(value, materialize: bool):
+    if isinstance(value, str):
+        if value.startswith(_TOKEN_PREFIX):
+            arg = _ACTIVE.get(value[len(_TOKEN_PREFIX):])
+            if arg is not None:
+                return arg.read_text() if materialize else arg
+        return value
+    if isinstance(value, dict):
+        return {k: _resolve(v, True) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, True) for v in value]
+    return value
+
+
+def _resolve_kwargs(kwargs: dict, spooled_params: frozenset) -> dict:
+    if not _ACTIVE:
+        return kwargs
+    return {k: _resolve(v, k not in spooled_params) for k, v in kwargs.items()}
+
+
+def request_limits_wrapper(func: Callable, tool_name: str) -> Callable:
+    """
+    Tool wrapper (see `instrumentation.instrument`) that records a tool's
+    `@body_limit` for the middleware and swaps spool tokens for their
+    content: a `SpooledArg` for `@spooled` parameters, the string otherwise.
+    """
+    limit = getattr(func, _BODY_LIMIT_ATTR, None)
+    if limit is not None:
+        TOOL_LIMITS[tool_name] = limit
+    else:
+        TOOL_LIMITS.pop(tool_name, None)
+    spooled_params = getattr(func, _SPOOLED_ATTR, frozenset())
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if _ACTIVE:
+                # Reading spooled strings back can take a while: not on the event loop
+                kwargs = await asyncio.to_thread(_resolve_kwargs, kwargs, spooled_params)
+            return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        return func(*args, **_resolve_kwargs(kwargs, spooled_params))
+
+    return sync_wrapper
@@ -1,16 +1,90 @@
 import os
+import uvicorn
 from fastmcp import FastMCP
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from admission import TOOL_ADMISSION, AdmissionMiddleware, admission_wrapper
+from compression import CompressionMiddleware
+from executors import execution_wrapper, reload_worker_code
+from hot_reload import ToolReloader
+from instrumentation import instrument
+from json_codec import tool_serializer
+from memory_profiler import memory_routes, memory_wrapper, start_from_env as start_memory_profiling
+from metrics import metrics_endpoint, metrics_wrapper
+from request_limits import TOOL_LIMITS, RequestLimitMiddleware, request_limits_wrapper
+from tool_cache import cache_wrapper
+from tracing import TracingMiddleware, configure_tracing_from_env, tracing_wrapper
 from tools import register_tools
 
+# MEMORY_PROFILING=true: trace allocations from here on and serve /admin/memory
+start_memory_profiling()
+
+MCP_NAME = os.environ.get("MCP_NAME", "Virtual Tables")
+
 mcp = FastMCP(
-    name=os.environ.get("MCP_NAME", "Virtual Tables"),
-    instructions="Manage user-customizable virtual tables. Each user has their own table definitions and data, enforced via Supabase RLS."
+    name=MCP_NAME,
+    instructions="Manage user-customizable virtual tables. Each user has their own table definitions and data, enforced via Supabase RLS.",
+    # orjson-backed, compact serialization of non-string tool results
+    tool_serializer=tool_serializer,
+    # Hot reload replaces tools in place
+    on_duplicate_tools="replace",
+)
+
+configure_tracing_from_env()
+
+# Same wrapper chain as a generated python-vps project: pools and deadlines,
+# the response cache, tracing spans and /metrics, request limits with
+# spooled arguments (import_table's `data`), and the memory profiler.
+tools = instrument(
+    mcp, execution_wrapper, admission_wrapper, cache_wrapper, tracing_wrapper, metrics_wrapper,
+    request_limits_wrapper, memory_wrapper,
+)
+register_tools(tools)
+
+# TOOLS_RELOAD=watch: re-import src/tools on change and swap the tool table in place
+ToolReloader(
+    tools, "tools", on_reload=[reload_worker_code], registries=[TOOL_ADMISSION, TOOL_LIMITS],
+    tool_serializer=tool_serializer,
+).start_from_env()
+
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({
+        "name": MCP_NAME,
+        "version": "1.0.0",
+        "mcp_endpoint": "/mcp",
+        "status": "running",
+    })
+
+
+# Export download links are kept in this process, so the server runs as a
+# single worker with stateful MCP sessions
+mcp_app = mcp.http_app(path="/mcp")
+
+app = Starlette(
+    routes=[
+        Route("/", endpoint=health, methods=["GET"]),
+        Route("/health", endpoint=health, methods=["GET"]),
+        Route("/metrics", endpoint=metrics_endpoint, methods=["GET"]),
+        # API-key protected; empty unless MEMORY_PROFILING is set
+        *memory_routes(),
+    ],
+    lifespan=mcp_app.lifespan,
 )
 
-register_tools(mcp)
+# Mount at root so /mcp and /exports/... are handled by FastMCP directly
+app.mount("/", mcp_app)
+# Bounded global/per-tool queues for tool calls: JSON-RPC error + Retry-After when full
+app.add_middleware(AdmissionMiddleware)
+# 413 for bodies over REQUEST_MAX_BYTES / @body_limit; large arguments spool to disk
+app.add_middleware(RequestLimitMiddleware)
+# Negotiated zstd/br/gzip for responses over COMPRESSION_MIN_SIZE bytes
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(TracingMiddleware)
 
 if __name__ == "__main__":
-    transport = os.environ.get("TRANSPORT", "streamable-http")
     host = os.environ.get("HOST", "0.0.0.0")
     port = int(os.environ.get("PORT", "8000"))
-    mcp.run(transport=transport, host=host, port=port)
+    uvicorn.run(app, host=host, port=port)
@@ -0,0 +1,462 @@
+"""
+Opt-in response cache for deterministic MCP tools.
+
+Tools that are pure functions of their arguments can be marked `@cached`;
+`cache_wrapper` then serves repeat calls from an in-memory LRU (bounded by
+bytes) with an optional disk-backed second tier.
+
+Usage:
+    # src/tools/seo_tools.py
+    from tool_cache import cached
+
+    def register(mcp):
+        @mcp.tool()
+        @cached(ttl=3600)
+        def check_meta_title(title: str) -> dict:
+            ...
+
+    # src/server.py
+    register_tools(instrument(mcp, execution_wrapper, cache_wrapper, ...))
+
+Keys are a SHA-256 over the tool name and canonicalized arguments; large
+string arguments are hashed in chunks rather than re-encoded as JSON. Tools
+that return per-user data must use `@cached(user_scoped=True)` so the key
+includes the caller (the `user_id` argument injected by Supabase auth, or
+a hash of the bearer token). Calls with no identifiable caller bypass the
+cache. Keys also cover a hash of the source file that defines the tool, so
+editing a tool module (a deploy or a hot reload) retires its old results
+while other tools keep theirs.
+
+Results that report a failure, dicts with an `"error"` key or
+`"success": False` (how the example tools report errors), are returned
+but not stored, so a transient failure isn't replayed for the whole TTL.
+`@cached(cacheable=...)` replaces that check with a predicate of the result.
+
+Configuration:
+    TOOL_CACHE_MAX_BYTES        In-memory tier size (default: 64 MB)
+    TOOL_CACHE_DIR              Enables the disk tier in this directory
+    TOOL_CACHE_DISK_MAX_BYTES   Disk tier size (default: 1 GB)
+"""
+
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_CACHE_ATTR = "__mcp_cache__"
+_HASH_CHUNK = 1 << 20  # Encode large strings 1 MB at a time while hashing
+_TMP_PREFIX = ".tmp-"  # Disk entries still being written
+
+CACHE_HITS = REGISTRY.counter("mcp_tool_cache_hits_total", "Tool cache hits by tier.", ("tool", "tier"))
+CACHE_MISSES = REGISTRY.counter("mcp_tool_cache_misses_total", "Tool cache misses.", ("tool",))
+CACHE_BYTES = REGISTRY.gauge("mcp_tool_cache_bytes", "Bytes held by the tool cache, by tier.", ("tier",))
+
+
+def _env_int(key: str, default: int) -> int:
+    value = os.environ.get(key)
+    return int(value) if value else default
+
+
+class CacheOptions:
+    """Per-tool cache settings recorded by `@cached`."""
+
+    __slots__ = ("ttl", "user_scoped", "version", "cacheable")
+
+    def __init__(self, ttl: Optional[float], user_scoped: bool, version: str,
+                 cacheable: Callable[[Any], bool]):
+        self.ttl = ttl
+        self.user_scoped = user_scoped
+        self.version = version
+        self.cacheable = cacheable
+
+
+def is_success(result) -> bool:
+    """False for results that report an error: dicts with an "error" key or `"success": False`."""
+    return not (isinstance(result, dict) and ("error" in result or result.get("success") is False))
+
+
+def cached(ttl: Optional[float] = 3600, user_scoped: bool = False, version: str = "",
+           cacheable: Callable[[Any], bool] = is_success):
+    """
+    Mark a tool's results as cacheable. Place directly below `@mcp.tool()`.
+
+    Args:
+        ttl: Seconds a result stays valid (None for no expiry).
+        user_scoped: Include the caller's identity in the key.
+        version: Bump to invalidate old entries when the tool's logic changes.
+        cacheable: Called with each fresh result; only results it accepts
+            are stored. The default skips error results (see `is_success`).
+    """
+
+    def decorator(func: Callable) -> Callable:
+        setattr(func, _CACHE_ATTR, CacheOptions(ttl, user_scoped, version, cacheable))
+        return func
+
+    return decorator
+
+
+# --- Keys ---
+
+
+def _hash_value(h, value) -> None:
+    """Feed a canonical, type-tagged encoding of `value` into hasher `h`."""
+    if value is None:
+        h.update(b"N")
+    elif value is True or value is False:
+        h.update(b"T" if value else b"F")
+    elif isinstance(value, (int, float)):
+        h.update(b"n" + repr(value).encode() + b";")
+    elif isinstance(value, str):
+        h.update(b"s" + struct.pack(">Q", len(value)))
+        for start in range(0, len(value), _HASH_CHUNK):
+            h.update(value[start:start + _HASH_CHUNK].encode("utf-8", "surrogatepass"))
+    elif isinstance(value, (bytes, bytearray)):
+        h.update(b"b" + struct.pack(">Q", len(value)))
+        h.update(value)
+    elif isinstance(value, dict):
+        h.update(b"d" + struct.pack(">Q", len(value)))
+        for key in sorted(value, key=str):
+            _hash_value(h, str(key))
+            _hash_value(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        h.update(b"l" + struct.pack(">Q", len(value)))
+        for item in value:
+            _hash_value(h, item)
+    else:
+        _hash_value(h, repr(value))
+
+
+def make_key(tool_name: str, arguments: dict, principal: Optional[str] = None, version: str = "",
+             source: str = "") -> str:
+    """Cache key for a tool call."""
+    h = hashlib.sha256()
+    _hash_value(h, [tool_name, version, principal, source])
+    _hash_value(h, arguments)
+    return h.hexdigest()
+
+
+def _source_fingerprint(func: Callable) -> str:
+    """Hash of the file that defines a tool function ("" if it can't be read)."""
+    try:
+        path = inspect.getsourcefile(inspect.unwrap(func))
+        with open(path, "rb") as source:
+            return hashlib.sha256(source.read()).hexdigest()[:16]
+    except (TypeError, OSError):
+        return ""
+
+
+def _current_principal(kwargs: dict) -> Optional[str]:
+    """Identify the caller: Supabase `user_id` if injected, else the bearer token's hash."""
+    user_id = kwargs.get("user_id")
+    if user_id:
+        return f"user:{user_id}"
+    try:
+        from fastmcp.server.dependencies import get_http_headers
+
+        auth_header = get_http_headers(include_all=True).get("authorization", "")
+    except Exception:
+        return None
+    token = auth_header.replace("Bearer ", "").strip()
+    if not token:
+        return None
+    return "token:" + hashlib.sha256(token.encode()).hexdigest()
+
+
+# --- Tiers ---
+
+
+class MemoryLRU:
+    """LRU of pickled results, bounded by total byte size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at and expires_at < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: str, data: bytes, expires_at: float) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, data)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        CACHE_BYTES.set(self.size, "memory")
+
+    def _remove(self, key: str) -> None:
+        _, data = self._entries.pop(key)
+        self.size -= len(data)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+        CACHE_BYTES.set(self.size, "memory")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+        CACHE_BYTES.set(0, "memory")
+
+
+class DiskCache:
+    """
+    File-per-entry cache tier. Each file holds an 8-byte expiry timestamp
+    followed by the pickled result. The oldest files are evicted once the
+    directory exceeds `max_bytes`.
+
+    Several worker processes may share the directory, so files can vanish
+    or be half-written under any of them. Disk errors never fail a call:
+    a write that fails is skipped, and an unreadable entry is a miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(size for _, size, _ in self._entries())
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) of every finished entry, skipping files removed mid-scan."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(_TMP_PREFIX):
+                continue  # Another writer's entry in progress
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            except OSError:
+                pass
+        return entries
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[tuple[float, bytes]]:
+        """Return (expires_at, data), or None if missing or expired."""
+        try:
+            with open(self._path(key), "rb") as f:
+                (expires_at,) = struct.unpack(">d", f.read(8))
+                if expires_at and expires_at < time.time():
+                    return None
+                return expires_at, f.read()
+        except (OSError, struct.error):
+            return None
+
+    def set(self, key: str, data: bytes, expires_at: float) -> None:
+        if len(data) + 8 > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=_TMP_PREFIX)
+            with os.fdopen(fd, "wb") as f:
+                f.write(struct.pack(">d", expires_at))
+                f.write(data)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Tool cache disk write failed: %s", e)
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+        with self._lock:
+            self.size += len(data) + 8 - replaced
+            if self.size > self.max_bytes:
+                try:
+                    self._evict()
+                except OSError as e:
+                    logger.warning("Tool cache disk eviction failed: %s", e)
+        CACHE_BYTES.set(self.size, "disk")
+
+    def discard(self, key: str) -> None:
+        """Remove an entry (e.g. one that can't be read back)."""
+        try:
+            size = os.path.getsize(self._path(key))
+            os.remove(self._path(key))
+        except OSError:
+            return
+        with self._lock:
+            self.size = max(0, self.size - size)
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        self.size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
+
+
+class ToolCache:
+    """Two-tier cache shared by all `@cached` tools in the process."""
+
+    def __init__(self, max_bytes: Optional[int] = None, directory: Optional[str] = None, disk_max_bytes: Optional[int] = None):
+        self.memory = MemoryLRU(max_bytes or _env_int("TOOL_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        directory = directory or os.environ.get("TOOL_CACHE_DIR")
+        self.disk = (
+            DiskCache(directory, disk_max_bytes or _env_int("TOOL_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024))
+            if directory
+            else None
+        )
+
+    def lookup(self, key: str, tool_name: str):
+        """Return (found, value)."""
+        data = self.memory.get(key)
+        if data is not None:
+            found, value = _unpickle(data)
+            if found:
+                CACHE_HITS.inc(tool_name, "memory")
+                return True, value
+            self.memory.discard(key)
+        if self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                expires_at, data = entry
+                found, value = _unpickle(data)
+                if found:
+                    CACHE_HITS.inc(tool_name, "disk")
+                    # Promote so the next hit is served from memory
+                    self.memory.set(key, data, expires_at)
+                    return True, value
+                # Truncated or corrupt (e.g. another worker's write was cut short)
+                self.disk.discard(key)
+        CACHE_MISSES.inc(tool_name)
+        return False, None
+
+    def store(self, key: str, value, ttl: Optional[float]) -> None:
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        expires_at = time.time() + ttl if ttl else 0.0
+        self.memory.set(key, data, expires_at)
+        if self.disk is not None:
+            self.disk.set(key, data, expires_at)
+
+    def clear(self) -> None:
+        self.memory.clear()
+
+
+def _unpickle(data: bytes):
+    """Return (ok, value); an entry that can't be unpickled is treated as a miss."""
+    try:
+        return True, pickle.loads(data)
+    except Exception as e:  # UnpicklingError, EOFError, or a class that no longer exists
+        logger.warning("Dropping unreadable tool cache entry: %s: %s", type(e).__name__, e)
+        return False, None
+
+
+_cache: Optional[ToolCache] = None
+
+
+def get_cache() -> ToolCache:
+    """Return the process-wide tool cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = ToolCache()
+    return _cache
+
+
+def configure_cache(cache: Optional[ToolCache]) -> None:
+    """Replace the process-wide tool cache."""
+    global _cache
+    _cache = cache
+
+
+def cache_wrapper(func: Callable, tool_name: str) -> Callable:
+    """
+    Tool wrapper (see `instrumentation.instrument`) that serves `@cached`
+    tools from the cache. Place it after `execution_wrapper` so hits skip
+    the pool hop entirely.
+    """
+    options: Optional[CacheOptions] = getattr(func, _CACHE_ATTR, None)
+    if options is None:
+        return func
+
+    signature = inspect.signature(func)
+    source = _source_fingerprint(func)
+
+    def _key(args, kwargs) -> Optional[str]:
+        principal = None
+        if options.user_scoped:
+            principal = _current_principal(kwargs)
+            if principal is None:
+                return None
+        bound = signature.bind_partial(*args, **kwargs)
+        return make_key(tool_name, dict(bound.arguments), principal, options.version, source)
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            key = _key(args, kwargs)
+            if key is None:
+                return await func(*args, **kwargs)
+            cache = get_cache()
+            found, value = cache.lookup(key, tool_name)
+            if found:
+                return value
+            value = await func(*args, **kwargs)
+            if options.cacheable(value):
+                cache.store(key, value, options.ttl)
+            return value
+
+        return async_wrapper
+
+    @wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        key = _key(args, kwargs)
+        if key is None:
+            return func(*args, **kwargs)
+        cache = get_cache()
+        found, value = cache.lookup(key, tool_name)
+        if found:
+            return value
+        value = func(*args, **kwargs)
+        if options.cacheable(value):
+            cache.store(key, value, options.ttl)
+        return value
+
+    return sync_wrapper
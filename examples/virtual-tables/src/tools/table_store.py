@@ -0,0 +1,570 @@
+"""
+Async data access for virtual tables.
+
+All queries go through one pooled `httpx.AsyncClient` to Supabase's PostgREST
+API, so tool calls run their queries concurrently instead of each holding a
+worker thread. Requests carry the caller's JWT, and Row Level Security scopes
+every query to that user. Each request runs in a `supabase.<method>` span and
+its latency is recorded in `mcp_supabase_request_seconds` on /metrics.
+
+Two optimizations sit on top of this:
+
+- Reads are coalesced single-flight. Identical reads already in flight for
+  the same caller, such as `get_table_schema` for one table or
+  `list_virtual_tables`, share one request and its result. Nothing is cached
+  beyond the in-flight request, so reads never go stale.
+- Writes are micro-batched. Row inserts and deletes arriving within
+  `TABLES_BATCH_WINDOW_MS` of each other for the same caller go out as one
+  bulk request. If a bulk request fails, its items are retried one by one so
+  a single bad row only fails its own call.
+
+Without `SUPABASE_URL` the store falls back to an in-memory backend, so the
+example runs locally with no database.
+
+Configuration:
+    SUPABASE_URL             Supabase project URL (unset: in-memory demo store)
+    SUPABASE_ANON_KEY        Key sent as `apikey` alongside the caller's JWT
+    TABLES_BATCH_WINDOW_MS   How long a write waits for others to join its batch (default: 5)
+    TABLES_BATCH_MAX         Largest write batch (default: 100)
+    TABLES_MAX_CONNECTIONS   Pooled connections to PostgREST (default: 50)
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Hashable, Optional
+
+import httpx
+
+from metrics import REGISTRY
+from tracing import inject_context, span
+
+DEFINITIONS = "virtual_table_definitions"
+ROWS = "virtual_table_rows"
+
+SUPABASE_LATENCY = REGISTRY.histogram(
+    "mcp_supabase_request_seconds",
+    "PostgREST request latency in seconds, by HTTP method and table.",
+    ("method", "table"),
+)
+
+
+class StoreError(RuntimeError):
+    """Raised when a query fails or a request is invalid."""
+
+
+class TableNotFoundError(StoreError):
+    """Raised when the caller has no virtual table with the given name."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _caller_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _in_list(values: list[str]) -> str:
+    """A PostgREST `in.(...)` filter with each value quoted, so commas and parentheses in ids can't change it."""
+    return "in.(" + ",".join('"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values) + ")"
+
+
+# A quoted `in.(...)` value and its backslash escapes
+_QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"')
+_ESCAPE = re.compile(r"\\(.)")
+
+
+# --- Coalescing & batching ---
+
+
+class SingleFlight:
+    """Runs at most one instance of each keyed coroutine at a time; concurrent callers share its result."""
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        # Shielded: one caller giving up must not cancel the read for the others
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            future.exception()  # Mark as retrieved even if every caller was cancelled
+
+
+class WriteBatcher:
+    """
+    Collects writes per key for up to `window` seconds (or `max_size` items)
+    and hands them to `flush(key, items)` in one call. `flush` returns one
+    result per item, in order.
+    """
+
+    def __init__(self, flush: Callable[[Hashable, list], Awaitable[list]], window: float, max_size: int):
+        self._flush = flush
+        self.window = window
+        self.max_size = max_size
+        self._pending: dict[Hashable, list[tuple[object, asyncio.Future]]] = {}
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, key: Hashable, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+        if len(batch) >= self.max_size:
+            self._start(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.window, self._start, key)
+        return await future
+
+    def _start(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, batch: list) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        items = [item for item, _ in batch]
+        try:
+            results = await self._flush(key, items)
+        except Exception as exc:
+            if len(batch) == 1:
+                results = [exc]
+            else:
+                # Bulk writes are all-or-nothing: retry singly so one bad item fails alone
+                results = await asyncio.gather(
+                    *(self._single(key, item) for item in items), return_exceptions=True
+                )
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # The caller gave up; the write still happened
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _single(self, key: Hashable, item):
+        return (await self._flush(key, [item]))[0]
+
+
+# --- Backends ---
+
+
+class PostgrestBackend:
+    """PostgREST over a pooled async HTTP client. Queries run as the caller (RLS)."""
+
+    def __init__(self, supabase_url: str, api_key: str, max_connections: int = 50, timeout: float = 30.0):
+        self.base_url = supabase_url.rstrip("/") + "/rest/v1"
+        self.api_key = api_key
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def _request(self, method: str, table: str, token: str, params: Optional[dict] = None,
+                       body=None, prefer: str = "") -> httpx.Response:
+        if not token:
+            raise StoreError("Missing Authorization header")
+        headers = {"apikey": self.api_key, "Authorization": f"Bearer {token}"}
+        if prefer:
+            headers["Prefer"] = prefer
+        started = time.perf_counter()
+        with span(f"supabase.{method.lower()}", table=table) as s:
+            try:
+                response = await self.client.request(
+                    method, f"{self.base_url}/{table}", params=params, json=body, headers=inject_context(headers)
+                )
+            except httpx.HTTPError as e:
+                raise StoreError(f"Supabase unreachable: {e}") from e
+            finally:
+                SUPABASE_LATENCY.observe(time.perf_counter() - started, method, table)
+            s.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 400:
+                raise StoreError(f"Supabase query failed (HTTP {response.status_code}): {response.text[:200]}")
+        return response
+
+    async def select(self, table: str, params: dict, token: str, count: bool = False) -> tuple[list, Optional[int]]:
+        response = await self._request("GET", table, token, params, prefer="count=exact" if count else "")
+        total = None
+        if count:
+            # Content-Range: 0-49/1234  (or */0)
+            total = int((response.headers.get("Content-Range") or "*/0").rsplit("/", 1)[-1] or 0)
+        return response.json(), total
+
+    async def insert(self, table: str, rows: list[dict], token: str, returning: bool = True) -> list[dict]:
+        if not returning:
+            await self._request("POST", table, token, body=rows, prefer="return=minimal")
+            return []
+        response = await self._request("POST", table, token, body=rows, prefer="return=representation")
+        return response.json()
+
+    async def update(self, table: str, params: dict, values: dict, token: str) -> list[dict]:
+        response = await self._request("PATCH", table, token, params, body=values, prefer="return=representation")
+        return response.json()
+
+    async def delete(self, table: str, params: dict, token: str) -> list[dict]:
+        response = await self._request("DELETE", table, token, params, prefer="return=representation")
+        return response.json()
+
+    async def merge_row(self, table_id: str, row_id: str, data: dict, token: str) -> list[dict]:
+        # merge_virtual_table_row in schema.sql: row_data || data in one UPDATE
+        response = await self._request(
+            "POST", "rpc/merge_virtual_table_row", token,
+            body={"p_table_def_id": table_id, "p_row_id": row_id, "p_patch": data},
+        )
+        return response.json()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+# Every caller of the in-memory store starts with these
+_DEMO_DATA = {
+    DEFINITIONS: [
+        {
+            "id": "demo-table-001",
+            "table_name": "contacts",
+            "columns": [
+                {"name": "name", "type": "text"},
+                {"name": "email", "type": "text"},
+                {"name": "phone", "type": "text"},
+            ],
+            "created_at": "2025-01-15T10:00:00+00:00",
+            "updated_at": "2025-01-15T10:00:00+00:00",
+        },
+        {
+            "id": "demo-table-002",
+            "table_name": "inventory",
+            "columns": [
+                {"name": "item", "type": "text"},
+                {"name": "quantity", "type": "integer"},
+                {"name": "price", "type": "float"},
+            ],
+            "created_at": "2025-01-16T12:30:00+00:00",
+            "updated_at": "2025-01-16T12:30:00+00:00",
+        },
+    ],
+    ROWS: [
+        {
+            "id": "row-001",
+            "table_def_id": "demo-table-001",
+            "row_data": {"name": "Alice", "email": "alice@example.com", "phone": "555-0101"},
+            "created_at": "2025-01-17T09:00:00+00:00",
+            "updated_at": "2025-01-17T09:00:00+00:00",
+        },
+        {
+            "id": "row-002",
+            "table_def_id": "demo-table-001",
+            "row_data": {"name": "Bob", "email": "bob@example.com", "phone": "555-0102"},
+            "created_at": "2025-01-17T09:05:00+00:00",
+            "updated_at": "2025-01-17T09:05:00+00:00",
+        },
+    ],
+}
+
+
+class MemoryBackend:
+    """
+    In-process stand-in for PostgREST (local development and demos). Data is
+    kept per caller token, starts with two demo tables and is lost on
+    restart. Supports the filters the store uses: `eq.`, `gt.`, `in.(...)`
+    and `cs.` on JSON objects.
+    """
+
+    def __init__(self):
+        self._tables: dict[tuple[str, str], list[dict]] = {}
+
+    def _rows(self, table: str, token: str) -> list[dict]:
+        caller = _caller_key(token or "anonymous")
+        rows = self._tables.get((caller, table))
+        if rows is None:
+            for name, demo_rows in _DEMO_DATA.items():
+                self._tables.setdefault((caller, name), copy.deepcopy(demo_rows))
+            rows = self._tables[(caller, table)]
+        return rows
+
+    @staticmethod
+    def _filter(params: dict) -> Callable[[dict], bool]:
+        # Parse the conditions once per query, not once per row
+        checks = []
+        for column, condition in params.items():
+            if column in ("select", "order", "limit", "offset"):
+                continue
+            operator, _, value = condition.partition(".")
+            if operator == "eq":
+                checks.append(lambda row, column=column, value=value: str(row.get(column)) == value)
+            elif operator == "gt":
+                checks.append(lambda row, column=column, value=value: str(row.get(column)) > value)
+            elif operator == "in":
+                values = {_ESCAPE.sub(r"\1", quoted) for quoted in _QUOTED.findall(value)}
+                checks.append(lambda row, column=column, values=values: str(row.get(column)) in values)
+            elif operator == "cs":
+                expected = json.loads(value).items()
+                checks.append(lambda row, column=column, expected=expected: all(
+                    (row.get(column) or {}).get(key) == item for key, item in expected
+                ))
+        return lambda row: all(check(row) for check in checks)
+
+    async def select(self, table: str, params: dict, token: str, count: bool = False) -> tuple[list, Optional[int]]:
+        rows = list(filter(self._filter(params), self._rows(table, token)))
+        if "order" in params:
+            column, _, direction = params["order"].partition(".")
+            rows.sort(key=lambda row: row.get(column) or "", reverse=direction == "desc")
+        total = len(rows)
+        offset = int(params.get("offset", 0))
+        limit = int(params["limit"]) if "limit" in params else None
+        rows = rows[offset:offset + limit if limit is not None else None]
+        return [dict(row) for row in rows], total if count else None
+
+    async def insert(self, table: str, rows: list[dict], token: str, returning: bool = True) -> list[dict]:
+        now = _now()
+        created = [{"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, **row} for row in rows]
+        self._rows(table, token).extend(created)
+        return [dict(row) for row in created] if returning else []
+
+    async def update(self, table: str, params: dict, values: dict, token: str) -> list[dict]:
+        updated = []
+        matches = self._filter(params)
+        for row in self._rows(table, token):
+            if matches(row):
+                row.update(values)
+                updated.append(dict(row))
+        return updated
+
+    async def delete(self, table: str, params: dict, token: str) -> list[dict]:
+        rows = self._rows(table, token)
+        matches = self._filter(params)
+        deleted = [row for row in rows if matches(row)]
+        rows[:] = [row for row in rows if not matches(row)]
+        return deleted
+
+    async def merge_row(self, table_id: str, row_id: str, data: dict, token: str) -> list[dict]:
+        for row in self._rows(ROWS, token):
+            if row["id"] == row_id and row["table_def_id"] == table_id:
+                row["row_data"] = {**row["row_data"], **data}
+                row["updated_at"] = _now()
+                return [dict(row)]
+        return []
+
+    async def close(self) -> None:
+        pass
+
+
+# --- Store ---
+
+
+class VirtualTableStore:
+    """Virtual table operations for one caller token at a time, with coalesced reads and batched writes."""
+
+    def __init__(self, backend, batch_window: float = 0.005, batch_max: int = 100):
+        self.backend = backend
+        self.reads = SingleFlight()
+        self.inserts = WriteBatcher(self._flush_inserts, batch_window, batch_max)
+        self.deletes = WriteBatcher(self._flush_deletes, batch_window, batch_max)
+
+    @classmethod
+    def from_env(cls) -> "VirtualTableStore":
+        url = os.environ.get("SUPABASE_URL")
+        if url:
+            backend = PostgrestBackend(
+                url,
+                os.environ.get("SUPABASE_ANON_KEY", ""),
+                max_connections=int(os.environ.get("TABLES_MAX_CONNECTIONS", "50")),
+            )
+        else:
+            backend = MemoryBackend()
+        return cls(
+            backend,
+            batch_window=float(os.environ.get("TABLES_BATCH_WINDOW_MS", "5")) / 1000,
+            batch_max=int(os.environ.get("TABLES_BATCH_MAX", "100")),
+        )
+
+    # Reads (coalesced per caller)
+
+    async def _read(self, token: str, table: str, params: dict, count: bool = False):
+        key = (_caller_key(token), table, tuple(sorted(params.items())), count)
+        return await self.reads.do(key, lambda: self.backend.select(table, params, token, count))
+
+    async def list_tables(self, token: str) -> list[dict]:
+        rows, _ = await self._read(token, DEFINITIONS, {
+            "select": "id,table_name,columns,created_at", "order": "created_at.asc",
+        })
+        return rows
+
+    async def get_table(self, token: str, table_name: str) -> dict:
+        rows, _ = await self._read(token, DEFINITIONS, {
+            "select": "id,table_name,columns,created_at,updated_at", "table_name": f"eq.{table_name}", "limit": "1",
+        })
+        if not rows:
+            raise TableNotFoundError(f"Virtual table '{table_name}' does not exist.")
+        return rows[0]
+
+    async def count_rows(self, token: str, table_id: str) -> int:
+        _, total = await self._read(token, ROWS, {"select": "id", "table_def_id": f"eq.{table_id}", "limit": "1"}, True)
+        return total or 0
+
+    async def query_rows(self, token: str, table_name: str, filters: Optional[dict], limit: int, offset: int):
+        definition = await self.get_table(token, table_name)
+        params = {
+            "select": "id,row_data,created_at,updated_at",
+            "table_def_id": f"eq.{definition['id']}",
+            "order": "created_at.asc",
+            "limit": str(limit),
+            "offset": str(offset),
+        }
+        if filters:
+            _check_columns(definition, filters)
+            params["row_data"] = "cs." + json.dumps(filters, sort_keys=True, separators=(",", ":"))
+        return await self._read(token, ROWS, params, count=True)
+
+    async def iter_rows(self, token: str, table_id: str, filters: Optional[dict] = None,
+                        page_size: int = 1000) -> AsyncIterator[list[dict]]:
+        """
+        Yield all of a table's rows, one page at a time, for bulk export.
+        Pages are keyed on `id` rather than offset, so with the
+        `(table_def_id, id)` index in schema.sql each page is one index range
+        scan, and the next page is fetched while the caller works on the
+        current one.
+        """
+        params = {"select": "id,row_data", "table_def_id": f"eq.{table_id}", "order": "id.asc", "limit": str(page_size)}
+        if filters:
+            params["row_data"] = "cs." + json.dumps(filters, sort_keys=True, separators=(",", ":"))
+
+        async def fetch(after: Optional[str]) -> list[dict]:
+            page_params = dict(params, id=f"gt.{after}") if after else params
+            rows, _ = await self.backend.select(ROWS, page_params, token)
+            return rows
+
+        next_page = asyncio.ensure_future(fetch(None))
+        try:
+            while next_page is not None:
+                rows = await next_page
+                # Stop on an empty page, not a short one: PostgREST may cap pages below page_size (max-rows)
+                next_page = asyncio.ensure_future(fetch(rows[-1]["id"])) if rows else None
+                if rows:
+                    yield rows
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    # Writes
+
+    async def create_table(self, token: str, table_name: str, columns: list[dict]) -> dict:
+        try:
+            await self.get_table(token, table_name)
+        except TableNotFoundError:
+            pass
+        else:
+            raise StoreError(f"Virtual table '{table_name}' already exists.")
+        rows = await self.backend.insert(DEFINITIONS, [{"table_name": table_name, "columns": columns}], token)
+        return rows[0]
+
+    async def add_column(self, token: str, table_name: str, column_name: str, column_type: str) -> dict:
+        definition = await self.get_table(token, table_name)
+        if any(column["name"] == column_name for column in definition["columns"]):
+            raise StoreError(f"Column '{column_name}' already exists in '{table_name}'.")
+        # Reads are shared between callers: build a new list instead of appending
+        columns = [*definition["columns"], {"name": column_name, "type": column_type}]
+        rows = await self.backend.update(
+            DEFINITIONS, {"id": f"eq.{definition['id']}"}, {"columns": columns, "updated_at": _now()}, token
+        )
+        return rows[0]
+
+    async def set_column_types(self, token: str, table_name: str, types: dict[str, str]) -> dict:
+        """Change the declared type of existing columns (`{name: type}`). Stored values are left as they are."""
+        definition = await self.get_table(token, table_name)
+        columns = [{**column, "type": types.get(column["name"], column["type"])} for column in definition["columns"]]
+        rows = await self.backend.update(
+            DEFINITIONS, {"id": f"eq.{definition['id']}"}, {"columns": columns, "updated_at": _now()}, token
+        )
+        return rows[0]
+
+    async def insert_row(self, token: str, table_name: str, data: dict) -> dict:
+        definition = await self.get_table(token, table_name)
+        _check_columns(definition, data)
+        return await self.inserts.submit(token, {"table_def_id": definition["id"], "row_data": data})
+
+    async def update_row(self, token: str, table_name: str, row_id: str, data: dict) -> dict:
+        definition = await self.get_table(token, table_name)
+        _check_columns(definition, data)
+        # Merged by the database, not read-modify-write here: concurrent
+        # updates of different columns of one row both take effect
+        updated = await self.backend.merge_row(definition["id"], row_id, data, token)
+        if not updated:
+            raise StoreError(f"Row '{row_id}' not found in '{table_name}'.")
+        return updated[0]
+
+    async def delete_row(self, token: str, table_name: str, row_id: str) -> bool:
+        definition = await self.get_table(token, table_name)
+        return await self.deletes.submit((token, definition["id"]), row_id)
+
+    async def insert_rows(self, token: str, table_id: str, rows: list[dict]) -> int:
+        """Insert pre-validated `row_data` dicts in one request (bulk import). Returns the number inserted."""
+        # Bulk inserts are all-or-nothing, so skip echoing the rows back
+        await self.backend.insert(ROWS, [{"table_def_id": table_id, "row_data": row} for row in rows], token, returning=False)
+        return len(rows)
+
+    async def _flush_inserts(self, token: str, rows: list[dict]) -> list[dict]:
+        # PostgREST returns bulk-inserted rows in request order
+        return await self.backend.insert(ROWS, rows, token)
+
+    async def _flush_deletes(self, key: tuple[str, str], row_ids: list[str]) -> list[bool]:
+        token, table_id = key
+        deleted = await self.backend.delete(
+            ROWS, {"table_def_id": f"eq.{table_id}", "id": _in_list(row_ids)}, token
+        )
+        deleted_ids = {row["id"] for row in deleted}
+        return [row_id in deleted_ids for row_id in row_ids]
+
+    def stats(self) -> dict:
+        return {
+            "coalesced_reads": self.reads.coalesced,
+            "insert_batches": self.inserts.batches,
+            "insert_calls": self.inserts.items,
+            "delete_batches": self.deletes.batches,
+            "delete_calls": self.deletes.items,
+        }
+
+
+def _check_columns(definition: dict, data: dict) -> None:
+    known = {column["name"] for column in definition["columns"]}
+    unknown = sorted(set(data) - known)
+    if unknown:
+        raise StoreError(f"Unknown column(s) for '{definition['table_name']}': {', '.join(unknown)}")
+
+
+_store: Optional[VirtualTableStore] = None
+
+
+def get_store() -> VirtualTableStore:
+    """Return the process-wide store, creating it from the environment on first use."""
+    global _store
+    if _store is None:
+        _store = VirtualTableStore.from_env()
+    return _store
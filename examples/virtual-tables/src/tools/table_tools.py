@@ -1,12 +1,45 @@
-import uuid
-from datetime import datetime, timezone
+import os
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse
+
+from request_limits import body_limit, spooled
+
+from .table_store import StoreError, get_store
+from .table_transfer import export_table as export_rows
+from .table_transfer import get_downloads
+from .table_transfer import import_table as import_rows
+
+
+def _caller_token() -> str:
+    """The caller's Supabase JWT from the Authorization header ("" outside HTTP requests)."""
+    try:
+        from fastmcp.server.dependencies import get_http_headers
+
+        auth_header = get_http_headers(include_all=True).get("authorization", "")
+    except Exception:
+        return ""
+    return auth_header.replace("Bearer ", "").strip()
+
+
+def _download_url(download_id: str) -> str:
+    """Absolute URL of an export download: TABLES_PUBLIC_URL, else the URL this request came in on."""
+    base_url = os.environ.get("TABLES_PUBLIC_URL", "")
+    if not base_url:
+        try:
+            from fastmcp.server.dependencies import get_http_request
+
+            base_url = str(get_http_request().base_url)
+        except Exception:
+            pass
+    return f"{base_url.rstrip('/')}/exports/{download_id}"
 
 
 def register(mcp):
     """Register all virtual table management tools with the MCP server."""
 
     @mcp.tool()
-    def create_virtual_table(table_name: str, columns: list[dict]) -> dict:
+    async def create_virtual_table(table_name: str, columns: list[dict]) -> dict:
         """Create a new virtual table definition.
 
         Args:
@@ -17,71 +50,37 @@ def register(mcp):
         Returns:
             The created table definition including its ID, name, columns, and creation timestamp.
         """
-        # TODO: Replace with actual Supabase query:
-        #   supabase.table("virtual_table_definitions").insert({
-        #       "user_id": current_user_id,
-        #       "table_name": table_name,
-        #       "columns": columns,
-        #   }).execute()
-
-        table_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc).isoformat()
+        try:
+            table = await get_store().create_table(_caller_token(), table_name, columns)
+        except StoreError as e:
+            return {"success": False, "error": str(e)}
 
         return {
             "success": True,
-            "table": {
-                "id": table_id,
-                "table_name": table_name,
-                "columns": columns,
-                "created_at": now,
-                "updated_at": now,
-            },
+            "table": table,
             "message": f"Virtual table '{table_name}' created with {len(columns)} column(s).",
         }
 
     @mcp.tool()
-    def list_virtual_tables() -> dict:
+    async def list_virtual_tables() -> dict:
         """List all virtual tables belonging to the current user.
 
         Returns:
             A dict containing a list of table names and their column definitions.
         """
-        # TODO: Replace with actual Supabase query:
-        #   supabase.table("virtual_table_definitions")
-        #       .select("id, table_name, columns, created_at")
-        #       .eq("user_id", current_user_id)
-        #       .execute()
+        try:
+            tables = await get_store().list_tables(_caller_token())
+        except StoreError as e:
+            return {"success": False, "error": str(e)}
 
-        # Placeholder demo data
         return {
             "success": True,
-            "tables": [
-                {
-                    "id": "demo-table-001",
-                    "table_name": "contacts",
-                    "columns": [
-                        {"name": "name", "type": "text"},
-                        {"name": "email", "type": "text"},
-                        {"name": "phone", "type": "text"},
-                    ],
-                    "created_at": "2025-01-15T10:00:00+00:00",
-                },
-                {
-                    "id": "demo-table-002",
-                    "table_name": "inventory",
-                    "columns": [
-                        {"name": "item", "type": "text"},
-                        {"name": "quantity", "type": "integer"},
-                        {"name": "price", "type": "float"},
-                    ],
-                    "created_at": "2025-01-16T12:30:00+00:00",
-                },
-            ],
-            "count": 2,
+            "tables": tables,
+            "count": len(tables),
         }
 
     @mcp.tool()
-    def get_table_schema(table_name: str) -> dict:
+    async def get_table_schema(table_name: str) -> dict:
         """Get the column schema for a specific virtual table.
 
         Args:
@@ -90,30 +89,23 @@ def register(mcp):
         Returns:
             The table schema including column names and types.
         """
-        # TODO: Replace with actual Supabase query:
-        #   supabase.table("virtual_table_definitions")
-        #       .select("id, table_name, columns, created_at, updated_at")
-        #       .eq("user_id", current_user_id)
-        #       .eq("table_name", table_name)
-        #       .single()
-        #       .execute()
-
-        # Placeholder demo data
+        store = get_store()
+        token = _caller_token()
+        try:
+            table = await store.get_table(token, table_name)
+            row_count = await store.count_rows(token, table["id"])
+        except StoreError as e:
+            return {"success": False, "error": str(e)}
+
         return {
             "success": True,
             "table_name": table_name,
-            "columns": [
-                {"name": "id", "type": "uuid"},
-                {"name": "name", "type": "text"},
-                {"name": "email", "type": "text"},
-                {"name": "phone", "type": "text"},
-                {"name": "created_at", "type": "timestamp"},
-            ],
-            "row_count": 42,
+            "columns": table["columns"],
+            "row_count": row_count,
         }
 
     @mcp.tool()
-    def insert_row(table_name: str, data: dict) -> dict:
+    async def insert_row(table_name: str, data: dict) -> dict:
         """Insert a row into a virtual table.
 
         Args:
@@ -124,31 +116,25 @@ def register(mcp):
         Returns:
             The inserted row including its generated ID and timestamps.
         """
-        # TODO: Replace with actual Supabase query:
-        #   1. Validate data keys against the table's column definitions
-        #   2. supabase.table("virtual_table_rows").insert({
-        #          "user_id": current_user_id,
-        #          "table_def_id": table_definition_id,
-        #          "row_data": data,
-        #      }).execute()
-
-        row_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc).isoformat()
+        try:
+            row = await get_store().insert_row(_caller_token(), table_name, data)
+        except StoreError as e:
+            return {"success": False, "error": str(e)}
 
         return {
             "success": True,
             "row": {
-                "id": row_id,
+                "id": row["id"],
                 "table_name": table_name,
-                "data": data,
-                "created_at": now,
-                "updated_at": now,
+                "data": row["row_data"],
+                "created_at": row["created_at"],
+                "updated_at": row["updated_at"],
             },
             "message": f"Row inserted into '{table_name}'.",
         }
 
     @mcp.tool()
-    def query_rows(
+    async def query_rows(
         table_name: str,
         filters: dict | None = None,
         limit: int = 50,
@@ -166,46 +152,31 @@ def register(mcp):
         Returns:
             Paginated query results with rows, total count, limit, and offset.
         """
-        # TODO: Replace with actual Supabase query:
-        #   query = supabase.table("virtual_table_rows")
-        #       .select("id, row_data, created_at, updated_at", count="exact")
-        #       .eq("user_id", current_user_id)
-        #       .eq("table_def_id", table_definition_id)
-        #
-        #   if filters:
-        #       for col, val in filters.items():
-        #           query = query.contains("row_data", {col: val})
-        #
-        #   query = query.range(offset, offset + limit - 1).execute()
-
-        # Placeholder demo data
-        demo_rows = [
-            {
-                "id": "row-001",
-                "data": {"name": "Alice", "email": "alice@example.com", "phone": "555-0101"},
-                "created_at": "2025-01-17T09:00:00+00:00",
-                "updated_at": "2025-01-17T09:00:00+00:00",
-            },
-            {
-                "id": "row-002",
-                "data": {"name": "Bob", "email": "bob@example.com", "phone": "555-0102"},
-                "created_at": "2025-01-17T09:05:00+00:00",
-                "updated_at": "2025-01-17T09:05:00+00:00",
-            },
-        ]
+        try:
+            rows, total_count = await get_store().query_rows(_caller_token(), table_name, filters, limit, offset)
+        except StoreError as e:
+            return {"success": False, "error": str(e)}
 
         return {
             "success": True,
             "table_name": table_name,
-            "rows": demo_rows,
-            "total_count": 2,
+            "rows": [
+                {
+                    "id": row["id"],
+                    "data": row["row_data"],
+                    "created_at": row["created_at"],
+                    "updated_at": row["updated_at"],
+                }
+                for row in rows
+            ],
+            "total_count": total_count,
             "limit": limit,
             "offset": offset,
             "filters_applied": filters or {},
         }
 
     @mcp.tool()
-    def update_row(table_name: str, row_id: str, data: dict) -> dict:
+    async def update_row(table_name: str, row_id: str, data: dict) -> dict:
         """Update a specific row by ID.
 
         Args:
@@ -217,29 +188,24 @@ def register(mcp):
         Returns:
             The updated row with its new data and updated timestamp.
         """
-        # TODO: Replace with actual Supabase query:
-        #   1. Validate data keys against the table's column definitions
-        #   2. supabase.table("virtual_table_rows")
-        #          .update({"row_data": merged_data, "updated_at": now})
-        #          .eq("id", row_id)
-        #          .eq("user_id", current_user_id)
-        #          .execute()
-
-        now = datetime.now(timezone.utc).isoformat()
+        try:
+            row = await get_store().update_row(_caller_token(), table_name, row_id, data)
+        except StoreError as e:
+            return {"success": False, "error": str(e)}
 
         return {
             "success": True,
             "row": {
                 "id": row_id,
                 "table_name": table_name,
-                "data": data,
-                "updated_at": now,
+                "data": row["row_data"],
+                "updated_at": row["updated_at"],
             },
             "message": f"Row '{row_id}' in '{table_name}' updated.",
         }
 
     @mcp.tool()
-    def delete_row(table_name: str, row_id: str) -> dict:
+    async def delete_row(table_name: str, row_id: str) -> dict:
         """Delete a specific row by ID.
 
         Args:
@@ -249,13 +215,13 @@ def register(mcp):
         Returns:
             Confirmation of the deletion.
         """
-        # TODO: Replace with actual Supabase query:
-        #   supabase.table("virtual_table_rows")
-        #       .delete()
-        #       .eq("id", row_id)
-        #       .eq("user_id", current_user_id)
-        #       .execute()
+        try:
+            deleted = await get_store().delete_row(_caller_token(), table_name, row_id)
+        except StoreError as e:
+            return {"success": False, "error": str(e)}
 
+        if not deleted:
+            return {"success": False, "error": f"Row '{row_id}' not found in '{table_name}'."}
         return {
             "success": True,
             "deleted": {
@@ -266,7 +232,7 @@ def register(mcp):
         }
 
     @mcp.tool()
-    def add_column(table_name: str, column_name: str, column_type: str) -> dict:
+    async def add_column(table_name: str, column_name: str, column_type: str) -> dict:
         """Add a new column to an existing virtual table.
 
         Args:
@@ -277,16 +243,10 @@ def register(mcp):
         Returns:
             The updated table schema with the new column included.
         """
-        # TODO: Replace with actual Supabase query:
-        #   1. Fetch existing column definitions
-        #   2. Append the new column
-        #   3. supabase.table("virtual_table_definitions")
-        #          .update({"columns": updated_columns, "updated_at": now})
-        #          .eq("id", table_definition_id)
-        #          .eq("user_id", current_user_id)
-        #          .execute()
-
-        now = datetime.now(timezone.utc).isoformat()
+        try:
+            table = await get_store().add_column(_caller_token(), table_name, column_name, column_type)
+        except StoreError as e:
+            return {"success": False, "error": str(e)}
 
         return {
             "success": True,
@@ -295,6 +255,66 @@ def register(mcp):
                 "name": column_name,
                 "type": column_type,
             },
-            "updated_at": now,
+            "updated_at": table["updated_at"],
             "message": f"Column '{column_name}' ({column_type}) added to '{table_name}'.",
         }
+
+    @mcp.tool()
+    async def export_table(table_name: str, format: str = "parquet", filters: dict | None = None) -> dict:
+        """Export every row of a virtual table as a Parquet, Arrow, CSV or NDJSON file.
+
+        Args:
+            table_name: The name of the virtual table to export.
+            format: "parquet" (default), "arrow" (Arrow IPC stream), "csv" or "ndjson".
+                    Parquet and Arrow columns are typed from the table's column types.
+            filters: Optional dict of column-name to value filters (equality match), as in query_rows.
+
+        Returns:
+            The row count and column types. Small files are returned in "data" (base64 for
+            parquet/arrow, plain text for csv/ndjson); larger ones as a temporary "download_url".
+        """
+        try:
+            export = await export_rows(get_store(), _caller_token(), table_name, format, filters)
+        except StoreError as e:
+            return {"success": False, "error": str(e)}
+
+        if "download_id" in export:
+            export["download_url"] = _download_url(export.pop("download_id"))
+        return {"success": True, "table_name": table_name, **export}
+
+    @mcp.tool()
+    @body_limit("256MB")
+    @spooled("data")
+    async def import_table(table_name: str, data: str, format: str = "csv", create_if_missing: bool = True) -> dict:
+        """Bulk-insert rows into a virtual table from a Parquet, Arrow, CSV or NDJSON file.
+
+        Args:
+            table_name: The name of the virtual table to import into.
+            data: The file contents: base64 for parquet/arrow, plain text for csv/ndjson.
+                  CSV needs a header row; NDJSON is one JSON object per line.
+            format: "csv" (default), "ndjson", "parquet" or "arrow".
+            create_if_missing: Create the table if it doesn't exist, with column types taken
+                               from the file (default true).
+
+        Returns:
+            The number of rows imported, whether the table was created, and its columns.
+        """
+        try:
+            result = await import_rows(get_store(), _caller_token(), table_name, data, format, create_if_missing)
+        except StoreError as e:
+            return {"success": False, "error": str(e), "rows_imported": getattr(e, "rows_imported", 0)}
+
+        return {
+            "success": True,
+            "table_name": table_name,
+            **result,
+            "message": f"Imported {result['rows_imported']} row(s) into '{table_name}'.",
+        }
+
+    @mcp.custom_route("/exports/{download_id}", methods=["GET"])
+    async def download_export(request: Request):
+        """Serve a large export. The unguessable id is the credential, and it expires after TABLES_EXPORT_TTL."""
+        download = get_downloads().get(request.path_params["download_id"])
+        if download is None:
+            return JSONResponse({"error": "Export not found or expired"}, status_code=404)
+        return FileResponse(download.path, media_type=download.media_type, filename=download.filename)
@@ -0,0 +1,748 @@
+"""
+Bulk export and import of virtual tables.
+
+Rows move in batches, never as one list. An export pages through the table
+(`VirtualTableStore.iter_rows`) and appends each page to a file as it
+arrives. An import reads its upload batch by batch and inserts each batch
+in one request, with a few requests in flight. Memory stays bounded by the
+batch size rather than the table size, and encoding runs in a worker thread
+so the event loop keeps serving other calls.
+
+Formats:
+    parquet   Columnar and compressed (needs pyarrow)
+    arrow     Arrow IPC stream (needs pyarrow)
+    csv       Header row, then one line per row
+    ndjson    One JSON object per line
+
+Column types declared with `create_virtual_table` become typed columns:
+
+    text       string                 integer    int64
+    float      float64                boolean    bool
+    timestamp  timestamp[us, UTC]     date       date32
+    json       string (JSON text)     (other)    string
+
+Values that don't fit their column's type are written as null and counted
+in `invalid_values`. Tables created by an import take their column types
+from the Arrow schema, or for CSV/NDJSON from the values in the first batch.
+
+Configuration:
+    TABLES_EXPORT_PAGE               Rows fetched per export page (default: 1000)
+    TABLES_EXPORT_INLINE_MAX_BYTES   Larger exports are served as a download link (default: 4194304)
+    TABLES_EXPORT_TTL                Seconds a download link stays valid (default: 900)
+    TABLES_IMPORT_BATCH              Rows per insert request on import (default: 500)
+    TABLES_IMPORT_CONCURRENCY        Insert requests in flight during an import (default: 4)
+"""
+
+import asyncio
+import atexit
+import base64
+import binascii
+import csv
+import io
+import json
+import math
+import os
+import secrets
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Iterator, Optional, Union
+
+from request_limits import SpooledArg, open_arg
+
+from .table_store import StoreError, TableNotFoundError, VirtualTableStore, _check_columns
+
+FORMATS = ("parquet", "arrow", "csv", "ndjson")
+BINARY_FORMATS = ("parquet", "arrow")
+
+_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Export pages are buffered up to this many rows per Parquet row group
+_ROW_GROUP_ROWS = 64 * 1024
+_DECODE_CHUNK = 4 * 1024 * 1024
+_TYPE_METADATA = b"virtual_table.type"
+
+
+class PartialImportError(StoreError):
+    """Raised when an import fails after some of its batches were inserted."""
+
+    def __init__(self, message: str, rows_imported: int):
+        super().__init__(message)
+        self.rows_imported = rows_imported
+
+
+def _env_int(key: str, default: int) -> int:
+    value = os.environ.get(key)
+    return int(value) if value else default
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise StoreError("Parquet and Arrow need pyarrow (pip install pyarrow); csv and ndjson work without it") from e
+    return pyarrow
+
+
+def _check_format(file_format: str) -> str:
+    normalized = (file_format or "").lower()
+    if normalized not in FORMATS:
+        raise StoreError(f"Unknown format '{file_format}' (expected one of {', '.join(FORMATS)})")
+    return normalized
+
+
+# --- Column types ---
+
+
+_KINDS = {
+    "text": "text", "string": "text", "varchar": "text",
+    "integer": "integer", "int": "integer", "bigint": "integer",
+    "float": "float", "double": "float", "number": "float", "numeric": "float", "real": "float",
+    "boolean": "boolean", "bool": "boolean",
+    "timestamp": "timestamp", "timestamptz": "timestamp", "datetime": "timestamp",
+    "date": "date",
+    "json": "json", "jsonb": "json",
+}
+
+_TRUE = {"true", "t", "yes", "y", "1"}
+_FALSE = {"false", "f", "no", "n", "0"}
+
+
+def column_kind(column_type: str) -> str:
+    """Normalize a declared column type; unknown types are treated as text."""
+    return _KINDS.get(str(column_type).lower(), "text")
+
+
+def _to_text(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _to_int(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        number = value
+    elif isinstance(value, (float, Decimal)):
+        if not math.isfinite(value) or value != int(value):
+            return None
+        number = int(value)
+    elif isinstance(value, str):
+        try:
+            number = int(value.strip())
+        except ValueError:
+            parsed = _to_float(value)
+            if parsed is None or not parsed.is_integer():
+                return None
+            number = int(parsed)
+    else:
+        return None
+    return number if -2**63 <= number < 2**63 else None
+
+
+def _to_float(value):
+    if isinstance(value, (bool, int, float, Decimal)):
+        number = float(value)
+    elif isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            return None
+    else:
+        return None
+    # row_data is JSON, which has no NaN or infinity
+    return number if math.isfinite(number) else None
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+    return None
+
+
+def _to_timestamp(value):
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime(value.year, value.month, value.day)
+    elif isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    return parsed.replace(tzinfo=timezone.utc) if parsed.tzinfo is None else parsed.astimezone(timezone.utc)
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value.strip()[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _to_json(value):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return _jsonable(value)
+
+
+_CONVERTERS = {
+    "text": _to_text,
+    "integer": _to_int,
+    "float": _to_float,
+    "boolean": _to_bool,
+    "timestamp": _to_timestamp,
+    "date": _to_date,
+    "json": _to_json,
+}
+
+
+def _jsonable(value):
+    """Convert a typed value (as read from Arrow, or produced by a converter) to JSON."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, Decimal):
+        return _to_float(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+class _Columns:
+    """A table's columns with their normalized types. Converts values and counts the ones that don't fit."""
+
+    def __init__(self, columns: list[dict]):
+        self.names = [column["name"] for column in columns]
+        self.kinds = [column_kind(column.get("type", "text")) for column in columns]
+        self.invalid = 0
+        self.failed: set[str] = set()  # Columns that had a value which didn't fit
+
+    def typed(self, row: dict) -> list:
+        values = []
+        for name, kind in zip(self.names, self.kinds):
+            value = row.get(name)
+            if value is not None:
+                converted = _CONVERTERS[kind](value)
+                if converted is None:
+                    self.invalid += 1
+                    self.failed.add(name)
+                value = converted
+            values.append(value)
+        return values
+
+    def row_data(self, row: dict) -> dict:
+        return {name: _jsonable(value) for name, value in zip(self.names, self.typed(row)) if value is not None}
+
+    def widen(self, names) -> None:
+        """Treat the given columns as text from now on."""
+        self.kinds = ["text" if name in names else kind for name, kind in zip(self.names, self.kinds)]
+
+
+def _arrow_type(pa, kind: str):
+    return {
+        "integer": pa.int64(),
+        "float": pa.float64(),
+        "boolean": pa.bool_(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "date": pa.date32(),
+    }.get(kind, pa.string())
+
+
+def _kind_of_arrow(pa, arrow_type) -> str:
+    types = pa.types
+    if types.is_boolean(arrow_type):
+        return "boolean"
+    if types.is_integer(arrow_type):
+        return "integer"
+    if types.is_floating(arrow_type) or types.is_decimal(arrow_type):
+        return "float"
+    if types.is_timestamp(arrow_type):
+        return "timestamp"
+    if types.is_date(arrow_type):
+        return "date"
+    if types.is_nested(arrow_type):
+        return "json"
+    return "text"
+
+
+def _infer_kind(values: list, from_text: bool) -> str:
+    present = [value for value in values if value is not None]
+    if not present:
+        return "text"
+    if all(isinstance(value, bool) for value in present):
+        return "boolean"
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+        return "integer"
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return "float"
+    if all(isinstance(value, (dict, list)) for value in present):
+        return "json"
+    if from_text and all(isinstance(value, str) for value in present):
+        # CSV cells are all strings: type a column by what every sample parses as
+        stripped = [value.strip() for value in present]
+        if all(value.lstrip("+-").isdigit() for value in stripped):
+            return "integer"
+        if all(_to_float(value) is not None for value in stripped):
+            return "float"
+        if all(value.lower() in ("true", "false") for value in stripped):
+            return "boolean"
+    return "text"
+
+
+def _infer_columns(rows: list[dict], from_text: bool) -> list[dict]:
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    return [{"name": name, "type": _infer_kind([row.get(name) for row in rows], from_text)} for name in names]
+
+
+# --- Writers ---
+
+
+class _ArrowBatches:
+    """Builds Arrow record batches for a table's columns."""
+
+    def __init__(self, columns: _Columns):
+        self.pa = _pyarrow()
+        self.columns = columns
+        # The declared type rides along as field metadata, so json columns come back as json on import
+        self.schema = self.pa.schema([
+            self.pa.field(name, _arrow_type(self.pa, kind), metadata={_TYPE_METADATA: kind})
+            for name, kind in zip(columns.names, columns.kinds)
+        ])
+
+    def batch(self, rows: list[dict]):
+        typed = [self.columns.typed(row) for row in rows]
+        arrays = []
+        for index, kind in enumerate(self.columns.kinds):
+            values = [values[index] for values in typed]
+            if kind == "json":
+                values = [None if value is None else _to_text(value) for value in values]
+            arrays.append(self.pa.array(values, type=self.schema.field(index).type))
+        return self.pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+class _ParquetWriter(_ArrowBatches):
+    def __init__(self, path: str, columns: _Columns):
+        super().__init__(columns)
+        import pyarrow.parquet as pq
+
+        self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self._buffered = []
+        self._buffered_rows = 0
+
+    def write(self, rows: list[dict]) -> None:
+        # Pages are small; buffer them so row groups are large enough to scan efficiently
+        self._buffered.append(self.batch(rows))
+        self._buffered_rows += len(rows)
+        if self._buffered_rows >= _ROW_GROUP_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffered:
+            self._writer.write_table(self.pa.Table.from_batches(self._buffered, self.schema))
+            self._buffered, self._buffered_rows = [], 0
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+class _ArrowStreamWriter(_ArrowBatches):
+    def __init__(self, path: str, columns: _Columns):
+        super().__init__(columns)
+        self._sink = self.pa.OSFile(path, "wb")
+        self._writer = self.pa.ipc.new_stream(self._sink, self.schema)
+
+    def write(self, rows: list[dict]) -> None:
+        self._writer.write_batch(self.batch(rows))
+
+    def close(self) -> None:
+        self._writer.close()
+        self._sink.close()
+
+
+class _CsvWriter:
+    def __init__(self, path: str, columns: _Columns):
+        self.columns = columns
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns.names)
+
+    def write(self, rows: list[dict]) -> None:
+        self._writer.writerows(
+            ["" if value is None else _to_text(value) for value in self.columns.typed(row)] for row in rows
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _NdjsonWriter:
+    def __init__(self, path: str, columns: _Columns):
+        self.columns = columns
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows: list[dict]) -> None:
+        self._file.writelines(
+            json.dumps(self.columns.row_data(row), separators=(",", ":"), ensure_ascii=False) + "\n" for row in rows
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+_WRITERS = {"parquet": _ParquetWriter, "arrow": _ArrowStreamWriter, "csv": _CsvWriter, "ndjson": _NdjsonWriter}
+
+
+# --- Readers ---
+
+
+def _decode_base64(source):
+    """Decode base64 from a binary file chunk by chunk into a temp file, so neither side is held whole."""
+    decoded = tempfile.TemporaryFile()
+    pending = b""
+    try:
+        while chunk := source.read(_DECODE_CHUNK):
+            pending += b"".join(chunk.split())
+            usable = len(pending) - len(pending) % 4
+            decoded.write(base64.b64decode(pending[:usable], validate=True))
+            pending = pending[usable:]
+        decoded.write(base64.b64decode(pending, validate=True))
+    except (binascii.Error, ValueError) as e:
+        decoded.close()
+        raise StoreError(f"Data is not valid base64: {e}") from e
+    decoded.seek(0)
+    return decoded
+
+
+def _read_csv(text: io.TextIOBase) -> Iterator[dict]:
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if not header:
+        return
+    if any(not name.strip() for name in header) or len(set(header)) != len(header):
+        raise StoreError("CSV header must name every column exactly once")
+    for record in reader:
+        if not record:
+            continue
+        if len(record) > len(header):
+            raise StoreError(f"CSV line {reader.line_num} has {len(record)} fields; the header has {len(header)}")
+        yield {name: value for name, value in zip(header, record) if value != ""}
+
+
+def _read_ndjson(text: io.TextIOBase) -> Iterator[dict]:
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise StoreError(f"NDJSON line {number} is not valid JSON: {e}") from e
+        if not isinstance(row, dict):
+            raise StoreError(f"NDJSON line {number} is not a JSON object")
+        yield row
+
+
+class _Reader:
+    """An upload opened for import: its columns (when the format carries a schema) and its rows in batches."""
+
+    def __init__(self, file_format: str, data: Union[str, SpooledArg], batch_size: int):
+        self.format = file_format
+        self.batch_size = batch_size
+        self.columns: Optional[list[dict]] = None
+        self._file = None
+        # Read in a stream, from the spool file when the upload was spooled to disk
+        self._source = open_arg(data)
+        if file_format in BINARY_FORMATS:
+            pa = _pyarrow()
+            try:
+                self._file = _decode_base64(self._source)
+            except StoreError:
+                self.close()
+                raise
+            try:
+                record_batches = self._open_arrow(pa, file_format)
+            except (pa.ArrowException, OSError) as e:
+                self.close()
+                raise StoreError(f"Data is not a valid {file_format} file: {e}") from e
+            rows = (row for record_batch in record_batches for row in record_batch.to_pylist())
+        else:
+            text = io.TextIOWrapper(self._source, encoding="utf-8-sig", errors="surrogatepass", newline="")
+            self._source = text
+            rows = _read_csv(text) if file_format == "csv" else _read_ndjson(text)
+        self._batches = self._rebatch(rows)
+
+    def _open_arrow(self, pa, file_format: str):
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            parquet = pq.ParquetFile(self._file)
+            schema = parquet.schema_arrow
+            record_batches = parquet.iter_batches(batch_size=self.batch_size)
+        else:
+            try:
+                stream = pa.ipc.open_stream(self._file)
+                schema, record_batches = stream.schema, stream
+            except pa.ArrowInvalid:
+                # Also accept the Arrow file (Feather v2) format
+                self._file.seek(0)
+                arrow_file = pa.ipc.open_file(self._file)
+                schema = arrow_file.schema
+                record_batches = (arrow_file.get_batch(i) for i in range(arrow_file.num_record_batches))
+        self.columns = [
+            {"name": field.name, "type": (field.metadata or {}).get(_TYPE_METADATA, b"").decode() or _kind_of_arrow(pa, field.type)}
+            for field in schema
+        ]
+        return record_batches
+
+    def _rebatch(self, rows: Iterator[dict]) -> Iterator[list[dict]]:
+        batch = []
+        try:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        except StoreError:
+            raise
+        except Exception as e:
+            raise StoreError(f"Could not read {self.format} data: {e}") from e
+        if batch:
+            yield batch
+
+    def next_batch(self) -> Optional[list[dict]]:
+        return next(self._batches, None)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._source.close()
+
+
+# --- Export & import ---
+
+
+@dataclass
+class Download:
+    path: str
+    media_type: str
+    filename: str
+    expires_at: float
+
+
+class Downloads:
+    """Exports too large to return inline. Each is served under an unguessable id until it expires."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._files: dict[str, Download] = {}
+
+    def add(self, path: str, media_type: str, filename: str) -> tuple[str, Download]:
+        self.sweep()
+        download_id = secrets.token_urlsafe(32)
+        download = Download(path, media_type, filename, time.time() + self.ttl)
+        self._files[download_id] = download
+        return download_id, download
+
+    def get(self, download_id: str) -> Optional[Download]:
+        self.sweep()
+        return self._files.get(download_id)
+
+    def sweep(self, everything: bool = False) -> None:
+        now = time.time()
+        for download_id, download in list(self._files.items()):
+            if everything or download.expires_at <= now:
+                del self._files[download_id]
+                try:
+                    os.unlink(download.path)
+                except OSError:
+                    pass
+
+
+_downloads: Optional[Downloads] = None
+
+
+def get_downloads() -> Downloads:
+    """Return the process-wide download registry."""
+    global _downloads
+    if _downloads is None:
+        _downloads = Downloads(_env_int("TABLES_EXPORT_TTL", 900))
+    return _downloads
+
+
+@atexit.register
+def _remove_downloads() -> None:
+    if _downloads is not None:
+        _downloads.sweep(everything=True)
+
+
+async def export_table(store: VirtualTableStore, token: str, table_name: str, file_format: str,
+                       filters: Optional[dict] = None) -> dict:
+    """
+    Write a table to a temp file in `file_format`, page by page. Returns the
+    file inline (`data`) when it is at most TABLES_EXPORT_INLINE_MAX_BYTES,
+    otherwise registers it with `get_downloads()` and returns its `download_id`.
+    """
+    file_format = _check_format(file_format)
+    definition = await store.get_table(token, table_name)
+    if filters:
+        _check_columns(definition, filters)
+    columns = _Columns(definition["columns"])
+
+    descriptor, path = tempfile.mkstemp(prefix="vtable-export-", suffix=f".{file_format}")
+    os.close(descriptor)
+    row_count = 0
+    try:
+        writer = await asyncio.to_thread(_WRITERS[file_format], path, columns)
+        try:
+            async for page in store.iter_rows(token, definition["id"], filters, _env_int("TABLES_EXPORT_PAGE", 1000)):
+                await asyncio.to_thread(writer.write, [row["row_data"] for row in page])
+                row_count += len(page)
+        finally:
+            await asyncio.to_thread(writer.close)
+        size = os.path.getsize(path)
+        result = {
+            "format": file_format,
+            "columns": [{"name": name, "type": kind} for name, kind in zip(columns.names, columns.kinds)],
+            "row_count": row_count,
+            "invalid_values": columns.invalid,
+            "bytes": size,
+        }
+        if size > _env_int("TABLES_EXPORT_INLINE_MAX_BYTES", 4 * 1024 * 1024):
+            download_id, download = get_downloads().add(path, _MEDIA_TYPES[file_format], f"{table_name}.{file_format}")
+            return {**result, "download_id": download_id, "expires_at": download.expires_at}
+
+        with open(path, "rb") as exported:
+            content = exported.read()
+    except BaseException:
+        os.unlink(path)
+        raise
+    os.unlink(path)
+    if file_format in BINARY_FORMATS:
+        return {**result, "encoding": "base64", "data": base64.b64encode(content).decode("ascii")}
+    return {**result, "encoding": "text", "data": content.decode("utf-8")}
+
+
+async def import_table(store: VirtualTableStore, token: str, table_name: str, data: Union[str, SpooledArg],
+                       file_format: str, create_if_missing: bool = True) -> dict:
+    """
+    Insert every row of `data` (base64 for parquet/arrow, text for csv/ndjson;
+    a string or a spooled upload) into a table, creating it if needed. Imports
+    are not atomic: a failure partway raises PartialImportError carrying the
+    count already inserted.
+    """
+    file_format = _check_format(file_format)
+    batch_size = _env_int("TABLES_IMPORT_BATCH", 500)
+    reader = await asyncio.to_thread(_Reader, file_format, data, batch_size)
+    try:
+        batch = await asyncio.to_thread(reader.next_batch)
+        created = False
+        try:
+            definition = await store.get_table(token, table_name)
+        except TableNotFoundError:
+            if not create_if_missing:
+                raise
+            source_columns = reader.columns or _infer_columns(batch or [], from_text=file_format == "csv")
+            if not source_columns:
+                raise StoreError("Nothing to import: the data has no columns.")
+            definition = await store.create_table(token, table_name, source_columns)
+            created = True
+        if reader.columns:
+            _check_columns(definition, {column["name"]: None for column in reader.columns})
+        columns = _Columns(definition["columns"])
+
+        def prepare(rows: list[dict]) -> list[dict]:
+            for row in rows:
+                _check_columns(definition, row)
+            return [columns.row_data(row) for row in rows]
+
+        slots = asyncio.Semaphore(_env_int("TABLES_IMPORT_CONCURRENCY", 4))
+
+        async def send(rows: list[dict]) -> int:
+            try:
+                return await store.insert_rows(token, definition["id"], rows)
+            finally:
+                slots.release()
+
+        tasks: list[asyncio.Task] = []
+        error: Optional[Exception] = None
+        try:
+            while batch:
+                invalid, columns.failed = columns.invalid, set()
+                rows = await asyncio.to_thread(prepare, batch)
+                if created and not reader.columns and columns.failed:
+                    # The types were guessed from the first batch: widen the
+                    # columns this batch doesn't fit instead of nulling values
+                    widened = sorted(columns.failed)
+                    definition = await store.set_column_types(token, table_name, dict.fromkeys(widened, "text"))
+                    columns.widen(widened)
+                    columns.invalid = invalid
+                    rows = await asyncio.to_thread(prepare, batch)
+                await slots.acquire()
+                if any(task.done() and task.exception() for task in tasks):
+                    slots.release()
+                    break  # A batch failed: stop sending; the error is raised below
+                tasks.append(asyncio.ensure_future(send(rows)))
+                batch = await asyncio.to_thread(reader.next_batch)
+        except StoreError as e:
+            error = e
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+    finally:
+        reader.close()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    imported = sum(result for result in results if isinstance(result, int))
+    error = error or next((result for result in results if isinstance(result, BaseException)), None)
+    if error is not None:
+        if imported:
+            raise PartialImportError(f"{error} ({imported} row(s) were imported before the failure)", imported) from error
+        raise error
+    return {
+        "created": created,
+        "columns": [{"name": name, "type": kind} for name, kind in zip(columns.names, columns.kinds)],
+        "rows_imported": imported,
+        "batches": len(tasks),
+        "invalid_values": columns.invalid,
+    }
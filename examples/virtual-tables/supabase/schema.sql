@@ -0,0 +1,59 @@
+-- Virtual Tables: per-user table definitions and rows
+-- user_id defaults to the caller (auth.uid()), so the MCP server never sends it;
+-- RLS limits every query to the caller's own data.
+
+CREATE TABLE IF NOT EXISTS public.virtual_table_definitions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL DEFAULT auth.uid() REFERENCES auth.users(id) ON DELETE CASCADE,
+    table_name TEXT NOT NULL,
+    columns JSONB NOT NULL DEFAULT '[]'::jsonb,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (user_id, table_name)
+);
+
+CREATE TABLE IF NOT EXISTS public.virtual_table_rows (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL DEFAULT auth.uid() REFERENCES auth.users(id) ON DELETE CASCADE,
+    table_def_id UUID NOT NULL REFERENCES public.virtual_table_definitions(id) ON DELETE CASCADE,
+    row_data JSONB NOT NULL DEFAULT '{}'::jsonb,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- query_rows: rows of one table in insertion order, filtered with row_data @> {...}
+CREATE INDEX IF NOT EXISTS idx_virtual_table_rows_table ON public.virtual_table_rows(table_def_id, created_at);
+-- export_table: keyset pages (table_def_id = $1 AND id > $2 ORDER BY id) are one range scan each
+CREATE INDEX IF NOT EXISTS idx_virtual_table_rows_table_id ON public.virtual_table_rows(table_def_id, id);
+CREATE INDEX IF NOT EXISTS idx_virtual_table_rows_data ON public.virtual_table_rows USING GIN (row_data jsonb_path_ops);
+
+-- update_row: merge the changed columns into row_data in a single UPDATE, so
+-- concurrent updates of different columns of one row don't overwrite each other.
+-- SECURITY INVOKER: runs as the caller, under the RLS policies below.
+CREATE OR REPLACE FUNCTION public.merge_virtual_table_row(p_table_def_id UUID, p_row_id UUID, p_patch JSONB)
+RETURNS SETOF public.virtual_table_rows
+LANGUAGE sql
+SECURITY INVOKER
+AS $$
+    UPDATE public.virtual_table_rows
+    SET row_data = row_data || p_patch, updated_at = now()
+    WHERE id = p_row_id AND table_def_id = p_table_def_id
+    RETURNING *;
+$$;
+
+ALTER TABLE public.virtual_table_definitions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.virtual_table_rows ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users manage their own virtual tables"
+    ON public.virtual_table_definitions
+    FOR ALL
+    TO authenticated
+    USING (user_id = auth.uid())
+    WITH CHECK (user_id = auth.uid());
+
+CREATE POLICY "Users manage their own virtual table rows"
+    ON public.virtual_table_rows
+    FOR ALL
+    TO authenticated
+    USING (user_id = auth.uid())
+    WITH CHECK (user_id = auth.uid());
@@ -0,0 +1,241 @@
+"""
+The gateway's view of the registry: which upstreams exist and which tools
+they expose.
+
+Upstream `tools/list` results are cached and served from the gateway's own
+tool table, so a client listing tools never causes upstream traffic. An
+upstream's cached list is dropped when its registry row changes
+(`updated_at`), when it disappears from the registry, or after
+`tools_ttl` seconds. If a re-fetch fails, the stale list is kept.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import mcp.types
+from fastmcp.exceptions import ToolError
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.tools.tool import Tool, ToolResult
+from pydantic import PrivateAttr
+
+from auth import VALID_API_KEYS, validate_api_key
+from registry_client import RefreshResult
+from upstreams import Upstream, UpstreamError, UpstreamToolError
+
+logger = logging.getLogger(__name__)
+
+
+class FileRegistry:
+    """
+    Local stand-in for `mcp_registry`: a JSON file holding a list of rows
+    (same columns as the table). Has the parts of the `RegistryClient`
+    interface the gateway uses.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.etag: Optional[str] = None
+        self._rows: dict[str, dict] = {}
+
+    def refresh(self, full: bool = False) -> RefreshResult:
+        try:
+            raw = self.path.read_bytes()
+        except OSError as e:
+            return RefreshResult(changed=False, etag=self.etag, error=str(e))
+        etag = hashlib.sha256(raw).hexdigest()[:16]
+        if etag == self.etag and not full:
+            return RefreshResult(changed=False, etag=etag)
+        rows = {row["slug"]: row for row in json.loads(raw)}
+        upserted = [slug for slug, row in rows.items() if self._rows.get(slug) != row]
+        deleted = [slug for slug in self._rows if slug not in rows]
+        self._rows, self.etag = rows, etag
+        return RefreshResult(changed=bool(upserted or deleted), upserted=upserted, deleted=deleted, etag=etag)
+
+    def list(self, status=None, tier=None, language=None, refresh: bool = False) -> list[dict]:
+        if refresh:
+            self.refresh()
+        return [
+            row for row in self._rows.values()
+            if (status is None or row.get("status") == status)
+            and (tier is None or row.get("tier") == tier)
+            and (language is None or row.get("language") == language)
+        ]
+
+
+class GatewayTool(Tool):
+    """A namespaced tool whose calls are forwarded to an upstream server."""
+
+    upstream: str
+    upstream_tool: str
+    _catalog: "GatewayCatalog" = PrivateAttr()
+
+    async def run(self, arguments: dict) -> ToolResult:
+        return await self._catalog.call(self.upstream, self.upstream_tool, arguments)
+
+
+class GatewayCatalog:
+    """Keeps upstreams and the gateway's tool table in sync with the registry."""
+
+    def __init__(
+        self,
+        mcp,
+        registry,
+        client: httpx.AsyncClient,
+        statuses: tuple[str, ...] = ("active", "deployed"),
+        separator: str = "__",
+        tools_ttl: float = 300.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.mcp = mcp
+        self.registry = registry
+        self.client = client
+        self.statuses = statuses
+        self.separator = separator
+        self.tools_ttl = tools_ttl
+        self.breaker_settings = {"failure_threshold": failure_threshold, "reset_timeout": reset_timeout}
+        self.upstreams: dict[str, Upstream] = {}
+        self._versions: dict[str, str] = {}                       # slug -> registry updated_at
+        self._tools: dict[str, tuple[float, list[dict]]] = {}     # slug -> (fetched_at, tools/list)
+        self._registered: dict[str, tuple[str, dict]] = {}  # tool name -> (slug, upstream spec)
+        self._sync_lock = asyncio.Lock()
+
+    def tool_name(self, slug: str, tool: str) -> str:
+        return f"{slug}{self.separator}{tool}"
+
+    # --- Registry sync ---
+
+    async def sync(self, full: bool = False) -> RefreshResult:
+        """Refresh the registry, rebuild changed upstreams and re-list their tools."""
+        async with self._sync_lock:
+            result = await asyncio.to_thread(self.registry.refresh, full)
+            rows = await asyncio.to_thread(self.registry.list, refresh=False)
+            rows = {r["slug"]: r for r in rows if r.get("status") in self.statuses}
+
+            for slug in set(self.upstreams) - set(rows):
+                logger.info("Upstream %s left the registry", slug)
+                del self.upstreams[slug]
+                self._versions.pop(slug, None)
+                self._tools.pop(slug, None)
+
+            for slug, row in rows.items():
+                version = row.get("updated_at") or json.dumps(row, sort_keys=True)
+                if self._versions.get(slug) == version and slug in self.upstreams:
+                    continue
+                upstream = Upstream.from_registry(row, self.client, **self.breaker_settings)
+                if upstream is None:
+                    continue
+                self.upstreams[slug] = upstream
+                self._versions[slug] = version
+                self._tools.pop(slug, None)  # Invalidate the cached tools/list
+
+            await self._refresh_tools()
+            self._register_tools()
+            return result
+
+    async def _refresh_tools(self) -> None:
+        now = time.monotonic()
+        due = [
+            upstream for slug, upstream in self.upstreams.items()
+            if slug not in self._tools or now - self._tools[slug][0] > self.tools_ttl
+        ]
+
+        async def fetch(upstream: Upstream):
+            try:
+                self._tools[upstream.slug] = (time.monotonic(), await upstream.list_tools())
+            except (UpstreamError, UpstreamToolError) as e:
+                logger.warning("tools/list failed for %s, keeping cached tools: %s", upstream.slug, e)
+
+        await asyncio.gather(*(fetch(u) for u in due))
+
+    def _register_tools(self) -> None:
+        """Update the gateway's tool table to match the cached upstream tool lists."""
+        wanted = {
+            self.tool_name(slug, spec["name"]): (slug, spec)
+            for slug, (_, tools) in self._tools.items()
+            for spec in tools
+        }
+        for name in set(self._registered) - set(wanted):
+            self.mcp.remove_tool(name)
+        for name, (slug, spec) in wanted.items():
+            if self._registered.get(name) == (slug, spec):
+                continue
+            if name in self._registered:
+                self.mcp.remove_tool(name)
+            tool = GatewayTool(
+                name=name,
+                title=spec.get("title"),
+                description=f"[{slug}] {spec.get('description') or ''}".strip(),
+                parameters=spec.get("inputSchema") or {"type": "object", "properties": {}},
+                output_schema=spec.get("outputSchema"),
+                annotations=spec.get("annotations"),
+                upstream=slug,
+                upstream_tool=spec["name"],
+            )
+            tool._catalog = self
+            self.mcp.add_tool(tool)
+        if set(wanted) != set(self._registered):
+            logger.info("Gateway exposes %d tools from %d upstreams", len(wanted), len(self._tools))
+        self._registered = wanted
+
+    async def check_health(self, timeout: float = 5.0) -> None:
+        await asyncio.gather(*(u.check_health(timeout) for u in self.upstreams.values()))
+
+    async def run(self, refresh_interval: float, health_interval: float) -> None:
+        """Background loop: periodic health checks and registry syncs."""
+        last_sync = time.monotonic()
+        while True:
+            await asyncio.sleep(health_interval)
+            try:
+                await self.check_health()
+                if time.monotonic() - last_sync >= refresh_interval:
+                    await self.sync()
+                    last_sync = time.monotonic()
+            except Exception:
+                logger.exception("Gateway background refresh failed")
+
+    # --- Calls ---
+
+    async def call(self, slug: str, tool: str, arguments: dict) -> ToolResult:
+        upstream = self.upstreams.get(slug)
+        if upstream is None:
+            raise ToolError(f"Upstream '{slug}' is no longer registered")
+
+        auth = get_http_headers(include_all=True).get("authorization")
+        caller_headers = {"authorization": auth} if auth else {}
+        if upstream.auth_type == "apikey":
+            # The gateway holds this upstream's key, so it must check the caller's
+            token = caller_headers.get("authorization", "").removeprefix("Bearer ").strip()
+            if not VALID_API_KEYS or not validate_api_key(token):
+                raise ToolError("Invalid or missing API key")
+
+        try:
+            result = await upstream.request(
+                "tools/call", {"name": tool, "arguments": arguments}, caller_headers
+            )
+        except UpstreamToolError as e:
+            raise ToolError(str(e)) from e
+        except UpstreamError as e:
+            raise ToolError(f"Upstream unavailable: {e}") from e
+
+        parsed = mcp.types.CallToolResult.model_validate(result)
+        if parsed.isError:
+            text = next((c.text for c in parsed.content if isinstance(c, mcp.types.TextContent)), "Tool error")
+            raise ToolError(text)
+        return ToolResult(content=parsed.content, structured_content=parsed.structuredContent)
+
+    def status(self) -> dict:
+        return {
+            "registry_etag": self.registry.etag,
+            "tools": len(self._registered),
+            "upstreams": [
+                {**u.status(), "tools": len(self._tools.get(slug, (0, []))[1])}
+                for slug, u in sorted(self.upstreams.items())
+            ],
+        }
@@ -0,0 +1,116 @@
+import asyncio
+import contextlib
+import logging
+import os
+
+import httpx
+import uvicorn
+from fastmcp import FastMCP
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from catalog import FileRegistry, GatewayCatalog
+from metrics import metrics_endpoint
+from registry_client import RegistryClient
+from tracing import TracingMiddleware, configure_tracing_from_env
+
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+GATEWAY_NAME = os.environ.get("MCP_NAME", "matrx-mcp-gateway")
+REFRESH_INTERVAL = float(os.environ.get("GATEWAY_REFRESH_INTERVAL", "30"))
+HEALTH_INTERVAL = float(os.environ.get("GATEWAY_HEALTH_INTERVAL", "10"))
+
+mcp = FastMCP(
+    name=GATEWAY_NAME,
+    instructions="Gateway to every registered AI Matrx MCP server. Tools are named <server-slug>__<tool>.",
+)
+
+configure_tracing_from_env()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# One pooled client for every upstream: connections are kept alive and reused
+client = httpx.AsyncClient(
+    http2=_http2_available(),
+    timeout=httpx.Timeout(float(os.environ.get("GATEWAY_UPSTREAM_TIMEOUT", "60")), connect=5.0),
+    limits=httpx.Limits(
+        max_connections=int(os.environ.get("GATEWAY_MAX_CONNECTIONS", "200")),
+        max_keepalive_connections=int(os.environ.get("GATEWAY_MAX_KEEPALIVE", "50")),
+        keepalive_expiry=float(os.environ.get("GATEWAY_KEEPALIVE_EXPIRY", "60")),
+    ),
+)
+
+# GATEWAY_REGISTRY_FILE points at a JSON stand-in for mcp_registry (local dev, tests)
+registry_file = os.environ.get("GATEWAY_REGISTRY_FILE")
+registry = FileRegistry(registry_file) if registry_file else RegistryClient.from_env(max_age=REFRESH_INTERVAL)
+
+catalog = GatewayCatalog(
+    mcp,
+    registry,
+    client,
+    statuses=tuple(s.strip() for s in os.environ.get("GATEWAY_STATUSES", "active,deployed").split(",")),
+    separator=os.environ.get("GATEWAY_SEPARATOR", "__"),
+    tools_ttl=float(os.environ.get("GATEWAY_TOOLS_TTL", "300")),
+    failure_threshold=int(os.environ.get("GATEWAY_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.environ.get("GATEWAY_BREAKER_RESET", "30")),
+)
+
+
+async def health(request: Request) -> JSONResponse:
+    status = catalog.status()
+    return JSONResponse({
+        "name": GATEWAY_NAME,
+        "version": "1.0.0",
+        "mcp_endpoint": "/mcp",
+        "status": "running",
+        "tools": status["tools"],
+        "upstreams_available": sum(u["available"] for u in status["upstreams"]),
+        "upstreams_total": len(status["upstreams"]),
+    })
+
+
+async def upstreams(request: Request) -> JSONResponse:
+    return JSONResponse(catalog.status())
+
+
+mcp_app = mcp.http_app(path="/mcp")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    async with mcp_app.lifespan(app):
+        await catalog.sync(full=True)
+        background = asyncio.create_task(catalog.run(REFRESH_INTERVAL, HEALTH_INTERVAL))
+        try:
+            yield
+        finally:
+            background.cancel()
+            await client.aclose()
+
+
+app = Starlette(
+    routes=[
+        Route("/", endpoint=health, methods=["GET"]),
+        Route("/health", endpoint=health, methods=["GET"]),
+        Route("/upstreams", endpoint=upstreams, methods=["GET"]),
+        Route("/metrics", endpoint=metrics_endpoint, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
+
+app.mount("/", mcp_app)
+app.add_middleware(TracingMiddleware)
+
+if __name__ == "__main__":
+    host = os.environ.get("HOST", "0.0.0.0")
+    port = int(os.environ.get("PORT", "8000"))
+    uvicorn.run(app, host=host, port=port)
@@ -0,0 +1,328 @@
+"""
+Upstream MCP servers behind the gateway.
+
+Each upstream is one registry entry and may have several endpoints
+(`endpoint_url` plus an optional `metadata.endpoints` list). A call goes to
+the healthy endpoint with the fewest in-flight requests whose circuit
+breaker admits it.
+
+All upstreams share one `httpx.AsyncClient`. Its pool keeps TCP/TLS
+connections alive between calls and uses HTTP/2 when `h2` is installed.
+Each endpoint also holds one MCP session that is reused until the upstream
+expires it.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from metrics import REGISTRY
+from tracing import inject_context, span
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2025-03-26"
+
+UPSTREAM_CALLS = REGISTRY.counter(
+    "gateway_upstream_requests_total", "Requests sent to upstream MCP servers by outcome.", ("upstream", "method", "status")
+)
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "gateway_upstream_duration_seconds", "Upstream request latency in seconds.", ("upstream", "method")
+)
+UPSTREAM_HEALTHY = REGISTRY.gauge("gateway_upstream_healthy", "1 if the endpoint passed its last health check.", ("upstream", "endpoint"))
+CIRCUIT_OPEN = REGISTRY.gauge("gateway_circuit_open", "1 while the endpoint's circuit breaker is open.", ("upstream", "endpoint"))
+
+
+class UpstreamError(RuntimeError):
+    """An upstream could not serve a request (transport failure, 5xx, open circuit)."""
+
+
+class UpstreamToolError(RuntimeError):
+    """The upstream answered with a JSON-RPC error. Not counted against its circuit."""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker. After `failure_threshold` consecutive
+    failures the circuit opens and calls are rejected for `reset_timeout`
+    seconds; then a single trial call is let through (half-open) and its
+    outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+        return self.state == self.CLOSED
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """End an admitted call without an outcome (cancelled, unexpected error), freeing the half-open trial."""
+        if self.state == self.HALF_OPEN:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("Circuit opened after %d consecutive failures", self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+def _parse_message(response: httpx.Response) -> dict:
+    """Decode a JSON-RPC reply sent either as JSON or as an SSE stream."""
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        for line in response.text.splitlines():
+            if line.startswith("data:"):
+                message = json.loads(line[5:])
+                if "id" in message:
+                    return message
+        raise UpstreamError("Upstream event stream ended without a response")
+    return response.json()
+
+
+class Endpoint:
+    """One URL of an upstream, with its MCP session, breaker and health."""
+
+    def __init__(self, upstream: str, url: str, breaker: CircuitBreaker):
+        self.upstream = upstream
+        self.url = url
+        self.breaker = breaker
+        self.healthy = True
+        self.in_flight = 0
+        self.last_error: Optional[str] = None
+        self.session_id: Optional[str] = None
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._next_id = 0
+        parts = urlsplit(url)
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+
+    def _id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def _headers(self, extra: Optional[dict]) -> dict:
+        headers = {"accept": "application/json, text/event-stream", "content-type": "application/json"}
+        if self.session_id:
+            headers["mcp-session-id"] = self.session_id
+        headers.update(extra or {})
+        return inject_context(headers)
+
+    async def _ensure_session(self, client: httpx.AsyncClient, headers: Optional[dict]) -> None:
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            self.session_id = None
+            response = await client.post(self.url, headers=self._headers(headers), content=json.dumps({
+                "jsonrpc": "2.0",
+                "id": self._id(),
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "matrx-mcp-gateway", "version": "1.0.0"},
+                },
+            }))
+            if response.status_code >= 400:
+                raise UpstreamError(f"initialize failed with HTTP {response.status_code}")
+            self.session_id = response.headers.get("mcp-session-id")
+            await client.post(
+                self.url,
+                headers=self._headers(headers),
+                content=json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}),
+            )
+            self._initialized = True
+
+    async def request(self, client: httpx.AsyncClient, method: str, params: dict, headers: Optional[dict]) -> dict:
+        """Send one JSON-RPC request, re-initializing once if the session expired."""
+        for attempt in range(2):
+            await self._ensure_session(client, headers)
+            response = await client.post(self.url, headers=self._headers(headers), content=json.dumps({
+                "jsonrpc": "2.0", "id": self._id(), "method": method, "params": params,
+            }))
+            # Streamable HTTP: 404 means the session is gone; some servers answer 400
+            if response.status_code in (400, 404) and self.session_id and attempt == 0:
+                self._initialized = False
+                continue
+            if response.status_code >= 500:
+                raise UpstreamError(f"HTTP {response.status_code} from {self.url}")
+            if response.status_code >= 400:
+                raise UpstreamToolError(f"HTTP {response.status_code}: {response.text[:200]}")
+            message = _parse_message(response)
+            if "error" in message:
+                raise UpstreamToolError(message["error"].get("message", "JSON-RPC error"))
+            return message["result"]
+        raise UpstreamError(f"Could not establish a session with {self.url}")
+
+    async def check_health(self, client: httpx.AsyncClient, timeout: float) -> bool:
+        try:
+            response = await client.get(f"{self.origin}/", timeout=timeout)
+            self.healthy = response.status_code < 500
+            self.last_error = None if self.healthy else f"health check returned HTTP {response.status_code}"
+        except httpx.HTTPError as e:
+            self.healthy = False
+            self.last_error = f"health check failed: {e!r}"
+        if not self.healthy:
+            # Force a fresh session once it recovers (it may have restarted)
+            self._initialized = False
+        UPSTREAM_HEALTHY.set(1 if self.healthy else 0, self.upstream, self.url)
+        return self.healthy
+
+    def status(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "circuit": self.breaker.state,
+            "in_flight": self.in_flight,
+            "last_error": self.last_error,
+        }
+
+
+class Upstream:
+    """A registered MCP server reachable through one or more endpoints."""
+
+    def __init__(
+        self,
+        slug: str,
+        urls: list[str],
+        client: httpx.AsyncClient,
+        auth_type: str = "none",
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.slug = slug
+        self.client = client
+        self.auth_type = auth_type
+        self.endpoints = [
+            Endpoint(slug, url, CircuitBreaker(failure_threshold, reset_timeout)) for url in urls
+        ]
+
+    @classmethod
+    def from_registry(cls, row: dict, client: httpx.AsyncClient, **kwargs) -> Optional["Upstream"]:
+        """Build an upstream from an `mcp_registry` row; None if it has no endpoint."""
+        urls = [row["endpoint_url"]] if row.get("endpoint_url") else []
+        urls += [u for u in (row.get("metadata") or {}).get("endpoints", []) if u not in urls]
+        if not urls:
+            return None
+        return cls(row["slug"], urls, client, row.get("auth_type") or "none", **kwargs)
+
+    def _credentials(self, caller_headers: dict) -> dict:
+        """Authorization header to send upstream."""
+        if self.auth_type == "supabase":
+            # User-scoped upstream: pass the caller's JWT through
+            auth = caller_headers.get("authorization")
+            return {"authorization": auth} if auth else {}
+        if self.auth_type == "apikey":
+            env_key = "GATEWAY_KEY_" + self.slug.upper().replace("-", "_")
+            key = os.environ.get(env_key) or os.environ.get("GATEWAY_UPSTREAM_API_KEY")
+            return {"authorization": f"Bearer {key}"} if key else {}
+        return {}
+
+    def _candidates(self) -> list[Endpoint]:
+        # Healthy endpoints first, least loaded first; unhealthy ones are a
+        # last resort since health checks lag behind recoveries.
+        return sorted(self.endpoints, key=lambda e: (not e.healthy, e.in_flight))
+
+    async def request(self, method: str, params: dict, caller_headers: Optional[dict] = None, idempotent: bool = False) -> dict:
+        """
+        Route a JSON-RPC request to the best available endpoint. Connection
+        failures fail over to the next endpoint; other failures fail over only
+        for idempotent requests, since the upstream may already have acted.
+        """
+        headers = self._credentials(caller_headers or {})
+        errors = []
+        for endpoint in self._candidates():
+            if not endpoint.breaker.allow():
+                errors.append(f"{endpoint.url}: circuit open")
+                continue
+            endpoint.in_flight += 1
+            start = time.perf_counter()
+            outcome_recorded = False
+            try:
+                with span("gateway.upstream", upstream=self.slug, endpoint=endpoint.url, method=method):
+                    result = await endpoint.request(self.client, method, params, headers)
+            except UpstreamToolError:
+                endpoint.breaker.record_success()  # The upstream is up; the request was bad
+                outcome_recorded = True
+                UPSTREAM_CALLS.inc(self.slug, method, "error")
+                raise
+            except (httpx.HTTPError, UpstreamError, ValueError) as e:
+                endpoint.breaker.record_failure()
+                outcome_recorded = True
+                endpoint.last_error = repr(e)
+                UPSTREAM_CALLS.inc(self.slug, method, "failure")
+                errors.append(f"{endpoint.url}: {e!r}")
+                if idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+                    continue
+                raise UpstreamError(f"{self.slug}: {e!r}") from e
+            else:
+                endpoint.breaker.record_success()
+                outcome_recorded = True
+                UPSTREAM_CALLS.inc(self.slug, method, "success")
+                return result
+            finally:
+                if not outcome_recorded:
+                    # Cancelled (e.g. the caller disconnected) mid-call: a half-open
+                    # breaker would otherwise wait forever for this trial's outcome
+                    endpoint.breaker.release()
+                endpoint.in_flight -= 1
+                UPSTREAM_LATENCY.observe(time.perf_counter() - start, self.slug, method)
+                CIRCUIT_OPEN.set(1 if endpoint.breaker.state == CircuitBreaker.OPEN else 0, self.slug, endpoint.url)
+        raise UpstreamError(f"{self.slug} unavailable: {'; '.join(errors) or 'no endpoints'}")
+
+    async def list_tools(self) -> list[dict]:
+        """All tools of the upstream, following pagination cursors."""
+        tools, cursor = [], None
+        while True:
+            params = {"cursor": cursor} if cursor else {}
+            result = await self.request("tools/list", params, idempotent=True)
+            tools.extend(result.get("tools", []))
+            cursor = result.get("nextCursor")
+            if not cursor:
+                return tools
+
+    async def check_health(self, timeout: float = 5.0) -> bool:
+        results = await asyncio.gather(*(e.check_health(self.client, timeout) for e in self.endpoints))
+        return any(results)
+
+    @property
+    def available(self) -> bool:
+        return any(e.healthy and e.breaker.state != CircuitBreaker.OPEN for e in self.endpoints)
+
+    def status(self) -> dict:
+        return {
+            "slug": self.slug,
+            "auth_type": self.auth_type,
+            "available": self.available,
+            "endpoints": [e.status() for e in self.endpoints],
+        }
@@ -16,6 +16,8 @@ DB="none"
 DESCRIPTION="An MCP server"
 SEPARATE_REPO=false
 AUTO_DEPLOY=false
+REGISTER=true
+OUTPUT_BASE=""
 NAME=""
 LANG=""
 TIER=""
@@ -60,6 +62,8 @@ Options:
   --description <desc>   MCP description (default: "An MCP server")
   --separate-repo        Initialize as a standalone git repo
   --deploy               Auto-deploy to VPS after scaffolding (VPS tier only)
+  --output-dir <dir>     Create the MCP in <dir>/<slug> instead of mcps/<slug>
+  --no-register          Skip registering the MCP in the registry
   --help                 Show this help message
 
 Examples:
@@ -120,6 +124,8 @@ while [[ $# -gt 0 ]]; do
         --description) DESCRIPTION="$2"; shift 2 ;;
         --separate-repo) SEPARATE_REPO=true; shift ;;
         --deploy) AUTO_DEPLOY=true; shift ;;
+        --output-dir) OUTPUT_BASE="$2"; shift 2 ;;
+        --no-register) REGISTER=false; shift ;;
         --help) usage ;;
         *) error "Unknown option: $1" ;;
     esac
@@ -147,7 +153,7 @@ if [[ "$LANG" == "python" && "$TIER" == "cloudflare" ]]; then
     echo -e "${YELLOW}  EXPERIMENTAL: Python + Cloudflare Workers${NC}"
     echo -e "${YELLOW}═══════════════════════════════════════════════════════════════════${NC}"
     echo ""
-    echo -e "  Cloudflare Python Workers with external packages (FastMCP, FastAPI)"
+    echo -e "  Cloudflare Python Workers with external packages (FastMCP)"
     echo -e "  are ${RED}not yet generally available${NC} on the Cloudflare platform."
     echo ""
     echo -e "  The template code is architecturally correct, but deployment will fail"
@@ -169,7 +175,7 @@ fi
 
 MCP_SLUG=$(slugify "$NAME")
 TEMPLATE_DIR="$TEMPLATES_DIR/${LANG}-${TIER}"
-OUTPUT_DIR="$REPO_ROOT/mcps/$MCP_SLUG"
+OUTPUT_DIR="${OUTPUT_BASE:-$REPO_ROOT/mcps}/$MCP_SLUG"
 
 [[ ! -d "$TEMPLATE_DIR" ]] && error "Template not found: $TEMPLATE_DIR"
 [[ -d "$OUTPUT_DIR" ]] && error "MCP already exists: $OUTPUT_DIR"
@@ -226,7 +232,7 @@ elif [[ "$AUTH" == "supabase" ]]; then
         # Add PyJWT to dependencies
         if [[ "$TIER" == "cloudflare" ]]; then
             # Python-CF uses pyproject.toml (no version specifiers in CF deps)
-            sed_i 's/"fastapi",/"fastapi",\n    "pyjwt",/' "$OUTPUT_DIR/pyproject.toml" 2>/dev/null || warn "Could not auto-add pyjwt to pyproject.toml"
+            sed_i 's/"fastmcp",/"fastmcp",\n    "pyjwt",/' "$OUTPUT_DIR/pyproject.toml" 2>/dev/null || warn "Could not auto-add pyjwt to pyproject.toml"
         else
             echo "PyJWT>=2.8.0" >> "$OUTPUT_DIR/requirements.txt"
         fi
@@ -259,7 +265,7 @@ if [[ "$DB" == "supabase" ]]; then
         cp "$REPO_ROOT/shared/python/supabase_client.py" "$OUTPUT_DIR/src/supabase_client.py"
         # Add supabase client dependency
         if [[ "$TIER" == "cloudflare" ]]; then
-            sed_i 's/"fastapi",/"fastapi",\n    "supabase",/' "$OUTPUT_DIR/pyproject.toml" 2>/dev/null || warn "Could not auto-add supabase to pyproject.toml"
+            sed_i 's/"fastmcp",/"fastmcp",\n    "supabase",/' "$OUTPUT_DIR/pyproject.toml" 2>/dev/null || warn "Could not auto-add supabase to pyproject.toml"
         else
             echo "supabase>=2.0.0" >> "$OUTPUT_DIR/requirements.txt"
         fi
@@ -327,13 +333,48 @@ fi
 
 # --- Logging Setup ---
 
-info "Adding structured logging..."
+info "Adding structured logging and tracing..."
 if [[ "$LANG" == "python" ]]; then
     cp "$REPO_ROOT/shared/python/logging_config.py" "$OUTPUT_DIR/src/logging_config.py"
+    cp "$REPO_ROOT/shared/python/tracing.py" "$OUTPUT_DIR/src/tracing.py"
+    cp "$REPO_ROOT/shared/python/instrumentation.py" "$OUTPUT_DIR/src/instrumentation.py"
 elif [[ "$LANG" == "typescript" ]]; then
     cp "$REPO_ROOT/shared/typescript/logging.ts" "$OUTPUT_DIR/src/logging.ts"
 fi
 
+# --- Metrics, Execution Pools, Admission Control, Response Cache, Compression, Request Limits, Hot Reload & Memory Profiling Setup ---
+
+if [[ "$LANG" == "python" && "$TIER" == "vps" ]]; then
+    info "Adding tool metrics (/metrics), execution pools, admission control, response cache, compression, request limits, hot reload and memory profiling..."
+    cp "$REPO_ROOT/shared/python/executors.py" "$OUTPUT_DIR/src/executors.py"
+    cp "$REPO_ROOT/shared/python/admission.py" "$OUTPUT_DIR/src/admission.py"
+    cp "$REPO_ROOT/shared/python/jsonrpc_envelope.py" "$OUTPUT_DIR/src/jsonrpc_envelope.py"
+    cp "$REPO_ROOT/shared/python/tool_cache.py" "$OUTPUT_DIR/src/tool_cache.py"
+    cp "$REPO_ROOT/shared/python/metrics.py" "$OUTPUT_DIR/src/metrics.py"
+    cp "$REPO_ROOT/shared/python/compression.py" "$OUTPUT_DIR/src/compression.py"
+    cp "$REPO_ROOT/shared/python/json_codec.py" "$OUTPUT_DIR/src/json_codec.py"
+    cp "$REPO_ROOT/shared/python/request_limits.py" "$OUTPUT_DIR/src/request_limits.py"
+    cp "$REPO_ROOT/shared/python/hot_reload.py" "$OUTPUT_DIR/src/hot_reload.py"
+    cp "$REPO_ROOT/shared/python/memory_profiler.py" "$OUTPUT_DIR/src/memory_profiler.py"
+    # /admin/memory checks MCP_API_KEYS through auth.py, whatever --auth was chosen
+    [[ -f "$OUTPUT_DIR/src/auth.py" ]] || cp "$REPO_ROOT/shared/python/auth.py" "$OUTPUT_DIR/src/auth.py"
+fi
+
+# --- Lazy Tools & Startup Budget (Python + Cloudflare) ---
+
+if [[ "$LANG" == "python" && "$TIER" == "cloudflare" ]]; then
+    info "Adding lazy tool registration..."
+    cp "$REPO_ROOT/shared/python/lazy_tools.py" "$OUTPUT_DIR/src/lazy_tools.py"
+
+    # Verify the startup budget when the dependencies are importable locally
+    if python3 -c "import fastmcp" >/dev/null 2>&1; then
+        info "Checking cold-start budget..."
+        python3 "$OUTPUT_DIR/scripts/profile_startup.py" --runs 1 || warn "Startup budget check failed (see report above)"
+    else
+        warn "Skipping startup budget check (fastmcp not installed). Run later: uv run python scripts/profile_startup.py"
+    fi
+fi
+
 # --- VPS Deploy Script ---
 
 if [[ "$TIER" == "vps" ]]; then
@@ -374,7 +415,7 @@ fi
 # --- Register in MCP Registry ---
 
 REGISTER_SCRIPT="$REPO_ROOT/scripts/register-mcp.sh"
-if [[ -x "$REGISTER_SCRIPT" ]]; then
+if [[ "$REGISTER" == true && -x "$REGISTER_SCRIPT" ]]; then
     REGISTER_ARGS=(--name "$NAME" --slug "$MCP_SLUG" --lang "$LANG" --tier "$TIER" --auth "$AUTH" --db "$DB" --description "$DESCRIPTION")
     [[ "$SEPARATE_REPO" == true ]] && REGISTER_ARGS+=(--separate-repo)
     "$REGISTER_SCRIPT" "${REGISTER_ARGS[@]}" || true
@@ -8,6 +8,7 @@ set -euo pipefail
 # Usage:
 #   ./deploy-vps.sh              # Redeploy (build + push + restart)
 #   ./deploy-vps.sh --create     # First-time deploy (creates Coolify app)
+#   ./deploy-vps.sh --hot        # Push src/tools into the running container (TOOLS_RELOAD=watch)
 #   ./deploy-vps.sh --status     # Check deployment status
 #   ./deploy-vps.sh --logs       # Tail container logs
 # ============================================================================
@@ -184,6 +185,25 @@ restart_app() {
     info "Restart triggered. Coolify is pulling the latest image and restarting."
 }
 
+# --- Hot Reload (Tools Only) ---
+
+hot_reload_tools() {
+    # Copies src/tools into the running container; with TOOLS_RELOAD=watch each
+    # worker re-imports them without a restart. The image is rebuilt as well so
+    # a later restart starts from the same code. The copy goes to a fresh
+    # directory that replaces src/tools, so deleted files are gone too.
+    info "Copying src/tools into the running container..."
+    ssh "${VPS_USER}@${VPS_IP}" << HOTEOF
+set -e
+CONTAINER=\$(docker ps -q -f "name=^${MCP_SLUG}\$" | head -1)
+[ -n "\$CONTAINER" ] || { echo "No running container named ${MCP_SLUG}"; exit 1; }
+docker exec "\$CONTAINER" rm -rf /app/src/tools.new /app/src/tools.old
+docker cp ${VPS_MCP_DIR}/src/tools "\$CONTAINER":/app/src/tools.new
+docker exec "\$CONTAINER" sh -c 'mv /app/src/tools /app/src/tools.old && mv /app/src/tools.new /app/src/tools && rm -rf /app/src/tools.old'
+HOTEOF
+    info "Tools copied. Workers pick them up within TOOLS_RELOAD_INTERVAL seconds."
+}
+
 # --- Status Check ---
 
 check_status() {
@@ -215,7 +235,7 @@ tail_logs() {
     [[ -z "$COOLIFY_APP_UUID" ]] && error "No Coolify app UUID found. Run with --create first."
 
     info "Fetching container logs from VPS..."
-    ssh "${VPS_USER}@${VPS_IP}" "docker logs \$(docker ps -q -f name=${MCP_SLUG} | head -1) --tail 100 2>&1" || warn "Could not find running container for ${MCP_SLUG}"
+    ssh "${VPS_USER}@${VPS_IP}" "docker logs \$(docker ps -q -f 'name=^${MCP_SLUG}\$' | head -1) --tail 100 2>&1" || warn "Could not find running container for ${MCP_SLUG}"
 }
 
 # --- Main ---
@@ -239,6 +259,16 @@ case "$ACTION" in
     --status)
         check_status
         ;;
+    --hot)
+        check_prerequisites
+        sync_to_vps
+        build_and_push
+        hot_reload_tools
+        echo ""
+        echo -e "${GREEN}Hot reload complete!${NC}"
+        echo "Check the reload in the logs:"
+        echo "  ./deploy-vps.sh --logs"
+        ;;
     --logs)
         tail_logs
         ;;
@@ -261,6 +291,7 @@ case "$ACTION" in
         echo "Usage:"
         echo "  ./deploy-vps.sh              Redeploy (sync + build + push + restart)"
         echo "  ./deploy-vps.sh --create     First-time deploy (creates Coolify app)"
+        echo "  ./deploy-vps.sh --hot        Sync + build + push, then reload src/tools in place (no restart)"
         echo "  ./deploy-vps.sh --status     Check deployment status and health"
         echo "  ./deploy-vps.sh --logs       Tail container logs"
         echo ""
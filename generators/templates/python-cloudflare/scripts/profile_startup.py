@@ -0,0 +1,139 @@
+"""
+Startup profiler for the Worker's app module.
+
+Imports the app in fresh interpreters with `-X importtime`, reports the
+slowest packages, checks that tool implementation modules were not
+imported eagerly, verifies lazy tool stubs against their implementations,
+and fails if the median import time exceeds the budget.
+
+    python scripts/profile_startup.py [--runs 3] [--top 15] [--json startup.json]
+
+Defaults come from [tool.mcp-startup] in pyproject.toml (module, budget_ms).
+Exit status is 1 if the budget is exceeded or a stub is out of date.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tomllib
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+_MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import {module} as app_module
+elapsed_ms = (time.perf_counter() - start) * 1000
+tool_modules = sorted(name for name in sys.modules if name.startswith("tools."))
+print(json.dumps({{"elapsed_ms": elapsed_ms, "tool_modules": tool_modules}}))
+"""
+
+_VERIFY = """
+import json
+import {module} as app_module
+lazy = getattr(app_module, "lazy_tools", None)
+print(json.dumps(lazy.verify() if lazy is not None else []))
+"""
+
+
+def _load_config() -> dict:
+    pyproject = PROJECT_DIR / "pyproject.toml"
+    if not pyproject.exists():
+        return {}
+    with open(pyproject, "rb") as f:
+        return tomllib.load(f).get("tool", {}).get("mcp-startup", {})
+
+
+def _run(code: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    src = PROJECT_DIR / "src"
+    env = {**os.environ, "PYTHONPATH": str(src), "PYTHONDONTWRITEBYTECODE": "1"}
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(command, cwd=src, env=env, capture_output=True, text=True)
+
+
+def _parse_importtime(stderr: str) -> dict[str, int]:
+    """Sum self time (µs) per top-level package from `-X importtime` output."""
+    totals: dict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        package = fields[2].strip().split(".")[0]
+        totals[package] += int(fields[0])
+    return totals
+
+
+def main() -> int:
+    config = _load_config()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default=config.get("module", "app"))
+    parser.add_argument("--budget-ms", type=float, default=float(config.get("budget_ms", 2500)))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", dest="json_path", help="Write the report to this file")
+    args = parser.parse_args()
+
+    timings = []
+    packages: dict[str, int] = {}
+    tool_modules: list[str] = []
+    for _ in range(args.runs):
+        result = _run(_MEASURE.format(module=args.module), importtime=True)
+        if result.returncode != 0:
+            print(result.stderr, file=sys.stderr)
+            print(f"Failed to import {args.module}", file=sys.stderr)
+            return 1
+        measurement = json.loads(result.stdout.strip().splitlines()[-1])
+        timings.append(measurement["elapsed_ms"])
+        tool_modules = measurement["tool_modules"]
+        packages = _parse_importtime(result.stderr)
+
+    verify = _run(_VERIFY.format(module=args.module))
+    problems = json.loads(verify.stdout.strip().splitlines()[-1]) if verify.returncode == 0 else [verify.stderr.strip()]
+
+    median_ms = statistics.median(timings)
+    top = sorted(packages.items(), key=lambda item: item[1], reverse=True)[: args.top]
+
+    print(f"Startup: {median_ms:.0f} ms median over {args.runs} run(s) (budget {args.budget_ms:.0f} ms)")
+    print()
+    print(f"{'package':<32} {'self ms':>10}")
+    for package, micros in top:
+        print(f"{package:<32} {micros / 1000:>10.1f}")
+    print()
+    if tool_modules:
+        print(f"Tool modules imported at startup: {', '.join(tool_modules)}")
+    else:
+        print("Tool modules imported at startup: none (all lazy)")
+    for problem in problems:
+        print(f"Stub mismatch: {problem}")
+
+    report = {
+        "module": args.module,
+        "median_ms": median_ms,
+        "runs_ms": timings,
+        "budget_ms": args.budget_ms,
+        "within_budget": median_ms <= args.budget_ms,
+        "packages_ms": {package: micros / 1000 for package, micros in top},
+        "eager_tool_modules": tool_modules,
+        "stub_problems": problems,
+    }
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if problems:
+        return 1
+    if median_ms > args.budget_ms:
+        print(f"\nOver budget by {median_ms - args.budget_ms:.0f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
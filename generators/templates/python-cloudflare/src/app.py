@@ -0,0 +1,44 @@
+"""
+ASGI app for the MCP server, kept free of Workers-only imports so it can be
+imported (and startup-profiled) outside the Cloudflare runtime.
+"""
+
+from fastmcp import FastMCP
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+from tools import register_tools
+
+# Create MCP server
+mcp = FastMCP(
+    name="{{MCP_NAME}}",
+    instructions="{{MCP_DESCRIPTION}}"
+)
+
+# Tool schemas are registered now; implementation modules import on first call
+lazy_tools = register_tools(mcp)
+
+# Create MCP ASGI app mounted at root (we'll mount it at /mcp below)
+mcp_app = mcp.http_app(path="/")
+
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({
+        "name": "{{MCP_NAME}}",
+        "version": "1.0.0",
+        "mcp_endpoint": "/mcp",
+        "status": "running",
+    })
+
+
+# Plain Starlette (already a FastMCP dependency) instead of FastAPI keeps the
+# import graph small. The MCP lifespan is required for session management.
+app = Starlette(
+    routes=[
+        Route("/", endpoint=health, methods=["GET"]),
+        Mount("/mcp", app=mcp_app),
+    ],
+    lifespan=mcp_app.lifespan,
+)
@@ -1,4 +1,20 @@
+from lazy_tools import LazyTools
+
+
 def register_tools(mcp):
-    """Import and register all tool modules."""
-    from .example_tools import register
-    register(mcp)
+    """Declare all tool schemas. Each implementation module is imported on first call.
+
+    Stubs only carry the signature and docstring the MCP client sees; the
+    function of the same name in the named module does the work.
+    """
+    tools = LazyTools(mcp, __name__)
+
+    @tools.tool("example_tools")
+    def hello(name: str) -> str:
+        """Say hello to someone."""
+
+    @tools.tool("example_tools")
+    def add(a: int, b: int) -> int:
+        """Add two numbers together."""
+
+    return tools
@@ -0,0 +1,76 @@
+"""
+Production entry point: runs server:app under multiple uvicorn workers.
+
+    python -m serve
+
+Workers share the listening socket, so throughput scales with cores.
+uvloop and httptools are used when installed (`uvicorn[standard]`).
+
+Signals (sent to the supervisor process):
+    SIGTERM / SIGINT   Stop accepting connections, drain in-flight requests
+                       for up to GRACEFUL_TIMEOUT seconds, then exit
+    SIGHUP             Rolling restart: workers are replaced one at a time
+    SIGTTIN / SIGTTOU  Add / remove a worker
+
+MCP sessions live in the worker that created them. With more than one
+worker and no sticky routing in front, the MCP endpoint runs in stateless
+HTTP mode so any worker can answer any request. Set MCP_STICKY_SESSIONS=true
+if the proxy pins each Mcp-Session-Id to one worker.
+
+Configuration:
+    HOST, PORT            Bind address (default: 0.0.0.0:8000)
+    WORKERS               Worker processes (default: cpu count)
+    GRACEFUL_TIMEOUT      Drain timeout on shutdown, seconds (default: 30)
+    KEEPALIVE_TIMEOUT     Idle keep-alive timeout, seconds (default: 5)
+    MAX_REQUESTS          Recycle a worker after N requests (default: off)
+    MCP_STICKY_SESSIONS   Keep stateful MCP sessions with multiple workers
+"""
+
+import importlib.util
+import os
+
+import uvicorn
+
+
+def _env_int(key: str, default: int) -> int:
+    value = os.environ.get(key)
+    return int(value) if value else default
+
+
+def _env_flag(key: str) -> bool:
+    return os.environ.get(key, "").lower() in ("1", "true", "yes")
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    workers = max(1, _env_int("WORKERS", cpus))
+    max_requests = _env_int("MAX_REQUESTS", 0)
+
+    if workers > 1:
+        # Workers inherit the environment, so these apply to each of them
+        if not _env_flag("MCP_STICKY_SESSIONS"):
+            os.environ.setdefault("MCP_STATELESS_HTTP", "true")
+        # Split the cores between workers instead of giving each a full-size process pool
+        os.environ.setdefault("PROCESS_POOL_SIZE", str(max(1, cpus // workers)))
+
+    uvicorn.run(
+        "server:app",
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=_env_int("PORT", 8000),
+        workers=workers,
+        loop="uvloop" if _available("uvloop") else "asyncio",
+        http="httptools" if _available("httptools") else "h11",
+        timeout_graceful_shutdown=_env_int("GRACEFUL_TIMEOUT", 30),
+        timeout_keep_alive=_env_int("KEEPALIVE_TIMEOUT", 5),
+        limit_max_requests=max_requests or None,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+    )
+
+
+if __name__ == "__main__":
+    main()
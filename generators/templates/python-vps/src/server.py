@@ -5,16 +5,52 @@ from starlette.applications import Starlette
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 from starlette.routing import Route, Mount
+from admission import TOOL_ADMISSION, AdmissionMiddleware, admission_wrapper
+from compression import CompressionMiddleware
+from executors import execution_wrapper, reload_worker_code
+from hot_reload import ToolReloader
+from instrumentation import instrument
+from json_codec import tool_serializer
+from memory_profiler import memory_routes, memory_wrapper, start_from_env as start_memory_profiling
+from metrics import metrics_endpoint, metrics_wrapper
+from request_limits import TOOL_LIMITS, RequestLimitMiddleware, request_limits_wrapper
+from tool_cache import cache_wrapper
+from tracing import TracingMiddleware, configure_tracing_from_env, tracing_wrapper
 from tools import register_tools
 
+# MEMORY_PROFILING=true: trace allocations from here on and serve /admin/memory
+start_memory_profiling()
+
 MCP_NAME = os.environ.get("MCP_NAME", "{{MCP_NAME}}")
 
 mcp = FastMCP(
     name=MCP_NAME,
-    instructions="{{MCP_DESCRIPTION}}"
+    instructions="{{MCP_DESCRIPTION}}",
+    # orjson-backed, compact serialization of non-string tool results
+    tool_serializer=tool_serializer,
+    # Hot reload replaces tools in place
+    on_duplicate_tools="replace",
 )
 
-register_tools(mcp)
+configure_tracing_from_env()
+
+# Dispatch tools to their declared thread/process pool and stop them at their
+# deadline or when the client goes away, serve @cached tools from the
+# response cache, then wrap everything with tracing spans and per-call
+# metrics (served on /metrics). The outermost wrapper swaps spooled argument
+# tokens for their content and records each tool's @body_limit. The memory
+# profiler only notes where each tool's code lives, to attribute allocations.
+tools = instrument(
+    mcp, execution_wrapper, admission_wrapper, cache_wrapper, tracing_wrapper, metrics_wrapper,
+    request_limits_wrapper, memory_wrapper,
+)
+register_tools(tools)
+
+# TOOLS_RELOAD=watch: re-import src/tools on change and swap the tool table in place
+ToolReloader(
+    tools, "tools", on_reload=[reload_worker_code], registries=[TOOL_ADMISSION, TOOL_LIMITS],
+    tool_serializer=tool_serializer,
+).start_from_env()
 
 
 async def health(request: Request) -> JSONResponse:
@@ -26,19 +62,33 @@ async def health(request: Request) -> JSONResponse:
     })
 
 
-# Get FastMCP's ASGI app with /mcp path built-in
-mcp_app = mcp.http_app(path="/mcp")
+# Get FastMCP's ASGI app with /mcp path built-in. Stateless mode lets any
+# worker answer any request when serve.py runs several of them.
+mcp_app = mcp.http_app(
+    path="/mcp",
+    stateless_http=os.environ.get("MCP_STATELESS_HTTP", "").lower() in ("1", "true", "yes"),
+)
 
 app = Starlette(
     routes=[
         Route("/", endpoint=health, methods=["GET"]),
         Route("/health", endpoint=health, methods=["GET"]),
+        Route("/metrics", endpoint=metrics_endpoint, methods=["GET"]),
+        # API-key protected; empty unless MEMORY_PROFILING is set
+        *memory_routes(),
     ],
     lifespan=mcp_app.lifespan,
 )
 
 # Mount at root so /mcp path is handled by FastMCP directly
 app.mount("/", mcp_app)
+# Bounded global/per-tool queues for tool calls: JSON-RPC error + Retry-After when full
+app.add_middleware(AdmissionMiddleware)
+# 413 for bodies over REQUEST_MAX_BYTES / @body_limit; large arguments spool to disk
+app.add_middleware(RequestLimitMiddleware)
+# Negotiated zstd/br/gzip for responses over COMPRESSION_MIN_SIZE bytes
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(TracingMiddleware)
 
 if __name__ == "__main__":
     host = os.environ.get("HOST", "0.0.0.0")
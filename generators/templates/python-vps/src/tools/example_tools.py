@@ -1,3 +1,9 @@
+from admission import admission
+from executors import execution
+from request_limits import body_limit, open_arg, spooled
+from tool_cache import cached
+
+
 def register(mcp):
     @mcp.tool
     def hello(name: str) -> str:
@@ -8,3 +14,33 @@ def register(mcp):
     def add(a: int, b: int) -> int:
         """Add two numbers together."""
         return a + b
+
+    # CPU-heavy tools can run in the process pool (or "thread" for blocking I/O).
+    # Process-pool tools must take and return picklable (JSON-like) values.
+    # At most 4 run at once (16 more may queue), each for up to 60 seconds,
+    # and results are cached for an hour.
+    @mcp.tool
+    @cached(ttl=3600)
+    @admission(max_concurrent=4, queue=16, timeout=60)
+    @execution("process")
+    def count_primes(limit: int) -> int:
+        """Count the prime numbers below a limit."""
+        sieve = bytearray([1]) * max(limit, 2)
+        sieve[0:2] = b"\x00\x00"
+        for i in range(2, int(limit ** 0.5) + 1):
+            if sieve[i]:
+                sieve[i * i::i] = bytearray(len(range(i * i, limit, i)))
+        return sum(sieve[:limit])
+
+    # Large uploads: up to 64MB per call, streamed from disk instead of memory
+    @mcp.tool
+    @body_limit("64MB")
+    @spooled("text")
+    @execution("thread")
+    def count_lines(text: str) -> int:
+        """Count the lines in a text."""
+        lines = 0
+        with open_arg(text) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                lines += chunk.count(b"\n")
+        return lines
@@ -3,11 +3,13 @@ set -euo pipefail
 
 # ============================================================================
 # List all MCPs from the registry
-# Usage: ./scripts/list-mcps.sh [--status active] [--tier cloudflare]
+# Usage: ./scripts/list-mcps.sh [--status active] [--tier cloudflare] [--json] [--refresh]
+# Lookups are served from a local snapshot that is refreshed incrementally.
 # ============================================================================
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 REPO_ROOT="$(dirname "$SCRIPT_DIR")"
+REGISTRY_CLIENT="$REPO_ROOT/shared/python/registry_client.py"
 
 # --- Colors ---
 RED='\033[0;31m'
@@ -24,33 +26,34 @@ if [[ -f "$REPO_ROOT/.env" ]]; then
 fi
 
 # --- Validate ---
+# Without credentials, fall back to the local snapshot (see shared/python/registry_client.py)
+OFFLINE=""
 if [[ -z "${SUPABASE_URL:-}" || -z "${SUPABASE_SERVICE_ROLE_KEY:-}" ]]; then
-    echo -e "${RED}Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set.${NC}"
-    exit 1
+    if [[ ! -f "${MCP_REGISTRY_CACHE:-$HOME/.cache/matrx-mcp/registry.db}" ]]; then
+        echo -e "${RED}Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set.${NC}"
+        exit 1
+    fi
+    echo -e "${YELLOW}Supabase credentials not set — showing the local registry snapshot.${NC}"
+    OFFLINE="--offline"
 fi
 
 # --- Parse filters ---
-FILTERS=""
+FILTERS=()
 
 while [[ $# -gt 0 ]]; do
     case $1 in
-        --status) FILTERS="${FILTERS}&status=eq.$2"; shift 2 ;;
-        --tier) FILTERS="${FILTERS}&tier=eq.$2"; shift 2 ;;
-        --lang) FILTERS="${FILTERS}&language=eq.$2"; shift 2 ;;
+        --status) FILTERS+=(--status "$2"); shift 2 ;;
+        --tier) FILTERS+=(--tier "$2"); shift 2 ;;
+        --lang) FILTERS+=(--lang "$2"); shift 2 ;;
         --json) JSON_OUTPUT=true; shift ;;
+        --refresh) python3 "$REGISTRY_CLIENT" refresh --full >/dev/null || true; shift ;;
         *) echo -e "${RED}Unknown option: $1${NC}" >&2; exit 1 ;;
     esac
 done
 
-# --- Query Supabase ---
-RESPONSE=$(curl -s \
-    "${SUPABASE_URL}/rest/v1/mcp_registry?select=name,slug,language,tier,auth_type,status,endpoint_url,created_at${FILTERS}&order=created_at.desc" \
-    -H "apikey: ${SUPABASE_SERVICE_ROLE_KEY}" \
-    -H "Authorization: Bearer ${SUPABASE_SERVICE_ROLE_KEY}" \
-    2>/dev/null)
-
+# --- Query the registry (local snapshot, refreshed incrementally when stale) ---
 if [[ "${JSON_OUTPUT:-false}" == "true" ]]; then
-    echo "$RESPONSE" | python3 -m json.tool 2>/dev/null || echo "$RESPONSE"
+    python3 "$REGISTRY_CLIENT" list ${OFFLINE} ${FILTERS[@]+"${FILTERS[@]}"} --json
     exit 0
 fi
 
@@ -61,15 +64,6 @@ echo "━━━━━━━━━━━━━━━━━━━━━━━━
 printf "%-25s %-12s %-12s %-10s %-10s %s\n" "NAME" "LANGUAGE" "TIER" "AUTH" "STATUS" "ENDPOINT"
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
 
-echo "$RESPONSE" | python3 -c "
-import json, sys
-data = json.load(sys.stdin)
-if not data:
-    print('  No MCPs found.')
-else:
-    for mcp in data:
-        endpoint = mcp.get('endpoint_url') or '-'
-        print(f\"  {mcp['name']:<23} {mcp['language']:<10} {mcp['tier']:<10} {mcp['auth_type']:<8} {mcp['status']:<8} {endpoint}\")
-" 2>/dev/null || echo "  Error parsing response. Try --json flag."
+python3 "$REGISTRY_CLIENT" list ${OFFLINE} ${FILTERS[@]+"${FILTERS[@]}"}
 
 echo ""
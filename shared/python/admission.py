@@ -0,0 +1,597 @@
+"""
+Admission control, load shedding and request deadlines for tool calls.
+
+`AdmissionMiddleware` admits each `tools/call` through two bounded queues:
+one global, and one per tool for tools that declare `@admission(...)`. The
+tool name is read from the first bytes of the request body. When a queue is
+full, or a call has waited `ADMISSION_QUEUE_TIMEOUT` seconds, the request is
+shed with a JSON-RPC error for its request id (`OVERLOADED`) and a
+`Retry-After` estimated from the queue length and recent call durations.
+The HTTP status is 200: MCP clients fail non-2xx responses outside the
+pending call, which then hangs until the client's own timeout. Shed calls
+are never parsed or run.
+
+Clients can bound a call with `X-Request-Timeout: <seconds>` or
+`X-Request-Deadline: <unix time>`. The effective deadline is the earliest of
+that, the tool's own `timeout` and `ADMISSION_DEFAULT_TIMEOUT`. A call whose
+deadline passes while it is queued gets `DEADLINE_EXCEEDED`. A call whose
+client disconnects while it is queued gives up its place and is never run.
+
+`admission_wrapper` stops a running tool when its deadline passes or the
+client disconnects. MCP `notifications/cancelled` does the same. Async tools
+are cancelled. Calls waiting for a pool are dropped from its queue. Calls
+already running in a process worker are interrupted there. Thread-pool and
+inline tools cannot be interrupted from outside, but can stop early by
+calling `check_cancelled()` in their loops.
+
+Usage:
+    from admission import admission, check_cancelled
+
+    @mcp.tool()
+    @admission(max_concurrent=4, queue=16, timeout=120)
+    @execution("process")
+    def extract_text_from_pdf(pdf_base64: str) -> dict:
+        ...
+
+Configuration:
+    ADMISSION_MAX_CONCURRENT    Tool calls running at once, all tools (default: 64)
+    ADMISSION_QUEUE             Tool calls allowed to wait for a slot (default: 256)
+    ADMISSION_QUEUE_TIMEOUT     Longest wait for a slot before shedding, in seconds (default: 30)
+    ADMISSION_DEFAULT_TIMEOUT   Deadline for every tool call, in seconds (default: 0 = none)
+"""
+
+import asyncio
+import collections
+import contextvars
+import inspect
+import math
+import os
+import threading
+import time
+from functools import wraps
+from typing import Callable, Optional
+
+from jsonrpc_envelope import EnvelopeSniffer, jsonrpc_error, request_id_of
+from metrics import REGISTRY
+
+_ADMISSION_ATTR = "__mcp_admission__"
+
+# Per-tool admission settings by registered tool name, filled in by admission_wrapper
+TOOL_ADMISSION: dict[str, dict] = {}
+
+# JSON-RPC error codes (implementation-defined server error range) for shed calls
+OVERLOADED = -32000
+DEADLINE_EXCEEDED = -32001
+
+# Keys in the ASGI scope state shared between the middleware and the wrapper
+_DEADLINE_KEY = "mcp_deadline"
+_DISCONNECTED_KEY = "mcp_disconnected"
+
+ADMISSION_ACTIVE = REGISTRY.gauge(
+    "mcp_admission_active",
+    "Tool calls holding an admission slot, by limiter (global or tool name).",
+    ("limiter",),
+)
+ADMISSION_QUEUED = REGISTRY.gauge(
+    "mcp_admission_queued",
+    "Tool calls waiting for an admission slot, by limiter.",
+    ("limiter",),
+)
+ADMISSION_REJECTED = REGISTRY.counter(
+    "mcp_admission_rejected_total",
+    "Tool calls shed before running, by reason (queue_full, queue_timeout, deadline, disconnected).",
+    ("tool", "reason"),
+)
+TOOL_CANCELLED = REGISTRY.counter(
+    "mcp_tool_cancelled_total",
+    "Running tool calls stopped early, by reason (deadline, disconnected, cancelled).",
+    ("tool", "reason"),
+)
+
+
+class OverloadedError(RuntimeError):
+    """Raised when a call cannot be admitted; `retry_after` is a hint in seconds."""
+
+    def __init__(self, message: str, retry_after: int, reason: str):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class ToolCancelledError(RuntimeError):
+    """Raised when a tool call is abandoned by its client."""
+
+
+class DeadlineExceededError(ToolCancelledError, TimeoutError):
+    """Raised when a tool call runs past its deadline."""
+
+
+def admission(max_concurrent: Optional[int] = None, queue: Optional[int] = None, timeout: Optional[float] = None):
+    """
+    Declare admission limits for a tool. Place directly below `@mcp.tool()`.
+
+    max_concurrent  Calls of this tool running at once (default: global limit only)
+    queue           Calls of this tool allowed to wait (default: same as max_concurrent)
+    timeout         Deadline for each call, in seconds
+    """
+
+    def decorator(func: Callable) -> Callable:
+        setattr(func, _ADMISSION_ATTR, {"max_concurrent": max_concurrent, "queue": queue, "timeout": timeout})
+        return func
+
+    return decorator
+
+
+def _env_float(key: str, default: float) -> float:
+    value = os.environ.get(key)
+    return float(value) if value else default
+
+
+# --- Current call ---
+
+
+class _CallState:
+    __slots__ = ("deadline", "cancelled")
+
+    def __init__(self, deadline: Optional[float]):
+        self.deadline = deadline  # time.monotonic() value
+        # Set from the event loop, read from pool threads
+        self.cancelled = threading.Event()
+
+
+_CURRENT: contextvars.ContextVar[Optional[_CallState]] = contextvars.ContextVar("mcp_admission_call", default=None)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current tool call's deadline, or None if it has none."""
+    call = _CURRENT.get()
+    if call is None or call.deadline is None:
+        return None
+    return call.deadline - time.monotonic()
+
+
+def check_cancelled() -> None:
+    """Raise if the current tool call was abandoned or is past its deadline. Safe in pool threads."""
+    call = _CURRENT.get()
+    if call is None:
+        return
+    if call.cancelled.is_set():
+        raise ToolCancelledError("Tool call was cancelled")
+    if call.deadline is not None and time.monotonic() >= call.deadline:
+        raise DeadlineExceededError("Tool call deadline exceeded")
+
+
+# --- Limiters ---
+
+
+class _Limiter:
+    """A concurrency limit with a bounded FIFO queue, for use on the event loop."""
+
+    def __init__(self, name: str, max_concurrent: int, queue: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.queue = queue
+        self.active = 0
+        self._waiters: collections.deque[asyncio.Future] = collections.deque()
+        self._avg_duration = 1.0  # EWMA, seconds
+
+    def retry_after(self) -> int:
+        """Rough seconds until a new call would get a slot."""
+        backlog = len(self._waiters) + 1
+        return max(1, math.ceil(backlog * self._avg_duration / self.max_concurrent))
+
+    def has_room(self) -> bool:
+        return self.active < self.max_concurrent and not self._waiters
+
+    async def acquire(self, timeout: Optional[float]) -> None:
+        if self.has_room():
+            self._take()
+            return
+        if len(self._waiters) >= self.queue:
+            raise OverloadedError(
+                f"{self.name} queue is full ({len(self._waiters)} waiting); retry later",
+                self.retry_after(),
+                "queue_full",
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUED.inc(self.name)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended: pass it on
+                self.release(0.0)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise OverloadedError(
+                    f"Timed out waiting for a {self.name} slot; retry later", self.retry_after(), "queue_timeout"
+                ) from None
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            ADMISSION_QUEUED.dec(self.name)
+
+    def _take(self) -> None:
+        self.active += 1
+        ADMISSION_ACTIVE.inc(self.name)
+
+    def release(self, duration: float) -> None:
+        if duration:
+            self._avg_duration += 0.2 * (duration - self._avg_duration)
+        self.active -= 1
+        ADMISSION_ACTIVE.dec(self.name)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._take()
+                waiter.set_result(None)
+                return
+
+    def stats(self) -> dict:
+        return {"max_concurrent": self.max_concurrent, "queue": self.queue,
+                "active": self.active, "queued": len(self._waiters)}
+
+
+class _Permit:
+    """Slots held by one admitted call."""
+
+    __slots__ = ("limiters", "start")
+
+    def __init__(self, limiters: list):
+        self.limiters = limiters
+        self.start = time.monotonic()
+
+    def release(self) -> None:
+        duration = time.monotonic() - self.start
+        for limiter in reversed(self.limiters):
+            limiter.release(duration)
+
+
+class AdmissionController:
+    """The global limiter plus one limiter per tool declared with `@admission(max_concurrent=...)`."""
+
+    def __init__(self, max_concurrent: Optional[int] = None, queue: Optional[int] = None,
+                 queue_timeout: Optional[float] = None):
+        self.global_limiter = _Limiter(
+            "global",
+            max_concurrent or int(_env_float("ADMISSION_MAX_CONCURRENT", 64)),
+            queue if queue is not None else int(_env_float("ADMISSION_QUEUE", 256)),
+        )
+        self.queue_timeout = queue_timeout if queue_timeout is not None else _env_float("ADMISSION_QUEUE_TIMEOUT", 30)
+        self._tools: dict[str, _Limiter] = {}
+        self._configs: dict[str, dict] = {}
+
+    def _tool_limiter(self, tool_name: str) -> Optional[_Limiter]:
+        config = TOOL_ADMISSION.get(tool_name)
+        limiter = self._tools.get(tool_name)
+        if limiter is not None and self._configs.get(tool_name) is config:
+            return limiter
+        # First call, or the tool was re-registered with new settings (hot reload).
+        # Calls holding the old limiter release into it.
+        if not config or not config.get("max_concurrent"):
+            self._tools.pop(tool_name, None)
+            return None
+        max_concurrent = config["max_concurrent"]
+        queue = config["queue"] if config.get("queue") is not None else max_concurrent
+        limiter = self._tools[tool_name] = _Limiter(tool_name, max_concurrent, queue)
+        self._configs[tool_name] = config
+        return limiter
+
+    def _limiters(self, tool_name: str) -> list:
+        return [limiter for limiter in (self._tool_limiter(tool_name), self.global_limiter) if limiter]
+
+    def try_admit(self, tool_name: str, deadline: Optional[float] = None) -> Optional[_Permit]:
+        """Take free slots without waiting, or return None if the call would queue (or is past its deadline)."""
+        if deadline is not None and deadline <= time.monotonic():
+            return None
+        limiters = self._limiters(tool_name)
+        if not all(limiter.has_room() for limiter in limiters):
+            return None
+        for limiter in limiters:
+            limiter._take()
+        return _Permit(limiters)
+
+    async def admit(self, tool_name: str, deadline: Optional[float] = None) -> _Permit:
+        """Wait for a tool slot, then a global slot. Raises OverloadedError when shedding."""
+        timeout = self.queue_timeout or None
+        if deadline is not None:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise OverloadedError("Deadline passed before the call was admitted", 1, "deadline")
+            timeout = left if timeout is None else min(timeout, left)
+
+        limiters = self._limiters(tool_name)
+        held = []
+        try:
+            for limiter in limiters:
+                started = time.monotonic()
+                await limiter.acquire(timeout)
+                held.append(limiter)
+                if timeout is not None:
+                    timeout = max(0.0, timeout - (time.monotonic() - started))
+        except OverloadedError as exc:
+            for limiter in reversed(held):
+                limiter.release(0.0)
+            if deadline is not None and time.monotonic() >= deadline:
+                exc.reason = "deadline"
+            raise
+        except BaseException:
+            for limiter in reversed(held):
+                limiter.release(0.0)
+            raise
+        return _Permit(held)
+
+    def stats(self) -> dict:
+        return {"global": self.global_limiter.stats(), "tools": {n: l.stats() for n, l in self._tools.items()}}
+
+
+# --- Middleware ---
+
+
+def _parse_deadline(headers: dict) -> Optional[float]:
+    """Client deadline from X-Request-Timeout / X-Request-Deadline, as a time.monotonic() value."""
+    now = time.monotonic()
+    deadline = None
+    try:
+        if b"x-request-timeout" in headers:
+            deadline = now + float(headers[b"x-request-timeout"])
+        if b"x-request-deadline" in headers:
+            absolute = now + float(headers[b"x-request-deadline"]) - time.time()
+            deadline = absolute if deadline is None else min(deadline, absolute)
+    except ValueError:
+        return None
+    return deadline
+
+
+def _release_unused(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is None:
+        task.result().release()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting, queueing or shedding MCP tool calls."""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None, mcp_path: str = "/mcp"):
+        self.app = app
+        self.controller = controller or AdmissionController()
+        self.mcp_path = mcp_path
+
+    async def _respond(self, send, request_id, exc: OverloadedError) -> None:
+        # A JSON-RPC error with HTTP 200: MCP clients only hand errors in a
+        # 2xx response to the waiting call, and fail other statuses out of band
+        body = jsonrpc_error(
+            request_id,
+            DEADLINE_EXCEEDED if exc.reason == "deadline" else OVERLOADED,
+            str(exc),
+            {"reason": exc.reason, "retry_after": exc.retry_after},
+        )
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"retry-after", str(exc.retry_after).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def _read_body(replay: collections.deque, receive) -> bytes:
+        """The whole body of a request being shed, for an id that follows its arguments."""
+        body = bytearray()
+        message = None
+        for message in replay:
+            body += message.get("body", b"")
+        while message is None or (message["type"] == "http.request" and message.get("more_body")):
+            message = await receive()
+            body += message.get("body", b"")
+        return bytes(body)
+
+    async def _admit_while_connected(self, tool_name: str, deadline: Optional[float],
+                                     disconnected: asyncio.Event, read_rest) -> Optional[_Permit]:
+        """Queue for a slot while reading the rest of the body; None if the client disconnects first."""
+        admitting = asyncio.ensure_future(self.controller.admit(tool_name, deadline))
+        reading = asyncio.ensure_future(read_rest())
+        gone = asyncio.ensure_future(disconnected.wait())
+        admitted = False
+        try:
+            await asyncio.wait([admitting, gone], return_when=asyncio.FIRST_COMPLETED)
+            if not admitting.done():
+                admitting.cancel()
+                await asyncio.wait([admitting])  # Out of the queue before returning
+                return None
+            await reading  # Replayed to the app, or read for the id of a shed call
+            admitted = True
+            return admitting.result()
+        finally:
+            gone.cancel()
+            if not admitted:
+                # Leave the queue, or hand back a slot that arrived too late
+                reading.cancel()
+                admitting.cancel()
+                admitting.add_done_callback(_release_unused)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST" or not scope.get("path", "").startswith(self.mcp_path):
+            await self.app(scope, receive, send)
+            return
+
+        deadline = _parse_deadline(dict(scope.get("headers", [])))
+        disconnected = asyncio.Event()
+        state = scope.setdefault("state", {})
+        state[_DISCONNECTED_KEY] = disconnected
+        state[_DEADLINE_KEY] = deadline
+
+        watcher: Optional[asyncio.Task] = None
+
+        async def watch() -> None:
+            # After the body, the next message is http.disconnect (client gone or response done)
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        def observe(message: dict) -> None:
+            nonlocal watcher
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+            elif not message.get("more_body") and watcher is None:
+                watcher = asyncio.ensure_future(watch())
+
+        # Read until the tool name is known, then replay what was read
+        replay: collections.deque = collections.deque()
+        sniffer = EnvelopeSniffer()
+        while True:
+            message = await receive()
+            observe(message)
+            replay.append(message)
+            if message["type"] != "http.request" or sniffer.feed(message.get("body", b""), message.get("more_body", False)):
+                break
+        tool_name = sniffer.tool_name if sniffer.is_tool_call else None
+
+        async def watched_receive():
+            if replay:
+                return replay.popleft()
+            if disconnected.is_set():
+                return {"type": "http.disconnect"}
+            if watcher is not None:
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            message = await receive()
+            observe(message)
+            return message
+
+        async def read_rest() -> None:
+            # Keep reading while queued, so that a client leaving is noticed
+            message = replay[-1]
+            while message["type"] == "http.request" and message.get("more_body"):
+                message = await receive()
+                observe(message)
+                replay.append(message)
+
+        permit = None
+        try:
+            if tool_name is not None:
+                try:
+                    permit = self.controller.try_admit(tool_name, deadline)
+                    if permit is None:
+                        permit = await self._admit_while_connected(tool_name, deadline, disconnected, read_rest)
+                        if permit is None:
+                            ADMISSION_REJECTED.inc(tool_name, "disconnected")
+                            return
+                except OverloadedError as exc:
+                    ADMISSION_REJECTED.inc(tool_name, exc.reason)
+                    request_id = sniffer.request_id
+                    if request_id is None:
+                        request_id = request_id_of(await self._read_body(replay, receive))
+                    await self._respond(send, request_id, exc)
+                    return
+            await self.app(scope, watched_receive, send)
+        finally:
+            if permit is not None:
+                permit.release()
+            if watcher is not None:
+                watcher.cancel()
+
+
+# --- Tool wrapper ---
+
+
+def _request_state() -> Optional[dict]:
+    try:
+        from fastmcp.server.dependencies import get_http_request
+
+        return get_http_request().scope.get("state")
+    except Exception:
+        return None
+
+
+def _consume(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+async def _run_guarded(tool_name: str, coro, call: _CallState, disconnected: Optional[asyncio.Event]):
+    task = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(disconnected.wait()) if disconnected is not None else None
+    timeout = None if call.deadline is None else max(0.0, call.deadline - time.monotonic())
+    try:
+        done, _ = await asyncio.wait([t for t in (task, watcher) if t], timeout=timeout,
+                                     return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        # notifications/cancelled or server shutdown
+        call.cancelled.set()
+        task.cancel()
+        TOOL_CANCELLED.inc(tool_name, "cancelled")
+        raise
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+    if task in done:
+        return task.result()
+
+    # Cancelling the task also stops queued and process-pool work (see executors)
+    call.cancelled.set()
+    task.cancel()
+    task.add_done_callback(_consume)
+    if watcher is not None and watcher in done:
+        TOOL_CANCELLED.inc(tool_name, "disconnected")
+        raise ToolCancelledError("Client disconnected; tool call cancelled")
+    TOOL_CANCELLED.inc(tool_name, "deadline")
+    raise DeadlineExceededError("Tool call deadline exceeded")
+
+
+def admission_wrapper(func: Callable, tool_name: str) -> Callable:
+    """
+    Tool wrapper (see `instrumentation.instrument`) that records a tool's
+    `@admission` settings for the middleware and stops the call when its
+    deadline passes or the client goes away. Put it directly after
+    `execution_wrapper` so pool queueing counts against the deadline.
+    """
+    config = getattr(func, _ADMISSION_ATTR, None)
+    if config is not None:
+        TOOL_ADMISSION[tool_name] = config
+    else:
+        TOOL_ADMISSION.pop(tool_name, None)
+    tool_timeout = (config or {}).get("timeout") or _env_float("ADMISSION_DEFAULT_TIMEOUT", 0) or None
+
+    def prepare() -> tuple[_CallState, Optional[asyncio.Event]]:
+        state = _request_state() or {}
+        deadline = state.get(_DEADLINE_KEY)
+        if tool_timeout is not None:
+            own = time.monotonic() + tool_timeout
+            deadline = own if deadline is None else min(deadline, own)
+        return _CallState(deadline), state.get(_DISCONNECTED_KEY)
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            call, disconnected = prepare()
+            token = _CURRENT.set(call)
+            try:
+                check_cancelled()
+                if call.deadline is None and disconnected is None:
+                    return await func(*args, **kwargs)
+                return await _run_guarded(tool_name, func(*args, **kwargs), call, disconnected)
+            finally:
+                _CURRENT.reset(token)
+
+        return async_wrapper
+
+    # Inline sync tools block the loop and can't be interrupted; check before starting
+    @wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        call, disconnected = prepare()
+        if disconnected is not None and disconnected.is_set():
+            call.cancelled.set()
+        token = _CURRENT.set(call)
+        try:
+            check_cancelled()
+            return func(*args, **kwargs)
+        finally:
+            _CURRENT.reset(token)
+
+    return sync_wrapper
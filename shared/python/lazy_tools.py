@@ -0,0 +1,114 @@
+"""
+Lazy tool registration for fast cold starts.
+
+Tool schemas are declared up front as stubs, which only need a signature
+and a docstring. The module holding the implementation is imported the
+first time one of its tools is called, so heavy dependencies (PyPDF2,
+parsers, SDK clients) stay out of startup.
+
+Usage:
+    # src/tools/__init__.py
+    from lazy_tools import LazyTools
+
+    def register_tools(mcp):
+        tools = LazyTools(mcp, __name__)
+
+        @tools.tool("pdf_tools")
+        def count_pdf_pages(pdf_base64: str) -> int:
+            \"\"\"Return the number of pages in a base64-encoded PDF.\"\"\"
+
+Implementation modules keep the usual `register(mcp)` layout; the tool is
+looked up by function name. Stub and implementation must agree on the
+signature and on sync vs async; `LazyTools.verify()` checks this by
+importing everything (use it in tests or the startup profiler, not at runtime).
+"""
+
+import importlib
+import inspect
+from functools import wraps
+from typing import Callable
+
+from instrumentation import collect_tools
+
+
+class LazyTools:
+    """Registers stub tools whose implementations are imported on first call."""
+
+    def __init__(self, mcp, package: str):
+        self.mcp = mcp
+        self.package = package
+        self._stubs: dict[str, tuple[str, Callable]] = {}
+        self._modules: dict[str, dict[str, Callable]] = {}
+
+    def _load_module(self, module: str) -> dict[str, Callable]:
+        functions = self._modules.get(module)
+        if functions is None:
+            imported = importlib.import_module(f"{self.package}.{module}")
+            register = getattr(imported, "register", None)
+            functions = {}
+            if register is not None:
+                functions = {f.__name__: f for f in collect_tools(register).functions.values()}
+            self._modules[module] = functions
+        return functions
+
+    def resolve(self, module: str, name: str) -> Callable:
+        """Import `module` (once) and return its implementation of tool `name`."""
+        functions = self._load_module(module)
+        func = functions.get(name)
+        if func is None:
+            func = getattr(importlib.import_module(f"{self.package}.{module}"), name, None)
+            if func is None:
+                raise RuntimeError(f"Tool '{name}' is not defined in {self.package}.{module}")
+            functions[name] = func
+        return func
+
+    def loaded_modules(self) -> list[str]:
+        """Implementation modules imported so far."""
+        return sorted(self._modules)
+
+    def tool(self, module: str, **tool_kwargs):
+        """Decorator registering a stub whose implementation lives in `module`."""
+
+        def decorator(stub: Callable):
+            name = stub.__name__
+            self._stubs[name] = (module, stub)
+
+            if inspect.iscoroutinefunction(stub):
+
+                @wraps(stub)
+                async def async_proxy(*args, **kwargs):
+                    return await self.resolve(module, name)(*args, **kwargs)
+
+                proxy = async_proxy
+            else:
+
+                @wraps(stub)
+                def sync_proxy(*args, **kwargs):
+                    return self.resolve(module, name)(*args, **kwargs)
+
+                proxy = sync_proxy
+
+            return self.mcp.tool(proxy, **tool_kwargs)
+
+        return decorator
+
+    def verify(self) -> list[str]:
+        """
+        Import every implementation and compare it against its stub.
+        Returns a list of problems (empty when stubs and implementations agree).
+        """
+        problems = []
+        for name, (module, stub) in self._stubs.items():
+            try:
+                impl = self.resolve(module, name)
+            except Exception as e:
+                problems.append(f"{name}: {e}")
+                continue
+            if inspect.signature(impl) != inspect.signature(stub):
+                problems.append(
+                    f"{name}: stub signature {inspect.signature(stub)} != implementation {inspect.signature(impl)}"
+                )
+            if inspect.iscoroutinefunction(impl) != inspect.iscoroutinefunction(stub):
+                problems.append(f"{name}: stub and implementation disagree on async")
+        return problems
+
@@ -5,7 +5,37 @@ Structured JSON logging configuration for MCP servers.
 import logging
 import json
 import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone
+from typing import Optional
+
+# Per-call context, populated by the tool instrumentation wrappers
+tool_name_var: ContextVar[Optional[str]] = ContextVar("tool_name", default=None)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+@contextmanager
+def tool_context(tool_name: str, request_id: str):
+    """Bind tool_name and request_id to every log record emitted inside the block."""
+    name_token = tool_name_var.set(tool_name)
+    request_token = request_id_var.set(request_id)
+    try:
+        yield
+    finally:
+        request_id_var.reset(request_token)
+        tool_name_var.reset(name_token)
+
+
+class ToolContextFilter(logging.Filter):
+    """Copy the current tool context onto log records that don't set it explicitly."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "tool_name", None) is None:
+            record.tool_name = tool_name_var.get()
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return True
 
 
 class JSONFormatter(logging.Formatter):
@@ -50,6 +80,7 @@ def setup_logging(mcp_name: str, level: str = "INFO") -> logging.Logger:
 
     handler = logging.StreamHandler(sys.stdout)
     handler.setFormatter(JSONFormatter())
+    handler.addFilter(ToolContextFilter())
     logger.addHandler(handler)
 
     return logger
@@ -0,0 +1,404 @@
+"""
+Client for the `mcp_registry` table with a local SQLite snapshot.
+
+Lookups (slug -> endpoint, filters by status/tier/language) are answered
+from the snapshot, so they stay fast and keep working when Supabase is
+unreachable. The snapshot is refreshed incrementally:
+
+1. A probe request fetches the newest `updated_at` plus the row count
+   (`Prefer: count=exact`). Together they form the registry's ETag; if it
+   matches the stored one, nothing changed and the refresh stops there.
+2. Otherwise only rows with `updated_at` at most `overlap` seconds before
+   the cursor, or later, are fetched and upserted. `updated_at` is set from
+   `now()`, the start of the writing transaction, so a row can commit after
+   a refresh with a timestamp older than rows that refresh already saw.
+3. If the remote row count still differs from the local one, rows were
+   deleted; the slug list is fetched and missing slugs are pruned.
+4. Every `reconcile_interval` seconds the ETag is not trusted: every row's
+   (slug, updated_at) is compared with the snapshot, and rows that differ
+   are fetched. This catches late commits older than the overlap, and
+   late updates that left the newest timestamp and the count unchanged.
+
+An `ETag` header from PostgREST or a proxy in front of it is honoured too
+(sent back as `If-None-Match`, 304 means unchanged).
+
+Usage:
+    from registry_client import RegistryClient
+
+    registry = RegistryClient.from_env()
+    url = registry.resolve("pdf-tools")           # refreshes if older than max_age
+    active = registry.list(status="active", tier="vps")
+
+CLI (used by scripts/list-mcps.sh):
+    python shared/python/registry_client.py list --status active --json
+    python shared/python/registry_client.py resolve pdf-tools
+    python shared/python/registry_client.py refresh [--full]
+
+Configuration:
+    SUPABASE_URL                 Registry project URL
+    SUPABASE_SERVICE_ROLE_KEY    Preferred key (falls back to SUPABASE_ANON_KEY)
+    MCP_REGISTRY_CACHE           Snapshot path (default: ~/.cache/matrx-mcp/registry.db)
+    MCP_REGISTRY_MAX_AGE         Seconds before a lookup triggers a refresh (default: 60)
+    MCP_REGISTRY_RECONCILE       Seconds between full (slug, updated_at) comparisons (default: 600)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TABLE = "mcp_registry"
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "matrx-mcp" / "registry.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS servers (
+    slug TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    language TEXT,
+    tier TEXT,
+    status TEXT,
+    endpoint_url TEXT,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_servers_status ON servers(status);
+CREATE INDEX IF NOT EXISTS idx_servers_tier ON servers(tier);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _rewind(timestamp: str, seconds: float) -> str:
+    """An ISO timestamp moved `seconds` earlier (unchanged if it can't be parsed)."""
+    try:
+        moment = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return timestamp
+    return (moment - timedelta(seconds=seconds)).isoformat()
+
+
+class RegistryError(RuntimeError):
+    """The registry could not be reached or returned an unexpected response."""
+
+
+@dataclass
+class RefreshResult:
+    """Outcome of a refresh. `changed` is False when the ETag matched."""
+
+    changed: bool
+    upserted: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    etag: Optional[str] = None
+    error: Optional[str] = None
+
+
+class RegistryClient:
+    """Registry lookups served from a local snapshot, refreshed incrementally."""
+
+    def __init__(
+        self,
+        supabase_url: Optional[str],
+        api_key: Optional[str],
+        cache_path: Path | str = DEFAULT_CACHE_PATH,
+        max_age: float = 60.0,
+        timeout: float = 10.0,
+        overlap: float = 300.0,
+        reconcile_interval: float = 600.0,
+    ):
+        self.base_url = f"{supabase_url.rstrip('/')}/rest/v1/{TABLE}" if supabase_url else None
+        self.api_key = api_key
+        self.max_age = max_age
+        self.timeout = timeout
+        self.overlap = overlap
+        self.reconcile_interval = reconcile_interval
+        self.cache_path = Path(cache_path)
+        if str(cache_path) != ":memory:":
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(cache_path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "RegistryClient":
+        kwargs.setdefault("cache_path", os.environ.get("MCP_REGISTRY_CACHE", DEFAULT_CACHE_PATH))
+        kwargs.setdefault("max_age", float(os.environ.get("MCP_REGISTRY_MAX_AGE", "60")))
+        kwargs.setdefault("reconcile_interval", float(os.environ.get("MCP_REGISTRY_RECONCILE", "600")))
+        return cls(
+            os.environ.get("SUPABASE_URL"),
+            os.environ.get("SUPABASE_SERVICE_ROLE_KEY") or os.environ.get("SUPABASE_ANON_KEY"),
+            **kwargs,
+        )
+
+    # --- Snapshot metadata ---
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, **values) -> None:
+        self._db.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            [(k, None if v is None else str(v)) for k, v in values.items()],
+        )
+
+    @property
+    def etag(self) -> Optional[str]:
+        """Fingerprint of the registry contents the snapshot was built from."""
+        return self._get_meta("etag")
+
+    @property
+    def last_refresh(self) -> float:
+        """Unix time of the last successful refresh check (0 if never)."""
+        return float(self._get_meta("last_refresh") or 0)
+
+    @property
+    def last_error(self) -> Optional[str]:
+        return self._get_meta("last_error")
+
+    def is_stale(self) -> bool:
+        # A failed attempt also counts, so an outage doesn't add a timeout to every lookup
+        last_attempt = float(self._get_meta("last_attempt") or 0)
+        return time.time() - max(self.last_refresh, last_attempt) > self.max_age
+
+    # --- HTTP ---
+
+    def _request(self, query: dict, headers: Optional[dict] = None, method: str = "GET"):
+        if not self.base_url or not self.api_key:
+            raise RegistryError("SUPABASE_URL and a Supabase key must be set to refresh the registry")
+        url = f"{self.base_url}?{urllib.parse.urlencode(query, safe='*,.:()')}"
+        request = urllib.request.Request(
+            url,
+            method=method,
+            headers={"apikey": self.api_key, "Authorization": f"Bearer {self.api_key}", **(headers or {})},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, e.headers, b""
+            raise RegistryError(f"Registry request failed (HTTP {e.code}): {e.read()[:200]!r}") from e
+        except (urllib.error.URLError, OSError) as e:
+            raise RegistryError(f"Registry unreachable: {e}") from e
+
+    def _probe(self) -> tuple[Optional[str], int, str]:
+        """Return (newest updated_at, row count, etag) for the remote table."""
+        headers = {"Prefer": "count=exact"}
+        server_etag = self._get_meta("server_etag")
+        if server_etag:
+            headers["If-None-Match"] = server_etag
+        status, response_headers, body = self._request(
+            {"select": "updated_at", "order": "updated_at.desc", "limit": "1"}, headers
+        )
+        if status == 304:
+            return None, -1, self.etag or ""
+        if response_headers.get("ETag"):
+            self._set_meta(server_etag=response_headers["ETag"])
+        # Content-Range: 0-0/42  (or */0 for an empty table)
+        total = int((response_headers.get("Content-Range") or "*/0").rsplit("/", 1)[-1] or 0)
+        rows = json.loads(body or b"[]")
+        newest = rows[0]["updated_at"] if rows else None
+        return newest, total, f"{newest or '-'}/{total}"
+
+    # --- Refresh ---
+
+    def refresh(self, full: bool = False) -> RefreshResult:
+        """
+        Bring the snapshot up to date. Network failures are recorded and
+        returned in `RefreshResult.error`; the existing snapshot stays usable.
+        """
+        with self._lock:
+            try:
+                return self._refresh(full)
+            except RegistryError as e:
+                logger.warning("Registry refresh failed, serving snapshot: %s", e)
+                self._set_meta(last_error=str(e), last_attempt=time.time())
+                self._db.commit()
+                return RefreshResult(changed=False, etag=self.etag, error=str(e))
+
+    def _refresh(self, full: bool) -> RefreshResult:
+        newest, total, etag = self._probe()
+        reconcile = full or time.time() - float(self._get_meta("last_reconcile") or 0) >= self.reconcile_interval
+        if not reconcile and etag == self.etag:
+            self._set_meta(last_refresh=time.time(), last_error=None)
+            self._db.commit()
+            return RefreshResult(changed=False, etag=etag)
+
+        cursor = None if full else self._get_meta("cursor")
+        query = {"select": "*", "order": "updated_at.asc"}
+        if cursor:
+            # Look back `overlap` seconds for rows that committed late with an
+            # older timestamp. Re-upserting rows already seen is harmless.
+            query["updated_at"] = f"gte.{_rewind(cursor, self.overlap)}"
+        _, _, body = self._request(query)
+        rows = json.loads(body or b"[]")
+        local = {r["slug"]: r["updated_at"] for r in self._db.execute("SELECT slug, updated_at FROM servers")}
+
+        remote = None
+        if reconcile and not full:
+            _, _, body = self._request({"select": "slug,updated_at"})
+            remote = {r["slug"]: r["updated_at"] for r in json.loads(body or b"[]")}
+            fetched = {r["slug"] for r in rows}
+            missed = sorted(
+                slug for slug, updated_at in remote.items() if slug not in fetched and local.get(slug) != updated_at
+            )
+            if missed:
+                slugs = ",".join(json.dumps(slug, ensure_ascii=False) for slug in missed)
+                _, _, body = self._request({"select": "*", "slug": f"in.({slugs})"})
+                rows += json.loads(body or b"[]")
+
+        # The overlap re-fetches rows the snapshot already has
+        changed_rows = [r for r in rows if full or local.get(r["slug"]) != r["updated_at"]]
+        self._db.executemany(
+            """
+            INSERT INTO servers (slug, name, language, tier, status, endpoint_url, updated_at, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(slug) DO UPDATE SET
+                name = excluded.name, language = excluded.language, tier = excluded.tier,
+                status = excluded.status, endpoint_url = excluded.endpoint_url,
+                updated_at = excluded.updated_at, data = excluded.data
+            """,
+            [
+                (r["slug"], r["name"], r.get("language"), r.get("tier"), r.get("status"),
+                 r.get("endpoint_url"), r["updated_at"], json.dumps(r))
+                for r in changed_rows
+            ],
+        )
+        upserted = [r["slug"] for r in changed_rows]
+
+        deleted = []
+        local_total = self._db.execute("SELECT COUNT(*) FROM servers").fetchone()[0]
+        if full or remote is not None or (total >= 0 and local_total != total):
+            if remote is None:
+                _, _, body = self._request({"select": "slug"})
+                remote = {r["slug"] for r in json.loads(body or b"[]")}
+            local = {r["slug"] for r in self._db.execute("SELECT slug FROM servers")}
+            deleted = sorted(local - set(remote))
+            self._db.executemany("DELETE FROM servers WHERE slug = ?", [(s,) for s in deleted])
+
+        if rows:
+            cursor = max(r["updated_at"] for r in rows)
+        self._set_meta(cursor=cursor or newest, etag=etag, last_refresh=time.time(), last_error=None)
+        if reconcile:
+            self._set_meta(last_reconcile=time.time())
+        self._db.commit()
+        changed = bool(upserted or deleted) or full
+        if changed:
+            logger.info("Registry refreshed: %d upserted, %d deleted", len(upserted), len(deleted))
+        return RefreshResult(changed=changed, upserted=upserted, deleted=deleted, etag=etag)
+
+    def ensure_fresh(self) -> Optional[RefreshResult]:
+        """Refresh if the snapshot is older than `max_age`. Never raises."""
+        if self.base_url and self.api_key and self.is_stale():
+            return self.refresh()
+        return None
+
+    # --- Lookups ---
+
+    def get(self, slug: str, refresh: bool = True) -> Optional[dict]:
+        """The full registry row for `slug`, or None."""
+        if refresh:
+            self.ensure_fresh()
+        row = self._db.execute("SELECT data FROM servers WHERE slug = ?", (slug,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def resolve(self, slug: str, refresh: bool = True) -> Optional[str]:
+        """The endpoint URL registered for `slug`, or None."""
+        if refresh:
+            self.ensure_fresh()
+        row = self._db.execute("SELECT endpoint_url FROM servers WHERE slug = ?", (slug,)).fetchone()
+        return row["endpoint_url"] if row else None
+
+    def list(
+        self,
+        status: Optional[str] = None,
+        tier: Optional[str] = None,
+        language: Optional[str] = None,
+        refresh: bool = True,
+    ) -> list[dict]:
+        """Registry rows matching the given filters, newest first."""
+        if refresh:
+            self.ensure_fresh()
+        clauses, params = [], []
+        for column, value in (("status", status), ("tier", tier), ("language", language)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._db.execute(f"SELECT data FROM servers {where}", params).fetchall()
+        servers = [json.loads(r["data"]) for r in rows]
+        servers.sort(key=lambda s: s.get("created_at") or "", reverse=True)
+        return servers
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def _main(argv: Optional[list[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the MCP registry through the local snapshot")
+    sub = parser.add_subparsers(dest="command", required=True)
+    list_parser = sub.add_parser("list")
+    list_parser.add_argument("--status")
+    list_parser.add_argument("--tier")
+    list_parser.add_argument("--lang")
+    list_parser.add_argument("--json", action="store_true")
+    resolve_parser = sub.add_parser("resolve")
+    resolve_parser.add_argument("slug")
+    refresh_parser = sub.add_parser("refresh")
+    refresh_parser.add_argument("--full", action="store_true")
+    for p in (list_parser, resolve_parser):
+        p.add_argument("--offline", action="store_true", help="Don't refresh, use the snapshot as is")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    registry = RegistryClient.from_env()
+
+    if args.command == "refresh":
+        result = registry.refresh(full=args.full)
+        if result.error:
+            print(f"Refresh failed: {result.error}")
+            return 1
+        print(f"{'Updated' if result.changed else 'Unchanged'}: "
+              f"{len(result.upserted)} upserted, {len(result.deleted)} deleted (etag {result.etag})")
+        return 0
+
+    if args.command == "resolve":
+        endpoint = registry.resolve(args.slug, refresh=not args.offline)
+        if not endpoint:
+            return 1
+        print(endpoint)
+        return 0
+
+    servers = registry.list(args.status, args.tier, args.lang, refresh=not args.offline)
+    if args.json:
+        print(json.dumps(servers, indent=4))
+        return 0
+    if not servers:
+        print("  No MCPs found.")
+    for mcp in servers:
+        endpoint = mcp.get("endpoint_url") or "-"
+        print(f"  {mcp['name']:<23} {mcp['language']:<10} {mcp['tier']:<10} "
+              f"{mcp['auth_type']:<8} {mcp['status']:<8} {endpoint}")
+    if registry.last_error:
+        print(f"\n  (registry unreachable, showing snapshot from {time.ctime(registry.last_refresh)})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -6,6 +6,8 @@ Provides both user-scoped (RLS-respecting) and service-role clients.
 import os
 from typing import Optional
 
+from tracing import span
+
 
 def _get_env(key: str) -> str:
     """Get a required environment variable."""
@@ -30,7 +32,8 @@ def get_user_supabase_client(user_jwt: str):
     except ImportError:
         raise RuntimeError("supabase-py is required: pip install supabase")
 
-    return create_client(get_supabase_url(), user_jwt)
+    with span("supabase.create_client", role="user"):
+        return create_client(get_supabase_url(), user_jwt)
 
 
 def get_service_supabase_client():
@@ -44,4 +47,6 @@ def get_service_supabase_client():
     except ImportError:
         raise RuntimeError("supabase-py is required: pip install supabase")
 
-    return create_client(get_supabase_url(), _get_env("SUPABASE_SERVICE_ROLE_KEY"))
+    with span("supabase.create_client", role="service"):
+        return create_client(get_supabase_url(), _get_env("SUPABASE_SERVICE_ROLE_KEY"))
+
@@ -0,0 +1,6 @@
+"""Shared modules import each other by bare name, as they do once copied into a project's src/."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
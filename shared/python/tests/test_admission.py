@@ -0,0 +1,141 @@
+import asyncio
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+import uvicorn
+from fastmcp import Client, FastMCP
+from mcp.shared.exceptions import McpError
+from starlette.applications import Starlette
+
+from admission import OVERLOADED, AdmissionController, AdmissionMiddleware, admission_wrapper
+from instrumentation import instrument
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def server_url():
+    mcp = FastMCP("admission-test")
+
+    @instrument(mcp, admission_wrapper).tool
+    async def slow() -> str:
+        await asyncio.sleep(2)
+        return "done"
+
+    mcp_app = mcp.http_app(path="/mcp")
+    app = Starlette(lifespan=mcp_app.lifespan)
+    app.mount("/", mcp_app)
+    # One running call, one queued: further calls are shed
+    app.add_middleware(AdmissionMiddleware, controller=AdmissionController(max_concurrent=1, queue=1))
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}/mcp"
+    server.should_exit = True
+    thread.join(5)
+
+
+def test_shed_calls_fail_fast_in_a_standard_client(server_url):
+    async def call(client):
+        started = time.monotonic()
+        try:
+            return await client.call_tool("slow", {}), time.monotonic() - started
+        except McpError as exc:
+            return exc, time.monotonic() - started
+
+    async def run():
+        async with Client(server_url, timeout=15) as client:
+            return await asyncio.gather(*(call(client) for _ in range(4)))
+
+    results = asyncio.run(run())
+    shed = [(result, elapsed) for result, elapsed in results if isinstance(result, Exception)]
+    assert len(shed) == 2
+    for error, elapsed in shed:
+        assert "queue is full" in str(error)
+        assert error.error.data["retry_after"] >= 1
+        assert elapsed < 1.5  # Before the admitted calls finish, nowhere near the client timeout
+    assert sum(1 for result, _ in results if not isinstance(result, Exception)) == 2
+
+
+def test_shed_response_echoes_a_trailing_request_id():
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        while (await receive()).get("more_body"):
+            pass
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    middleware = AdmissionMiddleware(app, controller=AdmissionController(max_concurrent=1, queue=0))
+    body = b'{"method":"tools/call","params":{"name":"t","arguments":{"id":5}},"id":"req-7","jsonrpc":"2.0"}'
+
+    async def run():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            running = asyncio.ensure_future(client.post("/mcp", content=body))
+            await asyncio.sleep(0.1)
+            shed = await client.post("/mcp", content=body)
+            release.set()
+            await running
+            return shed
+
+    shed = asyncio.run(run())
+    assert shed.status_code == 200
+    assert int(shed.headers["retry-after"]) >= 1
+    message = shed.json()
+    assert message["id"] == "req-7"
+    assert message["error"]["code"] == OVERLOADED
+
+
+def test_queued_call_is_dropped_when_its_client_disconnects():
+    release = asyncio.Event()
+    ran = []
+
+    async def app(scope, receive, send):
+        ran.append(scope["path"])
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    controller = AdmissionController(max_concurrent=1, queue=1)
+    middleware = AdmissionMiddleware(app, controller=controller)
+    head = b'{"jsonrpc":"2.0","id":1,"method":"tools/call","params":{"name":"t","arguments":{"data":"'
+
+    async def call(path: str, disconnect_after: float):
+        messages = [{"type": "http.request", "body": head, "more_body": True},
+                    {"type": "http.request", "body": b'"}}}', "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.sleep(disconnect_after)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            pass
+
+        await middleware({"type": "http", "method": "POST", "path": path, "headers": []}, receive, send)
+
+    async def run():
+        running = asyncio.ensure_future(call("/mcp/running", 60))
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(call("/mcp/abandoned", 0.1), 2)  # Returns once the client has gone
+        assert controller.global_limiter.stats()["queued"] == 0
+        release.set()
+        await running
+        await call("/mcp/next", 0)  # The slot was not lost to the abandoned call
+
+    asyncio.run(run())
+    assert ran == ["/mcp/running", "/mcp/next"]
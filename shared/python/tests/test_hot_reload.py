@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+from fastmcp import Client, FastMCP
+
+from hot_reload import ToolReloader
+from instrumentation import instrument
+
+V1 = '''
+def register_tools(mcp):
+    @mcp.tool
+    def a() -> str:
+        return "a1"
+
+    @mcp.tool
+    def b() -> str:
+        return "b1"
+'''
+
+V2 = '''
+def register_tools(mcp):
+    @mcp.tool
+    def a() -> str:
+        return "a2"
+
+    @mcp.tool
+    def c() -> str:
+        return "c2"
+'''
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    name = f"reload_tools_{os.getpid()}_{time.monotonic_ns()}"
+    directory = tmp_path / name
+    directory.mkdir()
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def write(source: str) -> None:
+        path = directory / "__init__.py"
+        path.write_text(source)
+        later = time.time() + 5  # A new mtime even within the filesystem's timestamp resolution
+        os.utime(path, (later, later))
+
+    write(V1)
+    yield name, write
+    for module in [module for module in sys.modules if module.split(".")[0] == name]:
+        del sys.modules[module]
+
+
+def serve(name: str):
+    mcp = FastMCP("test", on_duplicate_tools="replace")
+    tools = instrument(mcp)
+    __import__(name).register_tools(tools)
+    return mcp, ToolReloader(tools, name)
+
+
+def call_all(mcp) -> dict:
+    async def run():
+        async with Client(mcp) as client:
+            return {tool.name: (await client.call_tool(tool.name)).data for tool in await client.list_tools()}
+
+    return asyncio.run(run())
+
+
+def test_reload_replaces_adds_and_removes_tools(package):
+    name, write = package
+    mcp, reloader = serve(name)
+    write(V2)
+
+    result = reloader.reload()
+
+    assert result["status"] == "reloaded"
+    assert (result["added"], result["removed"]) == (["c"], ["b"])
+    assert call_all(mcp) == {"a": "a2", "c": "c2"}
+
+
+def test_failed_swap_restores_the_live_tools(package, monkeypatch):
+    name, write = package
+    mcp, reloader = serve(name)
+    write(V2)
+    add_tool = mcp.add_tool
+
+    def refuse_new_tools(tool):
+        if tool.name == "c":
+            raise ValueError("Tool already exists: c")
+        return add_tool(tool)
+
+    monkeypatch.setattr(mcp, "add_tool", refuse_new_tools)
+    result = reloader.reload()
+    monkeypatch.undo()
+
+    assert result["status"] == "failed"
+    assert call_all(mcp) == {"a": "a1", "b": "b1"}
@@ -0,0 +1,41 @@
+import os
+
+from tool_cache import DiskCache, ToolCache
+
+
+def test_corrupt_disk_entry_is_a_miss_and_is_removed(tmp_path):
+    cache = ToolCache(directory=str(tmp_path))
+    cache.store("key", {"rows": list(range(100))}, ttl=60)
+    path = tmp_path / "key"
+    path.write_bytes(path.read_bytes()[:20])  # Cut short, as by a crashed writer
+    cache.memory.clear()
+
+    assert cache.lookup("key", "tool") == (False, None)
+    assert not path.exists()
+
+
+def test_overwriting_an_entry_does_not_grow_the_size(tmp_path):
+    disk = DiskCache(str(tmp_path), max_bytes=1024 * 1024)
+    for _ in range(5):
+        disk.set("key", b"x" * 100, 0.0)
+    assert disk.size == 108
+    assert disk.size == sum(entry.stat().st_size for entry in os.scandir(tmp_path))
+
+
+def test_eviction_leaves_in_flight_writes_alone(tmp_path):
+    disk = DiskCache(str(tmp_path), max_bytes=1000)
+    in_flight = tmp_path / ".tmp-other-writer"
+    in_flight.write_bytes(b"y" * 500)
+    for index in range(20):
+        disk.set(f"key{index}", b"x" * 100, 0.0)
+
+    assert in_flight.exists()
+    assert disk.size <= 1000
+
+
+def test_failed_disk_write_does_not_raise(tmp_path):
+    disk = DiskCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+    os.rmdir(disk.directory)  # mkstemp now fails with FileNotFoundError
+
+    disk.set("key", b"x" * 100, 0.0)
+    assert disk.get("key") is None
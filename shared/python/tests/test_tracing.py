@@ -0,0 +1,65 @@
+import asyncio
+
+import httpx
+import pytest
+
+from tracing import InMemoryExporter, TracingMiddleware, configure_tracing, extract_context, inject_context, span
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemoryExporter()
+    configure_tracing(exporter, batch=False)
+    yield exporter
+    configure_tracing(None)
+
+
+def test_nested_spans_are_linked_to_their_parent(exporter):
+    with span("parent"):
+        with span("child", table="rows"):
+            pass
+
+    [parent] = exporter.find("parent")
+    [child] = exporter.find("child")
+    assert parent.parent_id is None
+    assert child.parent_id == parent.context.span_id
+    assert child.context.trace_id == parent.context.trace_id
+    assert child.attributes == {"table": "rows"}
+
+
+def test_traceparent_round_trip_continues_the_trace(exporter):
+    with span("client") as client:
+        headers = inject_context({})
+    assert headers["traceparent"] == client.context.to_traceparent()
+
+    incoming = extract_context(headers)
+    assert (incoming.trace_id, incoming.span_id, incoming.sampled) == (
+        client.context.trace_id, client.context.span_id, True)
+    with span("server", incoming):
+        pass
+
+    [server] = exporter.find("server")
+    assert server.context.trace_id == client.context.trace_id
+    assert server.parent_id == client.context.span_id
+
+
+def test_middleware_continues_an_incoming_trace(exporter):
+    async def app(scope, receive, send):
+        with span("handler"):
+            await send({"type": "http.response.start", "status": 204, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+    traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+    async def run():
+        transport = httpx.ASGITransport(app=TracingMiddleware(app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/mcp", headers={"traceparent": traceparent})
+
+    asyncio.run(run())
+    [request] = exporter.find("POST /mcp")
+    [handler] = exporter.find("handler")
+    assert request.context.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert request.parent_id == "b7ad6b7169203331"
+    assert request.attributes["http.status_code"] == 204
+    assert handler.parent_id == request.context.span_id
@@ -0,0 +1,531 @@
+"""
+Lightweight OpenTelemetry-style tracing for MCP servers.
+
+Spans cover tool dispatch, auth, Supabase calls and heavy helpers. Trace
+context is propagated from incoming W3C `traceparent` headers. Finished
+spans go to an exporter: OTLP/HTTP (JSON), a JSON-lines file, or an
+in-memory list for tests.
+
+Tracing is off until `configure_tracing()` is called; while off, `span()`
+returns a shared no-op object and `traced()` adds a single global check.
+
+Configuration (read by `configure_tracing_from_env`):
+    TRACING_EXPORTER             none | otlp | file | memory (default: none)
+    OTEL_EXPORTER_OTLP_ENDPOINT  OTLP collector base URL (default: http://localhost:4318)
+    TRACING_FILE                 Output path for the file exporter (default: traces.jsonl)
+    OTEL_SERVICE_NAME            Service name on exported spans (default: MCP_NAME)
+"""
+
+import atexit
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.request
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SpanContext:
+    """Identifies a span within a trace (W3C trace-context fields)."""
+
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool = True):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+class Span:
+    """A timed operation with attributes. Use via `span()` rather than directly."""
+
+    __slots__ = ("name", "context", "parent_id", "attributes", "start_ns", "end_ns", "status", "status_message")
+
+    def __init__(self, name: str, context: SpanContext, parent_id: Optional[str], attributes: dict):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status = "unset"
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.status_message = str(exc)
+        self.attributes["exception.type"] = type(exc).__name__
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "status_message": self.status_message,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned by `span()` while tracing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+# --- Propagation ---
+
+
+def extract_context(headers) -> Optional[SpanContext]:
+    """Parse a W3C `traceparent` header. Returns None if absent or malformed."""
+    if not headers:
+        return None
+    value = headers.get("traceparent") or headers.get("Traceparent")
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return SpanContext(parts[1], parts[2], bool(flags & 1))
+
+
+def inject_context(headers: dict) -> dict:
+    """Add a `traceparent` header for the current span (for outgoing requests)."""
+    current = _current_span.get()
+    if current is not None:
+        headers["traceparent"] = current.context.to_traceparent()
+    return headers
+
+
+def current_span() -> Optional[Span]:
+    """Return the active span, or None."""
+    return _current_span.get()
+
+
+# --- Exporters ---
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list. Intended for tests."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+
+    def find(self, name: str) -> list[Span]:
+        return [s for s in self.spans if s.name == name]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def shutdown(self) -> None:
+        pass
+
+
+class FileExporter:
+    """Appends finished spans to a file as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPExporter:
+    """Sends spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    _STATUS_CODES = {"unset": 0, "ok": 1, "error": 2}
+
+    def __init__(self, endpoint: str, service_name: str, headers: Optional[dict] = None, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.timeout = timeout
+
+    def _encode(self, spans: list[Span]) -> bytes:
+        otlp_spans = []
+        for s in spans:
+            otlp_span = {
+                "traceId": s.context.trace_id,
+                "spanId": s.context.span_id,
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": self._STATUS_CODES[s.status], "message": s.status_message},
+            }
+            if s.parent_id:
+                otlp_span["parentSpanId"] = s.parent_id
+            otlp_spans.append(otlp_span)
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "matrx-mcp"}, "spans": otlp_spans}],
+            }]
+        }
+        return json.dumps(payload).encode()
+
+    def export(self, spans: list[Span]) -> None:
+        request = urllib.request.Request(self.url, data=self._encode(spans), headers=self.headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except Exception as e:
+            logger.warning("Failed to export %d spans to %s: %s", len(spans), self.url, e)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class BatchProcessor:
+    """Buffers finished spans and exports them from a background thread."""
+
+    def __init__(self, exporter, max_batch: int = 512, interval: float = 2.0, max_queue: int = 8192):
+        self.exporter = exporter
+        self.max_batch = max_batch
+        self.interval = interval
+        self.max_queue = max_queue
+        self._queue: list[Span] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                return  # Drop rather than grow without bound
+            self._queue.append(span)
+            full = len(self._queue) >= self.max_batch
+        if full:
+            self._wake.set()
+
+    def _drain(self) -> None:
+        while True:
+            with self._lock:
+                batch, self._queue = self._queue[: self.max_batch], self._queue[self.max_batch :]
+            if not batch:
+                return
+            self.exporter.export(batch)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._drain()
+
+    def shutdown(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=self.interval + 1)
+        self._drain()
+        self.exporter.shutdown()
+
+
+class SimpleProcessor:
+    """Exports each span synchronously as it ends (memory and file exporters)."""
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    def on_end(self, span: Span) -> None:
+        self.exporter.export([span])
+
+    def shutdown(self) -> None:
+        self.exporter.shutdown()
+
+
+# --- Tracer ---
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class _ActiveSpan:
+    """Context manager that activates a span and hands it to the processor on exit."""
+
+    __slots__ = ("_span", "_processor", "_token")
+
+    def __init__(self, span: Span, processor):
+        self._span = span
+        self._processor = processor
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        span = self._span
+        if exc is not None:
+            span.record_exception(exc)
+        elif span.status == "unset":
+            span.status = "ok"
+        span.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        self._processor.on_end(span)
+        return False
+
+
+class Tracer:
+    """Creates spans and routes finished ones to a processor."""
+
+    def __init__(self, processor, service_name: str):
+        self.processor = processor
+        self.service_name = service_name
+
+    def start_span(self, name: str, parent: Optional[SpanContext] = None, attributes: Optional[dict] = None) -> _ActiveSpan:
+        if parent is None:
+            active = _current_span.get()
+            parent = active.context if active is not None else None
+        if parent is not None:
+            context = SpanContext(parent.trace_id, _new_span_id(), parent.sampled)
+            parent_id = parent.span_id
+        else:
+            context = SpanContext(_new_trace_id(), _new_span_id())
+            parent_id = None
+        return _ActiveSpan(Span(name, context, parent_id, dict(attributes or {})), self.processor)
+
+    def shutdown(self) -> None:
+        self.processor.shutdown()
+
+
+_tracer: Optional[Tracer] = None
+
+
+def configure_tracing(exporter=None, service_name: Optional[str] = None, batch: Optional[bool] = None) -> Optional[Tracer]:
+    """
+    Enable tracing with the given exporter. Pass None to disable.
+
+    OTLP exporters are batched on a background thread by default; other
+    exporters receive each span as soon as it ends.
+    """
+    global _tracer
+    if _tracer is not None:
+        _tracer.shutdown()
+        _tracer = None
+    if exporter is None:
+        return None
+
+    if batch is None:
+        batch = isinstance(exporter, OTLPExporter)
+    processor = BatchProcessor(exporter) if batch else SimpleProcessor(exporter)
+    service_name = service_name or os.environ.get("OTEL_SERVICE_NAME") or os.environ.get("MCP_NAME", "mcp-server")
+    _tracer = Tracer(processor, service_name)
+    return _tracer
+
+
+def configure_tracing_from_env() -> Optional[Tracer]:
+    """Enable tracing according to TRACING_EXPORTER and related env vars."""
+    kind = os.environ.get("TRACING_EXPORTER", "none").lower()
+    service_name = os.environ.get("OTEL_SERVICE_NAME") or os.environ.get("MCP_NAME", "mcp-server")
+    if kind == "otlp":
+        endpoint = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+        exporter = OTLPExporter(endpoint, service_name)
+    elif kind == "file":
+        exporter = FileExporter(os.environ.get("TRACING_FILE", "traces.jsonl"))
+    elif kind == "memory":
+        exporter = InMemoryExporter()
+    elif kind in ("", "none"):
+        return None
+    else:
+        raise RuntimeError(f"Unknown TRACING_EXPORTER: {kind}")
+    return configure_tracing(exporter, service_name)
+
+
+def get_tracer() -> Optional[Tracer]:
+    """Return the active tracer, or None when tracing is disabled."""
+    return _tracer
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+@atexit.register
+def _shutdown_tracer() -> None:
+    if _tracer is not None:
+        _tracer.shutdown()
+
+
+def span(name: str, parent: Optional[SpanContext] = None, **attributes):
+    """
+    Context manager for a span. No-op while tracing is disabled.
+
+        with span("supabase.query", table="bugs") as s:
+            ...
+            s.set_attribute("rows", len(rows))
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP_SPAN
+    return tracer.start_span(name, parent, attributes)
+
+
+def traced(name: Optional[str] = None, **attributes):
+    """Decorator that runs a sync or async function inside a span."""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return await func(*args, **kwargs)
+                with span(span_name, **attributes):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with span(span_name, **attributes):
+                return func(*args, **kwargs)
+
+        return sync_wrapper
+
+    return decorator
+
+
+# --- Tool and HTTP integration ---
+
+
+def _incoming_context() -> Optional[SpanContext]:
+    """Trace context from the HTTP request behind the current MCP call, if any."""
+    try:
+        from fastmcp.server.dependencies import get_http_headers
+
+        return extract_context(get_http_headers(include_all=True))
+    except Exception:
+        return None
+
+
+def tracing_wrapper(func: Callable, tool_name: str) -> Callable:
+    """Tool wrapper (see `instrumentation.instrument`) that traces each call."""
+    span_name = f"tools/call {tool_name}"
+
+    def _start():
+        parent = None if _current_span.get() is not None else _incoming_context()
+        return span(span_name, parent, **{"mcp.tool.name": tool_name})
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if _tracer is None:
+                return await func(*args, **kwargs)
+            with _start():
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        if _tracer is None:
+            return func(*args, **kwargs)
+        with _start():
+            return func(*args, **kwargs)
+
+    return sync_wrapper
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that wraps each HTTP request in a span, continuing any
+    incoming `traceparent`. Covers body parsing and response serialization.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        attributes = {"http.method": scope.get("method", ""), "http.target": scope.get("path", "")}
+        with span(f"{scope.get('method', 'HTTP')} {scope.get('path', '')}", extract_context(headers), **attributes) as s:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    s.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)